@@ -1,20 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import Dict, Optional, List
-from pydantic import BaseModel
-from app.db.base import get_db
-from app.api.deps import get_current_user
+from fastapi import (
+    APIRouter, Depends, Header, HTTPException, Request, Response, WebSocket, WebSocketDisconnect,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, List, Tuple
+from pydantic import BaseModel, Field
+from app.api.deps import get_current_user, get_optional_user, get_websocket_user
 from app.services.ai_service import ai_service
+from app.services.assessment import assessment_engine
+from app.services.chat_sessions import ChatSession, chat_sessions
+from app.services.completion_cache import completion_cache
+from app.services.crisis_gate import CRISIS_HEADER, CrisisScanner, crisis_gate
+from app.services.generation_jobs import FINISHED, JobConflict, generation_jobs
+from app.services.llm_client import llm_client, payload_key
+from app.services.llm_scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_CHAT,
+    PRIORITY_CRISIS,
+    LLMOverloaded,
+    llm_priority
+)
+from app.services.metrics import observe_ollama_timings
+from app.services.semantic_cache import semantic_cache
+from app.services.single_flight import llm_single_flight
 from app.models.user import User
+from collections import OrderedDict
 from datetime import datetime
-import httpx
+import asyncio
+import json
+import logging
+import uuid
 from app.core.ai_config import AISettings
 
 router = APIRouter()
 ai_settings = AISettings()
+logger = logging.getLogger(__name__)
+
 
 class EmotionRequest(BaseModel):
     text: str
+    # Also ask the LLM; defaults to EMOTION_LLM_SECOND_OPINION
+    second_opinion: Optional[bool] = None
+
+
+class EmotionBatchRequest(BaseModel):
+    texts: List[str]
+    second_opinion: Optional[bool] = None
+
 
 class MessageContext(BaseModel):
     recipient_type: str
@@ -22,249 +56,998 @@ class MessageContext(BaseModel):
     need: str
     situation: Optional[str] = None
 
+
 class MessageDraft(BaseModel):
     draft: str
     feedback: Optional[str] = None
 
+
 class Message(BaseModel):
     role: str
     content: str
     timestamp: Optional[datetime] = None
 
+
 class ChatRequest(BaseModel):
-    messages: List[Message]
-    user_id: str
+    messages: List[Message] = Field(..., min_length=1)
+    language: str = "en"
+    # Return the reply without waiting for sentiment; fetch it later with
+    # GET /chat/sentiment/{sentiment_id}
+    defer_sentiment: bool = False
+    # With a session from POST /chat/sessions, send only the new message(s);
+    # the server keeps the history. Sessions belong to the signed-in user, so
+    # a request with a session_id needs a bearer token.
+    session_id: Optional[str] = None
+    # Accepted from older clients; never used to pick a session's owner
+    user_id: Optional[str] = None
+
 
 class ChatResponse(BaseModel):
     response: str
     sentiment: Optional[dict] = None
+    sentiment_id: Optional[str] = None
+    crisis: Optional[dict] = None
+    session_id: Optional[str] = None
+
 
 class AssessmentRequest(BaseModel):
     user_responses: List[dict]
     user_id: str
 
+
 class AssessmentResponse(BaseModel):
     assessment: dict
     recommendations: List[str]
 
+
+class BatchAssessmentRequest(BaseModel):
+    assessments: List[AssessmentRequest]
+
+
+class BatchAssessmentResult(AssessmentResponse):
+    user_id: str
+
+
+class BatchAssessmentResponse(BaseModel):
+    results: List[BatchAssessmentResult]
+
+
+def chat_payload(messages: List[dict], stream: bool) -> Dict:
+    return {
+        "model": ai_settings.MODEL_NAME,
+        "messages": messages,
+        "stream": stream,
+        # Keep the model, and the evaluated prompt prefix, loaded between turns
+        "keep_alive": ai_settings.OLLAMA_KEEP_ALIVE,
+        "options": {"num_predict": ai_settings.MAX_TOKENS}
+    }
+
+
 async def call_ollama(messages: List[dict]) -> str:
-    async with httpx.AsyncClient() as client:
+    payload = chat_payload(messages, stream=False)
+
+    async def chat() -> str:
+        response = await llm_client.post("/api/chat", json=payload)
+        response.raise_for_status()
+        body = response.json()
+        observe_ollama_timings(body)
+        return body["message"]["content"]
+
+    try:
+        if not ai_settings.SINGLE_FLIGHT_ENABLED:
+            return await chat()
+        # Identical conversations already being answered share that reply
+        return await llm_single_flight.do(f"chat:{payload_key(payload)}", chat)
+    except LLMOverloaded:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error calling Ollama: {str(e)}"
+        )
+
+
+async def call_ollama_stream(messages: List[dict]) -> AsyncIterator[str]:
+    """Yield chat tokens from Ollama's streaming /api/chat endpoint."""
+    async for chunk in llm_client.stream_chunks("/api/chat", chat_payload(messages, stream=True)):
+        content = chunk.get("message", {}).get("content")
+        if content:
+            yield content
+
+
+def _ndjson_event(event: dict) -> str:
+    return json.dumps(event) + "\n"
+
+
+async def _single_token(text: str) -> AsyncIterator[str]:
+    yield text
+
+
+def _reply_with(text: str) -> Callable[[List[dict]], AsyncIterator[str]]:
+    """A token producer that answers with ``text`` instead of calling the LLM."""
+    def produce(_: List[dict]) -> AsyncIterator[str]:
+        return _single_token(text)
+    return produce
+
+
+def ndjson_stream(
+    http_request: Request,
+    tokens: AsyncIterator[str],
+    trailer: Optional["asyncio.Task[dict]"] = None,
+    leading: Optional[List[dict]] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> StreamingResponse:
+    """Forward tokens to the client as NDJSON events.
+
+    Each line is a JSON object: ``{"type": "token", "content": ...}`` for every
+    token, then ``{"type": "done"}``, or ``{"type": "error", "detail": ...}`` if
+    generation fails part-way (with ``status`` and ``retry_after`` when the
+    LLM is overloaded). ``leading`` events are sent before the first
+    token. If ``trailer`` is given, the event it produces is sent after the
+    last token and before ``done``. When the client disconnects the token
+    iterator is closed, which closes the Ollama connection and stops the
+    generation.
+    """
+    async def events():
         try:
-            response = await client.post(
-                f"{ai_settings.OLLAMA_BASE_URL}/api/chat",
-                json={
-                    "model": ai_settings.MODEL_NAME,
-                    "messages": messages,
-                    "stream": False
-                },
-                timeout=30.0
-            )
-            response.raise_for_status()
-            return response.json()["message"]["content"]
+            for event in leading or []:
+                yield _ndjson_event(event)
+            async for token in tokens:
+                if await http_request.is_disconnected():
+                    break
+                yield _ndjson_event({"type": "token", "content": token})
+            else:
+                if trailer is not None:
+                    yield _ndjson_event(await trailer)
+                yield _ndjson_event({"type": "done"})
+        except LLMOverloaded as e:
+            yield _ndjson_event({
+                "type": "error",
+                "detail": e.detail,
+                "status": e.status_code,
+                "retry_after": e.retry_after
+            })
         except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error calling Ollama: {str(e)}"
-            )
+            yield _ndjson_event({"type": "error", "detail": str(e)})
+        finally:
+            await tokens.aclose()
+            if trailer is not None:
+                trailer.cancel()
+
+    return StreamingResponse(events(), media_type="application/x-ndjson", headers=headers)
+
+
+def format_chat_messages(messages: List[Message]) -> List[dict]:
+    """Format messages for Ollama, with the mental health system prompt first."""
+    formatted_messages = [
+        {"role": msg.role, "content": msg.content}
+        for msg in messages
+    ]
+    formatted_messages.insert(0, {
+        "role": "system",
+        "content": ai_settings.EMOTION_PROMPT
+    })
+    return formatted_messages
+
+
+def find_chat_session(request: ChatRequest, user: Optional[User]) -> Optional[ChatSession]:
+    if request.session_id is None:
+        return None
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    session = chat_sessions.get(request.session_id, str(user.id))
+    if session is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown or expired chat session"
+        )
+    return session
+
+
+@asynccontextmanager
+async def chat_turn(
+    session: Optional[ChatSession],
+    messages: List[Message]
+) -> AsyncIterator[Tuple[List[dict], Callable[[str], None]]]:
+    """Yield the Ollama messages for one chat turn and a function recording the reply.
+
+    Without a session the client's messages are the whole conversation.
+    With one, they are appended to the session history (once the reply is
+    recorded) and the session is compacted afterwards if over budget.
+    """
+    if session is None:
+        yield format_chat_messages(messages), lambda reply: None
+        return
+    new_messages = [{"role": msg.role, "content": msg.content} for msg in messages]
+    async with session.lock:
+        yield (
+            session.prompt_messages(ai_settings.EMOTION_PROMPT, new_messages),
+            lambda reply: session.record(new_messages, reply)
+        )
+    chat_sessions.schedule_compaction(session)
+
+
+async def recorded_tokens(
+    session: Optional[ChatSession],
+    messages: List[Message],
+    produce: Callable[[List[dict]], AsyncIterator[str]]
+) -> AsyncIterator[str]:
+    """Stream a chat turn, recording the full reply in the session."""
+    async with chat_turn(session, messages) as (formatted_messages, record):
+        tokens = produce(formatted_messages)
+        parts = []
+        try:
+            async for token in tokens:
+                parts.append(token)
+                yield token
+        finally:
+            await tokens.aclose()
+        record("".join(parts))
+
+
+async def analyze_sentiment(text: str, language: str = "en") -> Optional[dict]:
+    """Derive a chat sentiment score and label from the emotion analysis."""
+    sentiment_analysis = await ai_service.analyze_emotion(text, language)
+    if not sentiment_analysis:
+        return None
+
+    # Crisis detection already pins the score strongly negative
+    return {
+        'score': sentiment_analysis['sentiment']['score'],
+        'label': sentiment_analysis['sentiment']['label']
+    }
+
+
+async def sentiment_within_deadline(text: str, language: str = "en") -> Optional[dict]:
+    """Best-effort sentiment: ``None`` if it fails or misses the chat deadline."""
+    try:
+        return await asyncio.wait_for(
+            analyze_sentiment(text, language),
+            timeout=ai_settings.CHAT_DEADLINE_SECONDS
+        )
+    except Exception:
+        return None
+
+
+async def _sentiment_event(text: str, language: str, crisis: Optional[dict] = None) -> dict:
+    # A crisis already carries the local classifier's sentiment; asking the
+    # LLM for a second opinion would queue a call the crisis path avoids
+    if crisis:
+        return {"type": "sentiment", "sentiment": crisis["sentiment"]}
+    return {"type": "sentiment", "sentiment": await sentiment_within_deadline(text, language)}
+
+# Deferred sentiment analyses awaiting a follow-up fetch, oldest first
+pending_sentiments: "OrderedDict[str, asyncio.Task]" = OrderedDict()
+
+
+def defer_sentiment(text: str, language: str = "en") -> str:
+    """Start sentiment analysis in the background and return its id."""
+    sentiment_id = uuid.uuid4().hex
+    pending_sentiments[sentiment_id] = asyncio.create_task(
+        sentiment_within_deadline(text, language)
+    )
+    while len(pending_sentiments) > ai_settings.MAX_PENDING_SENTIMENTS:
+        _, stale = pending_sentiments.popitem(last=False)
+        stale.cancel()
+    return sentiment_id
+
+
+def bypass_cache(http_request: Request) -> bool:
+    """Whether the client asked to skip cached completions.
+
+    Sent as ``Cache-Control: no-cache`` or ``X-Cache-Bypass: true``. The
+    fresh completion still replaces the cached one.
+    """
+    cache_control = http_request.headers.get("cache-control", "").lower()
+    bypass = http_request.headers.get("x-cache-bypass", "").lower()
+    return "no-cache" in cache_control or bypass in ("1", "true", "yes")
+
+
+@router.get("/llm/stats")
+async def llm_stats(current_user: User = Depends(get_current_user)) -> Dict:
+    """Report statistics for the shared LLM transport, caches, coalescing and backends."""
+    return {
+        "pool": llm_client.stats(),
+        "cache": completion_cache.stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "single_flight": llm_single_flight.stats(),
+        "backends": llm_client.backends.stats(),
+        "chat_sessions": chat_sessions.stats(),
+        "generation_jobs": generation_jobs.stats()
+    }
+
+
+async def gated_emotion_analysis(
+    text: str,
+    language: str,
+    second_opinion: Optional[bool],
+    owner: str
+) -> Tuple[Dict, Optional[dict]]:
+    """Analyze ``text`` behind the crisis gate; return the result and the crisis, if any.
+
+    A crisis raises the LLM priority, adds emergency resources to the result
+    and is never answered with an error: if the LLM second opinion fails, the
+    local analysis is returned without it.
+    """
+    crisis = crisis_gate.check(text, language)
+    if crisis:
+        llm_priority.set(PRIORITY_CRISIS)
+        if ai_settings.CRISIS_SKIP_LLM:
+            second_opinion = False
+
+    try:
+        result = await ai_service.analyze_emotion(text, language, second_opinion, owner)
+    except Exception:
+        if not crisis:
+            raise
+        result = await ai_service.analyze_emotion(text, language, second_opinion=False)
+    if crisis:
+        result["resources"] = crisis["resources"]
+        result["crisis_message"] = crisis["message"]
+    return result, crisis
+
 
 @router.post("/analyze-emotion")
 async def analyze_emotion(
     request: EmotionRequest,
+    http_response: Response,
     current_user: User = Depends(get_current_user)
 ) -> Dict:
     """Analyze the emotional content of user's message."""
     try:
-        result = await ai_service.analyze_emotion(request.text)
+        result, crisis = await gated_emotion_analysis(
+            request.text,
+            current_user.preferred_language,
+            request.second_opinion,
+            str(current_user.id)
+        )
+        if crisis:
+            http_response.headers[CRISIS_HEADER] = "true"
         return result
+    except LLMOverloaded:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
+
+def emotion_batch_concurrency() -> int:
+    """Analyses run at once for one batch: EMOTION_BATCH_CONCURRENCY, or by
+    default every generation slot of every Ollama backend."""
+    if ai_settings.EMOTION_BATCH_CONCURRENCY > 0:
+        return ai_settings.EMOTION_BATCH_CONCURRENCY
+    return ai_settings.LLM_MAX_CONCURRENCY * len(llm_client.backends.backends)
+
+
+async def emotion_batch_events(
+    http_request: Request,
+    texts: List[str],
+    language: str,
+    second_opinion: Optional[bool],
+    owner: str
+) -> AsyncIterator[str]:
+    """Analyze each distinct text, yielding NDJSON events in completion order."""
+    # Identical entries are analyzed once; the event lists all their positions
+    positions: Dict[str, List[int]] = {}
+    for index, text in enumerate(texts):
+        positions.setdefault(text, []).append(index)
+    semaphore = asyncio.Semaphore(emotion_batch_concurrency())
+
+    async def analyze(text: str) -> dict:
+        async with semaphore:
+            # Reviewing entries can wait for chat; crises still go first
+            llm_priority.set(PRIORITY_BACKGROUND)
+            try:
+                result, _ = await gated_emotion_analysis(
+                    text, language, second_opinion, owner
+                )
+                return {"type": "result", "indices": positions[text], "result": result}
+            except LLMOverloaded as e:
+                return {
+                    "type": "error",
+                    "indices": positions[text],
+                    "detail": e.detail,
+                    "status": e.status_code,
+                    "retry_after": e.retry_after
+                }
+            except Exception as e:
+                return {
+                    "type": "error", "indices": positions[text], "detail": str(e), "status": 500
+                }
+
+    tasks = [asyncio.create_task(analyze(text)) for text in positions]
+    errors = 0
+    try:
+        for next_event in asyncio.as_completed(tasks):
+            event = await next_event
+            if await http_request.is_disconnected():
+                return
+            errors += event["type"] == "error"
+            yield _ndjson_event(event)
+        yield _ndjson_event({
+            "type": "done",
+            "items": len(texts),
+            "analyzed": len(positions),
+            "errors": errors
+        })
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+@router.post("/analyze-emotion/batch")
+async def analyze_emotion_batch(
+    request: EmotionBatchRequest,
+    http_request: Request,
+    current_user: User = Depends(get_current_user)
+) -> StreamingResponse:
+    """Analyze many texts, streaming NDJSON results as each one completes.
+
+    Each distinct text yields one ``{"type": "result", "indices": [...],
+    "result": ...}`` event, or ``{"type": "error", "indices": [...],
+    "detail": ..., "status": ...}`` if its analysis failed, where
+    ``indices`` are its positions in ``texts``. A final ``{"type": "done",
+    ...}`` event reports the counts.
+    """
+    if len(request.texts) > ai_settings.EMOTION_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {ai_settings.EMOTION_BATCH_MAX_ITEMS} texts per batch"
+        )
+    return StreamingResponse(
+        emotion_batch_events(
+            http_request,
+            request.texts,
+            current_user.preferred_language,
+            request.second_opinion,
+            str(current_user.id)
+        ),
+        media_type="application/x-ndjson"
+    )
+
+
 @router.post("/draft-message")
 async def create_message_draft(
     context: MessageContext,
+    http_request: Request,
     current_user: User = Depends(get_current_user)
 ) -> Dict:
     """Generate a draft message based on user's context."""
     try:
-        return await ai_service.draft_message(context.dict())
+        return await ai_service.draft_message(context.dict(), bypass_cache(http_request))
+    except LLMOverloaded:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
+
+@router.post("/draft-message/stream")
+async def stream_message_draft(
+    context: MessageContext,
+    http_request: Request,
+    current_user: User = Depends(get_current_user)
+) -> StreamingResponse:
+    """Stream a draft message as NDJSON token events."""
+    return ndjson_stream(
+        http_request,
+        ai_service.stream_draft_message(context.dict(), bypass_cache(http_request))
+    )
+
+
 @router.post("/refine-message")
 async def refine_message(
     draft: MessageDraft,
+    http_request: Request,
     current_user: User = Depends(get_current_user)
 ) -> Dict:
     """Refine a message draft based on user feedback."""
+    # Refinement can wait; chat and crisis traffic go first
+    llm_priority.set(PRIORITY_BACKGROUND)
     try:
         refined_message = await ai_service.refine_message(
             draft.draft,
-            draft.feedback or "Make it more concise and clear"
+            draft.feedback or "Make it more concise and clear",
+            bypass_cache(http_request)
         )
         return {"refined_draft": refined_message}
+    except LLMOverloaded:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
+
+@router.post("/refine-message/stream")
+async def stream_refined_message(
+    draft: MessageDraft,
+    http_request: Request,
+    current_user: User = Depends(get_current_user)
+) -> StreamingResponse:
+    """Stream a refined message draft as NDJSON token events."""
+    llm_priority.set(PRIORITY_BACKGROUND)
+    return ndjson_stream(
+        http_request,
+        ai_service.stream_refine_message(
+            draft.draft,
+            draft.feedback or "Make it more concise and clear",
+            bypass_cache(http_request)
+        )
+    )
+
+
+def job_view(job: Dict) -> Dict:
+    """The client's view of a generation job."""
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "result": job["result"],
+        "error": job["error"],
+        "created_at": datetime.utcfromtimestamp(job["created_at"]).isoformat() + "Z",
+        "updated_at": datetime.utcfromtimestamp(job["updated_at"]).isoformat() + "Z",
+        "expires_at": datetime.utcfromtimestamp(job["expires_at"]).isoformat() + "Z",
+    }
+
+
+async def submit_job(
+    kind: str,
+    params: Dict,
+    http_response: Response,
+    current_user: User,
+    idempotency_key: Optional[str]
+) -> Dict:
+    try:
+        job = await generation_jobs.submit(str(current_user.id), kind, params, idempotency_key)
+    except JobConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    http_response.headers["Location"] = f"/api/ai/jobs/{job['id']}"
+    return job_view(job)
+
+
+@router.post("/draft-message/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_message_draft_job(
+    context: MessageContext,
+    http_request: Request,
+    http_response: Response,
+    current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None)
+) -> Dict:
+    """Queue a draft message; poll ``GET /jobs/{job_id}`` or watch its WebSocket.
+
+    Retrying with the same ``Idempotency-Key`` header returns the same job.
+    """
+    params = {"context": context.dict(), "bypass_cache": bypass_cache(http_request)}
+    return await submit_job("draft-message", params, http_response, current_user, idempotency_key)
+
+
+@router.post("/refine-message/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_refine_message_job(
+    draft: MessageDraft,
+    http_request: Request,
+    http_response: Response,
+    current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None)
+) -> Dict:
+    """Queue a refinement; poll ``GET /jobs/{job_id}`` or watch its WebSocket.
+
+    Retrying with the same ``Idempotency-Key`` header returns the same job.
+    """
+    params = {
+        "draft": draft.draft,
+        "feedback": draft.feedback or "Make it more concise and clear",
+        "bypass_cache": bypass_cache(http_request)
+    }
+    return await submit_job("refine-message", params, http_response, current_user, idempotency_key)
+
+
+@router.get("/jobs/{job_id}")
+async def get_generation_job(
+    job_id: str,
+    wait: float = 0,
+    current_user: User = Depends(get_current_user)
+) -> Dict:
+    """Report a job and, once it has finished, its result or error.
+
+    With ``wait`` the request is held for up to that many seconds (at most
+    ``GENERATION_JOB_MAX_WAIT_SECONDS``) until the job finishes.
+    """
+    timeout = max(0.0, min(wait, ai_settings.GENERATION_JOB_MAX_WAIT_SECONDS))
+    job = await generation_jobs.wait(job_id, str(current_user.id), timeout)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown or expired job"
+        )
+    return job_view(job)
+
+
+@router.websocket("/jobs/{job_id}/ws")
+async def watch_generation_job(
+    websocket: WebSocket,
+    job_id: str,
+    current_user: User = Depends(get_websocket_user)
+):
+    """Send the job's current state, then its final state once it finishes, and close."""
+    await websocket.accept()
+    owner = str(current_user.id)
+    job = await generation_jobs.get(job_id, owner)
+    if job is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Unknown or expired job")
+        return
+    await websocket.send_json(job_view(job))
+    while job is not None and job["status"] not in FINISHED:
+        job = await generation_jobs.wait(job_id, owner, ai_settings.GENERATION_JOB_MAX_WAIT_SECONDS)
+        if job is not None and job["status"] in FINISHED:
+            await websocket.send_json(job_view(job))
+    await websocket.close()
+
+
+def _crisis_chat_response(crisis: dict, session_id: Optional[str] = None) -> ChatResponse:
+    return ChatResponse(
+        response=crisis["message"],
+        sentiment=crisis["sentiment"],
+        crisis=crisis,
+        session_id=session_id
+    )
+
+
+@router.post("/chat/sessions")
+async def create_chat_session(current_user: User = Depends(get_current_user)) -> Dict:
+    """Start a server-side conversation; chat turns then send only new messages."""
+    session = chat_sessions.create(str(current_user.id))
+    return {"session_id": session.id, "ttl_seconds": chat_sessions.ttl}
+
+
+@router.get("/chat/sessions/{session_id}")
+async def get_chat_session(
+    session_id: str,
+    current_user: User = Depends(get_current_user)
+) -> Dict:
+    """Report a session's size and summary."""
+    session = chat_sessions.get(session_id, str(current_user.id))
+    if session is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown or expired chat session"
+        )
+    return session.info()
+
+
+@router.delete("/chat/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_chat_session(
+    session_id: str,
+    current_user: User = Depends(get_current_user)
+) -> Response:
+    """End a conversation and forget its history."""
+    if not chat_sessions.delete(session_id, str(current_user.id)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown or expired chat session"
+        )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat_with_ai(
-    request: ChatRequest
+    request: ChatRequest,
+    http_response: Response,
+    current_user: Optional[User] = Depends(get_optional_user)
 ):
-    try:
-        # Format messages for Ollama
-        formatted_messages = [
-            {"role": msg.role, "content": msg.content}
-            for msg in request.messages
-        ]
-
-        # Add system message for mental health context
-        formatted_messages.insert(0, {
-            "role": "system",
-            "content": ai_settings.EMOTION_PROMPT
-        })
+    last_message = request.messages[-1].content
+    session = find_chat_session(request, current_user)
 
-        # Get response from Ollama
-        response = await call_ollama(formatted_messages)
+    # Crisis gate: help is ready before, and independent of, the LLM
+    crisis = crisis_gate.check(last_message, request.language)
+    llm_priority.set(PRIORITY_CRISIS if crisis else PRIORITY_CHAT)
+    if crisis:
+        http_response.headers[CRISIS_HEADER] = "true"
+        if ai_settings.CRISIS_SKIP_LLM:
+            async with chat_turn(session, request.messages) as (_, record):
+                record(crisis["message"])
+            return _crisis_chat_response(crisis, request.session_id)
 
-        # Analyze sentiment of the last user message
-        sentiment_analysis = await ai_service.analyze_emotion(request.messages[-1].content)
-
-        # Extract sentiment score and label
-        sentiment = None
-        if sentiment_analysis:
-            # Check if there's a crisis detected
-            crisis_detected = sentiment_analysis.get('crisis_detected', False)
+    try:
+        # Ollama messages: the mental health system prompt, the session
+        # history if any, then the request's messages
+        async with chat_turn(session, request.messages) as (formatted_messages, record):
+            if request.defer_sentiment:
+                # Reply right away; the client fetches sentiment afterwards
+                sentiment_id = defer_sentiment(last_message, request.language)
+                response = await asyncio.wait_for(
+                    call_ollama(formatted_messages),
+                    timeout=ai_settings.CHAT_DEADLINE_SECONDS
+                )
+                record(response)
+                return ChatResponse(
+                    response=response,
+                    sentiment_id=sentiment_id,
+                    crisis=crisis,
+                    session_id=request.session_id
+                )
 
-            # Create a sentiment object with score and label
-            sentiment = {
-                'score': -0.7 if crisis_detected else -0.3,  # Negative score if crisis detected
-                'label': 'negative' if crisis_detected else 'neutral'
-            }
+            # The reply and the sentiment of the last user message don't depend
+            # on each other, so run both generations at once under one deadline
+            response, sentiment = await asyncio.gather(
+                asyncio.wait_for(
+                    call_ollama(formatted_messages),
+                    timeout=ai_settings.CHAT_DEADLINE_SECONDS
+                ),
+                sentiment_within_deadline(last_message, request.language)
+            )
+            record(response)
 
         return ChatResponse(
             response=response,
-            sentiment=sentiment
+            sentiment=sentiment,
+            crisis=crisis,
+            session_id=request.session_id
         )
     except Exception as e:
+        if crisis:
+            # Never answer a crisis with an error: fall back to the resources
+            return _crisis_chat_response(crisis, request.session_id)
+        if isinstance(e, (HTTPException, LLMOverloaded)):
+            raise
+        if isinstance(e, asyncio.TimeoutError):
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Timed out waiting for the AI response"
+            )
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.get("/chat/sentiment/{sentiment_id}")
+async def get_chat_sentiment(sentiment_id: str) -> Dict:
+    """Fetch the sentiment of a chat turn sent with ``defer_sentiment``."""
+    task = pending_sentiments.pop(sentiment_id, None)
+    if task is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown or expired sentiment id"
+        )
+    return {"sentiment_id": sentiment_id, "sentiment": await task}
+
+
+@router.post("/chat/stream")
+async def stream_chat_with_ai(
+    request: ChatRequest,
+    http_request: Request,
+    current_user: Optional[User] = Depends(get_optional_user)
+) -> StreamingResponse:
+    """Stream the chat reply as NDJSON token events while Ollama generates it.
+
+    If the last user message shows crisis signals, a ``{"type": "crisis", ...}``
+    event with emergency resources is sent first, before the model produces
+    anything. Sentiment of the last user message is computed alongside the
+    reply and sent as a trailing ``{"type": "sentiment", ...}`` event; for a
+    crisis it is the crisis gate's own, so no LLM call is made for it.
+    """
+    last_message = request.messages[-1].content
+    session = find_chat_session(request, current_user)
+    produce = call_ollama_stream
+    leading = []
+    headers = {}
+
+    crisis = crisis_gate.check(last_message, request.language)
+    llm_priority.set(PRIORITY_CRISIS if crisis else PRIORITY_CHAT)
+    if crisis:
+        leading.append({"type": "crisis", **crisis})
+        headers[CRISIS_HEADER] = "true"
+        if ai_settings.CRISIS_SKIP_LLM:
+            produce = _reply_with(crisis["message"])
+
+    sentiment = asyncio.create_task(
+        _sentiment_event(last_message, request.language, crisis)
+    )
+    return ndjson_stream(
+        http_request,
+        recorded_tokens(session, request.messages, produce),
+        trailer=sentiment,
+        leading=leading,
+        headers=headers
+    )
+
+
+async def websocket_chat_turn(
+    send: Callable[[Dict], Awaitable[None]],
+    session: ChatSession,
+    content: str,
+    language: str
+) -> None:
+    """Answer one message on a chat WebSocket, streaming the reply as events.
+
+    Events go out through ``send``, the connection's only writer. The
+    user's message, alone and together with their earlier messages, goes
+    through the crisis gate before the LLM is called. The reply is scanned
+    as it streams, so a crisis the model recognizes is pushed as soon as it
+    shows up in the text.
+    """
+    window = ai_settings.CRISIS_SCAN_WINDOW_CHARS
+    previous = " ".join(
+        message["content"] for message in session.messages if message["role"] == "user"
+    )
+    crisis = crisis_gate.check(content, language)
+    if crisis is None and previous:
+        # Signals spread over several messages, reported once: not if the
+        # earlier messages already fired on their own
+        crisis = crisis_gate.check(f"{previous} {content}"[-window:], language)
+        if crisis and crisis_gate.check(previous[-window:], language):
+            crisis = None
+    llm_priority.set(PRIORITY_CRISIS if crisis else PRIORITY_CHAT)
+    produce = call_ollama_stream
+    if crisis:
+        await send({"type": "crisis", "source": "input", **crisis})
+        if ai_settings.CRISIS_SKIP_LLM:
+            produce = _reply_with(crisis["message"])
+
+    # Help is already on screen after an input crisis; only scan otherwise
+    scanner = CrisisScanner(language) if not crisis else None
+    sentiment = asyncio.create_task(_sentiment_event(content, language, crisis))
+    tokens = recorded_tokens(session, [Message(role="user", content=content)], produce)
+    try:
+        async for token in tokens:
+            await send({"type": "token", "content": token})
+            output_crisis = scanner.feed(token) if scanner else None
+            if output_crisis:
+                await send({"type": "crisis", "source": "output", **output_crisis})
+        output_crisis = scanner.finish() if scanner else None
+        if output_crisis:
+            await send({"type": "crisis", "source": "output", **output_crisis})
+        await send(await sentiment)
+        await send({"type": "done"})
+    except LLMOverloaded as e:
+        await send({
+            "type": "error",
+            "detail": e.detail,
+            "status": e.status_code,
+            "retry_after": e.retry_after
+        })
+    except WebSocketDisconnect:
+        raise
+    except Exception as e:
+        await send({"type": "error", "detail": str(e)})
+    finally:
+        await tokens.aclose()
+        sentiment.cancel()
+
+
+@router.websocket("/ws/chat")
+async def chat_websocket(
+    websocket: WebSocket,
+    session_id: Optional[str] = None,
+    language: Optional[str] = None,
+    current_user: User = Depends(get_websocket_user)
+):
+    """Chat over one authenticated connection, with the history kept on the server.
+
+    The server first sends ``{"type": "session", "session_id": ...}``; pass
+    that ``session_id`` when reconnecting to continue the conversation.
+    Send ``{"type": "message", "content": ...}`` for each turn, and
+    ``{"type": "cancel"}`` to stop the reply being generated. Each turn
+    streams ``token`` events, then ``sentiment`` and ``done`` (or
+    ``error``). A ``{"type": "crisis", "source": "input" | "output", ...}``
+    event with emergency resources is pushed as soon as the message, or the
+    reply so far, shows crisis signals.
+    """
+    await websocket.accept()
+    owner = str(current_user.id)
+    language = language or current_user.preferred_language
+    session = chat_sessions.get(session_id, owner) if session_id else None
+    turn: Optional[asyncio.Task] = None
+    send_lock = asyncio.Lock()
+
+    async def send(event: Dict) -> None:
+        # The running turn and this loop both send; one message at a time
+        async with send_lock:
+            await websocket.send_json(event)
+
+    async def send_error(detail: str) -> None:
+        await send({"type": "error", "detail": detail})
+
+    async def send_session() -> None:
+        await send({
+            "type": "session",
+            "session_id": session.id,
+            "ttl_seconds": chat_sessions.ttl
+        })
+
+    if session is None:
+        session = chat_sessions.create(owner)
+    await send_session()
+    try:
+        while True:
+            try:
+                event = json.loads(await websocket.receive_text())
+            except ValueError:
+                await send_error("Events must be JSON objects")
+                continue
+            if not isinstance(event, dict):
+                await send_error("Events must be JSON objects")
+                continue
+
+            if event.get("type") == "cancel":
+                if turn is not None and not turn.done():
+                    turn.cancel()
+                    await asyncio.wait([turn])
+                    await send({"type": "cancelled"})
+                continue
+            if (
+                event.get("type", "message") != "message"
+                or not isinstance(event.get("content"), str)
+            ):
+                await send_error('Expected {"type": "message", "content": ...}')
+                continue
+            if turn is not None and not turn.done():
+                await send_error("A reply is still being generated")
+                continue
+
+            # The session expires if the socket sits idle for longer than its TTL
+            if chat_sessions.get(session.id, owner) is None:
+                session = chat_sessions.create(owner)
+                await send_session()
+            turn = asyncio.create_task(
+                websocket_chat_turn(send, session, event["content"], language)
+            )
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if turn is not None:
+            # Closes the Ollama stream, which stops the generation
+            turn.cancel()
+            await asyncio.wait([turn])
+            if not turn.cancelled():
+                # Sending to the closed socket may have failed the turn
+                turn.exception()
+
+
 @router.post("/assess", response_model=AssessmentResponse)
 async def mental_health_assessment(
     request: AssessmentRequest
 ):
     try:
-        # Simple assessment logic without calling Ollama
-        # Count keywords in responses to determine levels
-        stress_words = ['stress', 'overwhelm', 'pressure', 'tense', 'strain']
-        anxiety_words = ['anxious', 'worry', 'nervous', 'fear', 'panic']
-        depression_words = ['sad', 'depressed', 'hopeless', 'tired', 'exhausted']
-        positive_words = ['good', 'happy', 'calm', 'relax', 'peace', 'joy', 'content']
-
-        # Initialize counters
-        stress_count = 0
-        anxiety_count = 0
-        depression_count = 0
-        positive_count = 0
-
-        # Analyze responses
-        all_text = ''
-        for response in request.user_responses:
-            answer = response.get('answer', '').lower()
-            all_text += answer + ' '
-
-            # Count occurrences of keywords
-            for word in stress_words:
-                if word in answer:
-                    stress_count += 1
-
-            for word in anxiety_words:
-                if word in answer:
-                    anxiety_count += 1
-
-            for word in depression_words:
-                if word in answer:
-                    depression_count += 1
-
-            for word in positive_words:
-                if word in answer:
-                    positive_count += 1
-
-        # Determine levels based on counts
-        stress_level = "low"
-        if stress_count >= 2:
-            stress_level = "moderate"
-        if stress_count >= 4:
-            stress_level = "high"
-
-        anxiety_level = "low"
-        if anxiety_count >= 2:
-            anxiety_level = "moderate"
-        if anxiety_count >= 4:
-            anxiety_level = "high"
-
-        depression_risk = "low"
-        if depression_count >= 2:
-            depression_risk = "moderate"
-        if depression_count >= 4:
-            depression_risk = "high"
-
-        # Determine overall wellbeing
-        overall_score = positive_count - (stress_count + anxiety_count + depression_count) / 3
-
-        if overall_score < -2:
-            overall_wellbeing = "poor"
-        elif overall_score < 0:
-            overall_wellbeing = "fair"
-        elif overall_score < 2:
-            overall_wellbeing = "good"
-        else:
-            overall_wellbeing = "excellent"
-
-        # Create assessment dictionary
-        assessment = {
-            "stress_level": stress_level,
-            "anxiety_level": anxiety_level,
-            "depression_risk": depression_risk,
-            "overall_wellbeing": overall_wellbeing
-        }
-
-        # Generate recommendations based on assessment
-        recommendations = []
-
-        if stress_level in ["moderate", "high"]:
-            recommendations.append("Practice deep breathing exercises or meditation to reduce stress")
-
-        if anxiety_level in ["moderate", "high"]:
-            recommendations.append("Consider mindfulness techniques to manage anxiety")
-
-        if depression_risk in ["moderate", "high"]:
-            recommendations.append("Reach out to a mental health professional for support")
-
-        if overall_wellbeing in ["poor", "fair"]:
-            recommendations.append("Establish a regular sleep schedule and prioritize self-care")
-
-        # Add general recommendations
-        recommendations.extend([
-            "Engage in regular physical activity",
-            "Connect with friends and family regularly",
-            "Maintain a balanced diet and stay hydrated"
-        ])
+        # Keyword-based assessment without calling Ollama
+        result = assessment_engine.score(request.user_responses)
+        return AssessmentResponse(
+            assessment=result["assessment"],
+            recommendations=result["recommendations"]
+        )
+    except Exception as e:
+        logger.exception("Assessment failed")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Limit to 5 recommendations
-        recommendations = recommendations[:5]
 
-        return AssessmentResponse(
-            assessment=assessment,
-            recommendations=recommendations
+@router.post("/assess/batch", response_model=BatchAssessmentResponse)
+async def batch_mental_health_assessment(
+    request: BatchAssessmentRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Score many users' response sets in one request."""
+    if len(request.assessments) > ai_settings.MAX_ASSESSMENT_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {ai_settings.MAX_ASSESSMENT_BATCH} assessments per batch"
+        )
+    try:
+        # Large batches are CPU-bound; keep them off the event loop
+        results = await run_in_threadpool(
+            assessment_engine.score_batch,
+            [assessment.user_responses for assessment in request.assessments]
         )
+        return BatchAssessmentResponse(results=[
+            BatchAssessmentResult(user_id=assessment.user_id, **result)
+            for assessment, result in zip(request.assessments, results)
+        ])
     except Exception as e:
-        print(f"Assessment error: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        logger.exception("Assessment failed")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,28 +1,44 @@
 from datetime import date
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import get_current_user
 from app.db.base import get_db
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.security import create_access_token
+from app.services.auth_cache import auth_cache
+from app.services.password_hasher import PasswordHasherBusy, password_hasher
 from app.schemas.user import UserCreate, UserLogin, Token, UserResponse
 from app.models.user import User
 
 router = APIRouter()
 
+
+def hasher_busy(exc: PasswordHasherBusy) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(exc),
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
 def calculate_is_minor(birth_date: date) -> bool:
     today = date.today()
     age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
     return age < 18
 
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     # Check if user already exists
-    if db.query(User).filter(User.email == user_data.email).first():
+    result = await db.execute(select(User.id).where(User.email == user_data.email))
+    if result.first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    if db.query(User).filter(User.username == user_data.username).first():
+    result = await db.execute(select(User.id).where(User.username == user_data.username))
+    if result.first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already taken"
@@ -39,7 +55,10 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
 
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    try:
+        hashed_password = await password_hasher.hash(user_data.password)
+    except PasswordHasherBusy as e:
+        raise hasher_busy(e)
     db_user = User(
         email=user_data.email,
         username=user_data.username,
@@ -51,15 +70,17 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
+
 @router.post("/login", response_model=Token)
-async def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
     # Find user by email
-    user = db.query(User).filter(User.email == user_data.email).first()
+    result = await db.execute(select(User).where(User.email == user_data.email))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -67,13 +88,36 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
         )
     
     # Verify password
-    if not verify_password(user_data.password, user.hashed_password):
+    try:
+        verified, new_hash = await password_hasher.verify_and_update(
+            user_data.password,
+            user.hashed_password
+        )
+    except PasswordHasherBusy as e:
+        raise hasher_busy(e)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
+    if new_hash:
+        # Stored hash used an older bcrypt cost
+        user.hashed_password = new_hash
+        await db.commit()
     
     # Create access token
     access_token = create_access_token(data={"sub": user.email})
     
-    return {"access_token": access_token, "token_type": "bearer"} 
\ No newline at end of file
+    return {"access_token": access_token, "token_type": "bearer"}
+
+
+@router.get("/hasher/stats")
+async def hasher_stats(current_user: User = Depends(get_current_user)):
+    """Report password hashing pool and queue statistics."""
+    return password_hasher.stats()
+
+
+@router.get("/cache/stats")
+async def auth_cache_stats(current_user: User = Depends(get_current_user)):
+    """Report token and user cache statistics."""
+    return auth_cache.stats()
\ No newline at end of file
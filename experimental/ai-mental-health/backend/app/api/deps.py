@@ -1,36 +1,76 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, WebSocket, WebSocketException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from sqlalchemy.orm import Session
-from app.core.config import settings
+from jose import JWTError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.base import get_db
 from app.models.user import User
+from app.services.auth_cache import auth_cache
 from typing import Optional
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+# For endpoints that also serve anonymous callers
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
+
+
+async def user_from_token(token: str, db: AsyncSession) -> Optional[User]:
+    """Return the active user ``token`` was issued to, or ``None``."""
+    try:
+        # Signatures already verified for this token are not checked again
+        email, expires_at = auth_cache.verify_token(token)
+        if email is None:
+            return None
+    except JWTError:
+        return None
+
+    user = auth_cache.get_user(email)
+    if user is None:
+        result = await db.execute(select(User).where(User.email == email))
+        user = result.scalars().first()
+        if user is None:
+            return None
+        auth_cache.set_user(email, user, expires_at)
+    if not user.is_active:
+        return None
+    return user
+
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Optional[User]:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
+    user = await user_from_token(token, db)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
         )
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+    return user
+
 
-    user = db.query(User).filter(User.email == email).first()
+async def get_optional_user(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+) -> Optional[User]:
+    """The signed-in user, or ``None`` when no valid token was sent."""
+    return await user_from_token(token, db) if token else None
+
+
+async def get_websocket_user(
+    websocket: WebSocket,
+    token: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """Authenticate a WebSocket from its ``Authorization: Bearer`` header or,
+    since browsers cannot set headers on WebSockets, a ``token`` query parameter."""
+    scheme, _, credentials = websocket.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and credentials:
+        token = credentials
+    user = await user_from_token(token, db) if token else None
     if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+        raise WebSocketException(
+            code=status.WS_1008_POLICY_VIOLATION,
+            reason="Could not validate credentials"
+        )
+    return user
@@ -0,0 +1,21 @@
+from typing import Dict
+
+from fastapi import APIRouter, Response, status
+
+from app.services.model_warmup import model_warmup
+
+router = APIRouter()
+
+
+@router.get("/live")
+async def liveness() -> Dict:
+    """The process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def readiness(response: Response) -> Dict:
+    """Ready to take traffic once the models are warm; 503 until then."""
+    if not model_warmup.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": "ready" if model_warmup.ready else "warming_up", **model_warmup.stats()}
@@ -0,0 +1,132 @@
+import time
+from typing import Dict
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from starlette.routing import Match
+
+from app.core.config import settings
+from app.services.chat_sessions import chat_sessions
+from app.services.generation_jobs import generation_jobs
+from app.services.llm_client import llm_client
+from app.services.metrics import (
+    http_request_duration,
+    http_requests,
+    http_requests_in_flight,
+    metrics,
+    request_timings,
+)
+from app.services.mood_buffer import mood_buffer
+from app.services.password_hasher import password_hasher
+from app.services.semantic_cache import semantic_cache
+from app.services.single_flight import llm_single_flight
+
+router = APIRouter()
+
+# Read from the services when /metrics is scraped
+metrics.gauge("llm_scheduler_running", "LLM calls holding a scheduler slot.", ("backend",),
+              function=lambda: {(backend.url,): backend.scheduler.running
+                                for backend in llm_client.backends.backends})
+metrics.gauge("llm_scheduler_queued", "LLM calls waiting for a scheduler slot.", ("backend",),
+              function=lambda: {(backend.url,): backend.scheduler.queued
+                                for backend in llm_client.backends.backends})
+metrics.gauge("llm_backend_healthy", "Whether an Ollama backend passed its last health check.",
+              ("backend",),
+              function=lambda: {(backend.url,): float(backend.healthy)
+                                for backend in llm_client.backends.backends})
+metrics.gauge("llm_single_flight_in_flight", "Distinct LLM generations shared by callers.",
+              function=lambda: llm_single_flight.stats()["in_flight"])
+metrics.gauge("chat_sessions", "Open server-side chat sessions.",
+              function=lambda: chat_sessions.stats()["sessions"])
+metrics.gauge("generation_jobs_queued", "Generation jobs waiting for a worker.",
+              function=lambda: generation_jobs.queued)
+metrics.gauge("generation_jobs_running", "Generation jobs being run.",
+              function=lambda: generation_jobs.running)
+metrics.gauge("mood_buffer_pending", "Mood entries waiting to be written.",
+              function=lambda: mood_buffer.stats()["pending"])
+metrics.gauge("semantic_cache_entries", "Completions in the semantic cache.",
+              function=lambda: semantic_cache.stats()["entries"])
+metrics.gauge("password_hasher_queued", "Password hashes waiting for a worker.",
+              function=lambda: password_hasher.queued)
+
+
+def route_template(scope: Dict) -> str:
+    """The path template of the route handling ``scope``, e.g.
+    ``/api/ai/chat/sessions/{session_id}``.
+
+    Using the template rather than the raw path keeps the number of label
+    values bounded; requests matching no route share one label.
+    """
+    partial = None
+    for route in scope["app"].router.routes:
+        # Not every route type has a path (e.g. included routers on newer FastAPI)
+        path = getattr(route, "path", None)
+        if path is None:
+            continue
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return path
+        if match == Match.PARTIAL and partial is None:
+            partial = path
+    return partial or "unmatched"
+
+
+def server_timing(timings: Dict[str, float], total: float) -> str:
+    entries = [f"{name};dur={seconds * 1e3:.1f}" for name, seconds in timings.items()]
+    entries.append(f"app;dur={total * 1e3:.1f}")
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """Record latency, status and in-flight counts per route.
+
+    Latency runs until the last byte of the response, so streaming responses
+    are measured in full. With ``SERVER_TIMING_ENABLED`` the response carries
+    a ``Server-Timing`` header with the time spent so far in the database,
+    waiting for and talking to the LLM, and in total.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+        token = request_timings.set(timings)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.SERVER_TIMING_ENABLED:
+                    header = server_timing(timings, time.perf_counter() - started)
+                    headers = [
+                        *message.get("headers", []),
+                        (b"server-timing", header.encode("latin-1")),
+                    ]
+                    message = dict(message, headers=headers)
+            await send(message)
+
+        http_requests_in_flight.inc(method=method, route=route)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            http_requests_in_flight.dec(method=method, route=route)
+            http_request_duration.observe(time.perf_counter() - started, method=method, route=route)
+            http_requests.inc(method=method, route=route, status=str(status))
+            request_timings.reset(token)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics() -> PlainTextResponse:
+    """Expose metrics in the Prometheus text format."""
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
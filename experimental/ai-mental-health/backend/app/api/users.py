@@ -1,18 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import datetime
-from app.db.base import get_db
+from app.db.base import get_analytics_db, get_db
 from app.api.deps import get_current_user
+from app.core.config import settings
+from app.models.mood import MoodRollup
 from app.models.user import User
 from app.schemas.user import UserResponse
-from pydantic import BaseModel
+from app.services.mood_analytics import mood_analytics
+from app.services.mood_buffer import mood_buffer
+from pydantic import BaseModel, Field
 
 router = APIRouter()
 
+
 class MoodEntry(BaseModel):
     mood: str
-    timestamp: datetime = datetime.utcnow()
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    notes: Optional[str] = None
+
 
 class SupportContact(BaseModel):
     name: str
@@ -20,23 +28,110 @@ class SupportContact(BaseModel):
     phone: str = None
     email: str = None
 
+
 @router.get("/me", response_model=UserResponse)
 async def read_user_me(current_user: User = Depends(get_current_user)):
     return current_user
 
+
 @router.post("/mood")
 async def record_mood(
     mood_data: MoodEntry,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
-    # TODO: Implement mood tracking in database
+    # Buffered and committed with other entries shortly after
+    await mood_buffer.add(
+        current_user.id,
+        mood_data.mood,
+        mood_data.timestamp,
+        mood_data.notes
+    )
     return {"status": "success", "message": "Mood recorded"}
 
+
+@router.get("/mood/rollups")
+async def get_mood_rollups(
+    period: str = Query("day", pattern="^(day|week)$"),
+    limit: int = Query(30, ge=1, le=366),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Mood counts per day or week for the most recent periods."""
+    recent = (
+        select(MoodRollup.period_start)
+        .where(MoodRollup.user_id == current_user.id, MoodRollup.period == period)
+        .distinct()
+        .order_by(MoodRollup.period_start.desc())
+        .limit(limit)
+    )
+    result = await db.execute(
+        select(MoodRollup.period_start, MoodRollup.mood, MoodRollup.count)
+        .where(
+            MoodRollup.user_id == current_user.id,
+            MoodRollup.period == period,
+            MoodRollup.period_start.in_(recent)
+        )
+        .order_by(MoodRollup.period_start)
+    )
+    periods = {}
+    for start, mood, count in result:
+        periods.setdefault(start, {})[mood] = count
+    return [
+        {"period_start": start, "moods": moods, "total": sum(moods.values())}
+        for start, moods in periods.items()
+    ]
+
+
+@router.get("/mood/trends")
+async def get_mood_trends(
+    days: int = Query(30, ge=1, le=366),
+    window: int = Query(7, ge=1, le=90),
+    streak_threshold: int = Query(3, ge=1),
+    cohort: bool = False,
+    user_id: Optional[List[int]] = Query(None),
+    is_minor: Optional[bool] = None,
+    language: Optional[str] = None,
+    limit: int = Query(100, ge=0, le=10000),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_analytics_db)
+):
+    """Rolling averages, volatility, negative streaks and week-over-week change.
+
+    Without ``cohort`` the trends cover the current user. Cohort queries,
+    filtered by ``user_id``, ``is_minor`` and ``language``, are limited to
+    analytics staff; users are listed longest current negative streak first.
+    """
+    if not cohort:
+        return await mood_analytics.trends(
+            db, days, window, streak_threshold, user_ids=[current_user.id]
+        )
+    if current_user.email not in settings.ANALYTICS_STAFF_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Cohort trends are restricted to analytics staff"
+        )
+    return await mood_analytics.trends(
+        db,
+        days,
+        window,
+        streak_threshold,
+        limit,
+        user_ids=user_id,
+        is_minor=is_minor,
+        language=language
+    )
+
+
+@router.get("/mood/buffer/stats")
+async def mood_buffer_stats(current_user: User = Depends(get_current_user)):
+    """Report write-behind buffer depth and flush counters."""
+    return mood_buffer.stats()
+
+
 @router.get("/contacts")
 async def get_contacts(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # TODO: Implement contact retrieval from database
     # For now, return mock data
@@ -47,19 +142,21 @@ async def get_contacts(
     ]
     return mock_contacts
 
+
 @router.post("/contacts")
 async def add_contact(
     contact: SupportContact,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # TODO: Implement contact addition to database
     return {"status": "success", "message": "Contact added"}
 
+
 @router.get("/resources")
 async def get_resources(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # TODO: Implement resource retrieval from database
     # Return mock data for now
@@ -1,10 +1,118 @@
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 
+
 class AISettings(BaseSettings):
     OLLAMA_BASE_URL: str = "http://localhost:11434"
+    # Several Ollama instances to spread calls over; overrides OLLAMA_BASE_URL
+    OLLAMA_BASE_URLS: List[str] = []
+    # "least-outstanding", or "model-loaded" to prefer instances with the model in memory
+    OLLAMA_ROUTING: str = "least-outstanding"
+    # Unhealthy instances rejoin after passing a health check; 0 disables the checks
+    OLLAMA_HEALTH_CHECK_INTERVAL_SECONDS: float = 10.0
+    OLLAMA_HEALTH_CHECK_TIMEOUT: float = 2.0
     MODEL_NAME: str = "llama3.2:latest"
     MAX_TOKENS: int = 2000
     TEMPERATURE: float = 0.7
+
+    # Shared Ollama connection pool
+    OLLAMA_MAX_CONNECTIONS: int = 20
+    OLLAMA_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    OLLAMA_KEEPALIVE_EXPIRY: float = 60.0
+    OLLAMA_CONNECT_TIMEOUT: float = 5.0
+    OLLAMA_READ_TIMEOUT: float = 30.0
+    OLLAMA_WRITE_TIMEOUT: float = 10.0
+    OLLAMA_POOL_TIMEOUT: float = 10.0
+
+    # Chat pipeline
+    CHAT_DEADLINE_SECONDS: float = 30.0
+    MAX_PENDING_SENTIMENTS: int = 1000
+
+    # Local emotion classifier, and the LLM's second opinion on top of it.
+    # Keep the LLM on: the lexicon misses indirect phrasings (see
+    # emotion_classifier.CRISIS_NEGATION_WEIGHT).
+    CRISIS_THRESHOLD: float = 1.0
+    EMOTION_LLM_SECOND_OPINION: bool = True
+    # Answer crisis messages with emergency resources only, skipping the LLM
+    CRISIS_SKIP_LLM: bool = False
+    # Streamed text is checked for crisis signals over its last this many characters
+    CRISIS_SCAN_WINDOW_CHARS: int = 600
+
+    # /analyze-emotion/batch: texts per request, and analyses run at once per
+    # batch (0: LLM_MAX_CONCURRENCY for each Ollama instance)
+    EMOTION_BATCH_MAX_ITEMS: int = 200
+    EMOTION_BATCH_CONCURRENCY: int = 0
+
+    # Keyword assessments: response sets per /assess/batch request
+    MAX_ASSESSMENT_BATCH: int = 1000
+
+    # Completion cache for repeatable LLM calls: "memory", "sqlite" or "none"
+    COMPLETION_CACHE_BACKEND: str = "memory"
+    COMPLETION_CACHE_PATH: str = "./completion_cache.db"
+    COMPLETION_CACHE_TTL_SECONDS: float = 3600.0
+    COMPLETION_CACHE_MAX_ENTRIES: int = 1000
+    # SQLite backend: how stale an entry's last use may get before a hit records it
+    COMPLETION_CACHE_TOUCH_INTERVAL_SECONDS: float = 60.0
+    # Endpoints whose completions are cached (also: "analyze-emotion")
+    COMPLETION_CACHE_ENDPOINTS: List[str] = ["draft-message", "refine-message"]
+    # Semantic cache: completions reused for paraphrased inputs, matched on
+    # Ollama embeddings. Endpoints to enable ("analyze-emotion",
+    # "draft-message"), and the cosine similarity a cached input needs to be
+    # reused, per endpoint. "analyze-emotion" feedback is only reused for the
+    # user it was written for.
+    SEMANTIC_CACHE_ENDPOINTS: List[str] = []
+    SEMANTIC_CACHE_THRESHOLDS: Dict[str, float] = {"analyze-emotion": 0.92, "draft-message": 0.95}
+    SEMANTIC_CACHE_DEFAULT_THRESHOLD: float = 0.95
+    # Also kept warm by the model warm-up while the semantic cache is enabled
+    EMBEDDING_MODEL: str = "nomic-embed-text"
+    # Embedding calls running at once; lookups beyond that skip the cache
+    SEMANTIC_CACHE_MAX_EMBEDDINGS: int = 4
+    SEMANTIC_CACHE_TTL_SECONDS: float = 3600.0
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 10000
+    # Vector index: "flat" (exact), "int8" (quantized) or "ivf" (clustered)
+    SEMANTIC_CACHE_INDEX: str = "flat"
+    SEMANTIC_CACHE_IVF_LISTS: int = 64
+    SEMANTIC_CACHE_IVF_PROBES: int = 4
+    # Coalesce identical in-flight LLM requests into one generation
+    SINGLE_FLIGHT_ENABLED: bool = True
+
+    # Admission control for each Ollama instance: concurrent generations,
+    # queued calls beyond that, and how long a queued call may wait before a 503
+    LLM_MAX_CONCURRENCY: int = 4
+    LLM_MAX_QUEUE: int = 32
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 10.0
+
+    # How long Ollama keeps the model (and its prompt cache) loaded after a call
+    OLLAMA_KEEP_ALIVE: str = "30m"
+    # Models loaded on every instance at startup and kept resident: MODEL_NAME
+    # plus these. The service reports ready once each is warm somewhere.
+    WARMUP_MODELS: List[str] = []
+    # Embedding models to keep resident the same way; they are loaded through
+    # /api/embeddings, since /api/generate rejects them
+    WARMUP_EMBEDDING_MODELS: List[str] = []
+    MODEL_WARMUP_ENABLED: bool = True
+    MODEL_WARMUP_TIMEOUT_SECONDS: float = 300.0
+    # Refresh keep_alive this often, so idle instances keep the models; 0 disables
+    MODEL_KEEP_WARM_INTERVAL_SECONDS: float = 300.0
+
+    # Background generation jobs for drafts and refinements: "memory", or
+    # "sqlite" so every worker process can report any job and results survive
+    # restarts. Results are kept GENERATION_JOB_TTL_SECONDS after they finish.
+    GENERATION_JOB_STORE: str = "memory"
+    GENERATION_JOB_STORE_PATH: str = "./generation_jobs.db"
+    GENERATION_JOB_WORKERS: int = 4
+    GENERATION_JOB_MAX_QUEUE: int = 1000
+    GENERATION_JOB_TTL_SECONDS: float = 3600.0
+    GENERATION_JOB_TIMEOUT_SECONDS: float = 300.0
+    # Longest a poll with ?wait= may hold the connection
+    GENERATION_JOB_MAX_WAIT_SECONDS: float = 30.0
+
+    # Server-side chat sessions. History over the token budget is summarized
+    # down to CHAT_HISTORY_TRIM_RATIO of the budget.
+    CHAT_SESSION_TTL_SECONDS: float = 3600.0
+    CHAT_MAX_SESSIONS: int = 10000
+    CHAT_HISTORY_TOKEN_BUDGET: int = 3000
+    CHAT_HISTORY_TRIM_RATIO: float = 0.5
     
     # System prompts for different conversation types
     EMOTION_PROMPT: str = """You are an empathetic AI counselor helping a young person express their emotions. 
@@ -17,4 +125,10 @@ class AISettings(BaseSettings):
     Focus on constructive and honest communication. If the situation seems urgent,
     suggest immediate contact with emergency services or crisis support."""
 
+    SUMMARY_PROMPT: str = """You summarize a supportive conversation between a young person and an
+    AI counselor. Write a short summary in the conversation's language that keeps the person's
+    feelings, concerns, needs and anything important they shared, including any signs of crisis.
+    Do not add advice."""
+
+
 ai_settings = AISettings() 
\ No newline at end of file
@@ -1,23 +1,85 @@
+import os
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
+
 
 class Settings(BaseSettings):
-    # AI Service Configuration
-    OLLAMA_BASE_URL: str = "http://localhost:11434"
-    MODEL_NAME: str = "llama2"
-    MAX_TOKENS: int = 1000
-    TEMPERATURE: float = 0.7
+    # Ollama and model settings live in app.core.ai_config
+
+    # Server started by run.py: "development" (one worker, auto-reload) or
+    # "production" (WORKERS processes, uvloop/httptools when installed)
+    SERVER_MODE: str = "development"
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    # 0 means one per CPU. Each worker has its own chat sessions, caches and
+    # LLM admission limits (size LLM_MAX_CONCURRENCY per worker); run.py
+    # warns at startup about features that need WORKERS=1.
+    WORKERS: int = 0
+    # On shutdown, how long in-flight requests and LLM streams may finish
+    GRACEFUL_SHUTDOWN_TIMEOUT_SECONDS: int = 30
+    LOG_LEVEL: str = "info"
+    ACCESS_LOG: bool = True
 
     # Security
     SECRET_KEY: str = "your-secret-key-here"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # bcrypt cost; existing hashes are upgraded on the next successful login
+    BCRYPT_ROUNDS: int = 12
+    # Password hashing runs off the event loop: "thread", "process" or "inline"
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 100
+    # Verified tokens and loaded users reused by get_current_user
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    AUTH_USER_CACHE_SIZE: int = 10000
+    AUTH_USER_CACHE_TTL_SECONDS: float = 300.0
+
+    # Add a Server-Timing header with per-phase timings (db, llm, ...) to responses
+    SERVER_TIMING_ENABLED: bool = False
 
     # Database
     DATABASE_URL: str = "sqlite:///./app.db"
+    # Defaults to DATABASE_URL with its async driver (aiosqlite or asyncpg)
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Connections across all workers; each worker's pool gets an equal share
+    DB_MAX_CONNECTIONS: int = 40
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    # SQLite storage profile, set on every connection
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    # Negative values are KiB, as in PRAGMA cache_size
+    SQLITE_CACHE_SIZE: int = -65536
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    # Run analytics queries (mood trends) on a separate read-only engine, on
+    # ANALYTICS_DATABASE_URL (e.g. a replica) or else the main database
+    ANALYTICS_ENGINE_ENABLED: bool = False
+    ANALYTICS_DATABASE_URL: Optional[str] = None
+
+    # Mood entries are written behind in batches
+    MOOD_BATCH_SIZE: int = 500
+    MOOD_FLUSH_INTERVAL_SECONDS: float = 1.0
+    MOOD_MAX_BUFFERED: int = 10000
+    # Failed flushes of a batch before it is split to drop rows that cannot be written
+    MOOD_FLUSH_MAX_ATTEMPTS: int = 3
+    # Accounts allowed to query mood trends of other users and cohorts
+    ANALYTICS_STAFF_EMAILS: List[str] = []
 
     class Config:
         env_file = ".env"
         case_sensitive = True
+        # Older .env files still set OLLAMA_BASE_URL, MODEL_NAME, MAX_TOKENS
+        # and TEMPERATURE here; those are AISettings now
+        extra = "ignore"
+
+
+settings = Settings()
+
 
-settings = Settings() 
\ No newline at end of file
+def worker_count() -> int:
+    """Number of server processes run.py starts for the current settings."""
+    if settings.SERVER_MODE != "production":
+        return 1
+    return settings.WORKERS or os.cpu_count() or 1 
\ No newline at end of file
@@ -1,18 +1,81 @@
+from typing import AsyncIterator
+
 from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncAttrs, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
 
 from app.core.config import settings
+from app.db.storage import configure_engine, engine_options
+from app.services.metrics import instrument_engine
+
+# Async drivers for each supported database
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    """Return ``url`` with the async driver for its database.
 
-engine = create_engine(settings.DATABASE_URL)
+    ``sqlite:///./app.db`` becomes ``sqlite+aiosqlite:///./app.db`` and
+    ``postgresql://...`` becomes ``postgresql+asyncpg://...``. URLs that
+    already name a driver are kept as they are.
+    """
+    parsed = make_url(url)
+    if parsed.drivername in ASYNC_DRIVERS:
+        parsed = parsed.set(drivername=ASYNC_DRIVERS[parsed.drivername])
+    return parsed.render_as_string(hide_password=False)
+
+
+# Sync engine for schema creation and scripts
+engine = create_engine(
+    settings.DATABASE_URL, **engine_options(settings.DATABASE_URL, is_async=False)
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
+# Async engine used by request handlers, so queries don't block the event loop
+ASYNC_URL = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(ASYNC_URL, **engine_options(ASYNC_URL, is_async=True))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Optional read-only engine for analytics, so long reports don't hold the
+# connections (or, on SQLite, the locks) that request handlers write with
+if settings.ANALYTICS_ENGINE_ENABLED:
+    ANALYTICS_URL = (
+        async_database_url(settings.ANALYTICS_DATABASE_URL)
+        if settings.ANALYTICS_DATABASE_URL else ASYNC_URL
+    )
+    analytics_engine = create_async_engine(
+        ANALYTICS_URL, **engine_options(ANALYTICS_URL, is_async=True)
+    )
+    AnalyticsSessionLocal = async_sessionmaker(
+        analytics_engine, autoflush=False, expire_on_commit=False
+    )
+else:
+    analytics_engine = async_engine
+    AnalyticsSessionLocal = AsyncSessionLocal
+
+# Storage profile (SQLite pragmas), and statement timings for /metrics and Server-Timing
+configure_engine(engine)
+configure_engine(async_engine.sync_engine)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+if analytics_engine is not async_engine:
+    configure_engine(analytics_engine.sync_engine, read_only=True)
+    instrument_engine(analytics_engine.sync_engine)
+
+# AsyncAttrs lets relationships be loaded with ``await obj.awaitable_attrs.name``
+Base = declarative_base(cls=AsyncAttrs)
+
 
 # Dependency
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_analytics_db() -> AsyncIterator[AsyncSession]:
+    async with AnalyticsSessionLocal() as db:
         yield db
-    finally:
-        db.close() 
\ No newline at end of file
@@ -1,9 +1,15 @@
-from sqlalchemy.orm import Session
 from app.db.base import Base, engine
-from app.models.user import User
+# Register every model so create_all sees their tables
+from app.models import contact, user  # noqa: F401
+from app.models.mood import MoodEntry
+
 
 def init_db() -> None:
     Base.metadata.create_all(bind=engine)
+    # create_all skips indexes of tables that already exist
+    for index in MoodEntry.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
 
 if __name__ == "__main__":
     init_db()
@@ -0,0 +1,83 @@
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings, worker_count
+
+
+def is_sqlite_file(url: URL) -> bool:
+    return (
+        url.get_backend_name() == "sqlite"
+        and bool(url.database)
+        and url.database != ":memory:"
+        and url.query.get("mode") != "memory"
+    )
+
+
+def sqlite_pragmas(read_only: bool = False) -> Dict[str, str]:
+    """The storage profile applied to every SQLite connection.
+
+    WAL lets readers run alongside the single writer, and with
+    ``synchronous=NORMAL`` a commit no longer waits for an fsync of the
+    database file. ``busy_timeout`` makes a writer wait for the lock
+    instead of failing with "database is locked".
+    """
+    pragmas = {
+        "busy_timeout": str(settings.SQLITE_BUSY_TIMEOUT_MS),
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "cache_size": str(settings.SQLITE_CACHE_SIZE),
+        "mmap_size": str(settings.SQLITE_MMAP_SIZE),
+        "temp_store": settings.SQLITE_TEMP_STORE,
+    }
+    if read_only:
+        pragmas["query_only"] = "ON"
+    else:
+        # The journal mode is stored in the database file; only writers set it
+        pragmas = {"journal_mode": settings.SQLITE_JOURNAL_MODE, **pragmas}
+    return pragmas
+
+
+def apply_sqlite_pragmas(engine: Engine, read_only: bool = False) -> None:
+    """Run the storage profile's PRAGMAs on each new connection of ``engine``.
+
+    Pass ``sync_engine`` for async engines.
+    """
+    pragmas = sqlite_pragmas(read_only)
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def engine_options(url: str, is_async: bool) -> Dict:
+    """Pool options for an engine on ``url``, sized for the number of workers.
+
+    Every worker process has its own pools, so each gets an equal share of
+    ``DB_MAX_CONNECTIONS``. SQLite file databases get a real pool too: by
+    default aiosqlite opens a new connection, and thread, per session.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and not is_sqlite_file(parsed):
+        # In-memory databases use the dialect's single shared connection
+        return {}
+    pool_size = max(1, settings.DB_MAX_CONNECTIONS // worker_count())
+    return {
+        "poolclass": AsyncAdaptedQueuePool if is_async else QueuePool,
+        "pool_size": pool_size,
+        "max_overflow": 0,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_pre_ping": parsed.get_backend_name() != "sqlite",
+    }
+
+
+def configure_engine(engine: Engine, read_only: bool = False) -> None:
+    """Apply the storage profile to ``engine`` (the sync engine of async ones)."""
+    if engine.url.get_backend_name() == "sqlite":
+        apply_sqlite_pragmas(engine, read_only)
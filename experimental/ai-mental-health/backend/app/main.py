@@ -1,12 +1,59 @@
-from fastapi import FastAPI
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.api.ai_communication import router as ai_communication_router
 from app.api.auth import router as auth_router
+from app.api.health import router as health_router
+from app.api.metrics import MetricsMiddleware, router as metrics_router
+from app.api.users import router as users_router
+from app.db.base import analytics_engine, async_engine
+# Register every model so relationships between them resolve
+from app.models import contact, mood, user  # noqa: F401
+from app.services.chat_sessions import chat_sessions
+from app.services.generation_jobs import generation_jobs
+from app.services.llm_client import llm_client
+from app.services.llm_scheduler import LLMOverloaded
+from app.services.model_warmup import model_warmup
+from app.services.mood_buffer import mood_buffer
+from app.services.password_hasher import password_hasher
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    # One pooled LLM transport shared by every request
+    await llm_client.start()
+    # Load the models in the background; /health/ready reports when they are warm
+    model_warmup.start()
+    await mood_buffer.start()
+    await generation_jobs.start()
+    logger.info(f"Worker {os.getpid()} started in {time.perf_counter() - started:.2f} s")
+    # The server drains in-flight requests, including LLM streams, before
+    # shutdown continues here (see GRACEFUL_SHUTDOWN_TIMEOUT_SECONDS)
+    yield
+    stopping = time.perf_counter()
+    await chat_sessions.close()
+    await generation_jobs.close()
+    # Flush buffered mood entries before the database goes away
+    await mood_buffer.close()
+    await model_warmup.close()
+    await llm_client.close()
+    await password_hasher.close()
+    await async_engine.dispose()
+    await analytics_engine.dispose()
+    logger.info(f"Worker {os.getpid()} shut down in {time.perf_counter() - stopping:.2f} s")
 
 app = FastAPI(
     title="AI Mental Health Support System",
     description="Backend API for AI-powered mental health support system",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -17,10 +64,26 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so latency covers CORS handling and the whole response
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(LLMOverloaded)
+async def llm_overloaded_handler(request: Request, exc: LLMOverloaded):
+    # Fail fast with a retry hint instead of letting requests hang
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 # Include routes
 app.include_router(ai_communication_router, prefix="/api/ai", tags=["AI Communication"])
 app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
+app.include_router(users_router, prefix="/api/users", tags=["Users"])
+app.include_router(metrics_router, tags=["Metrics"])
+app.include_router(health_router, prefix="/health", tags=["Health"])
+
 
 @app.get("/")
 async def root():
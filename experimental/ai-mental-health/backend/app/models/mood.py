@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.base import Base
 
+
 class MoodEntry(Base):
     __tablename__ = "mood_entries"
+    __table_args__ = (
+        # Per-user history is always read by time range
+        Index("ix_mood_entries_user_id_timestamp", "user_id", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -12,4 +17,25 @@ class MoodEntry(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
     notes = Column(String, nullable=True)
 
-    user = relationship("User", back_populates="mood_entries") 
\ No newline at end of file
+    user = relationship("User", back_populates="mood_entries")
+
+
+class MoodRollup(Base):
+    """Count of one mood for one user over one day or week.
+
+    Maintained incrementally as entries are written, so trends read a few
+    rows per period instead of scanning the entries.
+    """
+    __tablename__ = "mood_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "period", "period_start", "mood", name="uq_mood_rollups_bucket"
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    period = Column(String, nullable=False)  # day, week
+    period_start = Column(Date, nullable=False)
+    mood = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
\ No newline at end of file
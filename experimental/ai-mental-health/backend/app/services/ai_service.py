@@ -1,35 +1,164 @@
 import httpx
-import json
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from app.core.ai_config import ai_settings
+from app.services.completion_cache import completion_cache
+from app.services.emotion_classifier import emotion_classifier
+from app.services.llm_client import llm_client, payload_key
+from app.services.llm_scheduler import LLMOverloaded
+from app.services.metrics import observe_ollama_timings
+from app.services.semantic_cache import semantic_cache
+from app.services.single_flight import llm_single_flight
+
+DRAFT_SUGGESTIONS = [
+    "Be specific about what kind of support you need",
+    "Express your feelings using 'I' statements",
+    "Thank them for their time and support"
+]
+
 
 class AIService:
     def __init__(self):
-        self.base_url = ai_settings.OLLAMA_BASE_URL
         self.model = ai_settings.MODEL_NAME
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.client = llm_client
 
-    async def _generate_completion(self, prompt: str, system_prompt: str) -> str:
-        try:
-            response = await self.client.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "system": system_prompt,
-                    "stream": False,
-                    "temperature": ai_settings.TEMPERATURE,
-                }
+    def _payload(self, prompt: str, system_prompt: str, stream: bool) -> Dict:
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "system": system_prompt,
+            "stream": stream,
+            "temperature": ai_settings.TEMPERATURE,
+            "keep_alive": ai_settings.OLLAMA_KEEP_ALIVE,
+            "options": {"num_predict": ai_settings.MAX_TOKENS},
+        }
+
+    async def _generate_completion(
+        self,
+        prompt: str,
+        system_prompt: str,
+        cache_endpoint: Optional[str] = None,
+        bypass_cache: bool = False,
+        semantic_text: Optional[str] = None,
+        semantic_scope: str = ""
+    ) -> str:
+        """Generate a completion, going through the completion cache when
+        ``cache_endpoint`` has caching enabled.
+
+        With ``semantic_text``, the semantic cache may answer with the
+        completion for a similar text if it is enabled for the endpoint;
+        ``semantic_scope`` holds the parts of the prompt that must match exactly.
+        """
+        payload = self._payload(prompt, system_prompt, stream=False)
+        use_cache = completion_cache.enabled_for(cache_endpoint)
+        if use_cache:
+            cached = await completion_cache.get(cache_endpoint, payload, bypass_cache)
+            if cached is not None:
+                return cached
+        use_semantic = semantic_text is not None and semantic_cache.enabled_for(cache_endpoint)
+        embedding = None
+        if use_semantic:
+            cached, embedding = await semantic_cache.get(
+                cache_endpoint, payload, semantic_text, semantic_scope, bypass_cache
+            )
+            if cached is not None:
+                return cached
+
+        async def generate() -> str:
+            try:
+                response = await self.client.post("/api/generate", json=payload)
+                response.raise_for_status()
+                body = response.json()
+                observe_ollama_timings(body)
+                completion = body["response"]
+            except LLMOverloaded:
+                raise
+            except Exception as e:
+                raise Exception(f"Error generating AI response: {str(e)}")
+
+            if use_cache:
+                await completion_cache.set(cache_endpoint, payload, completion)
+            if use_semantic:
+                await semantic_cache.set(
+                    cache_endpoint, payload, embedding, completion, semantic_scope
+                )
+            return completion
+
+        if not ai_settings.SINGLE_FLIGHT_ENABLED:
+            return await generate()
+        # Identical prompts already being generated share that generation
+        return await llm_single_flight.do(f"generate:{payload_key(payload)}", generate)
+
+    async def _stream_completion(
+        self,
+        prompt: str,
+        system_prompt: str,
+        cache_endpoint: Optional[str] = None,
+        bypass_cache: bool = False,
+        semantic_text: Optional[str] = None,
+        semantic_scope: str = ""
+    ) -> AsyncIterator[str]:
+        """Yield response tokens from Ollama as they are generated.
+
+        Closing the generator (e.g. when the client disconnects) closes the
+        upstream connection, which makes Ollama abort the generation. A cached
+        completion is yielded as a single token; a fully streamed one is
+        added to the cache. ``semantic_text`` and ``semantic_scope`` are as
+        for ``_generate_completion``.
+        """
+        payload = self._payload(prompt, system_prompt, stream=True)
+        use_cache = completion_cache.enabled_for(cache_endpoint)
+        if use_cache:
+            cached = await completion_cache.get(cache_endpoint, payload, bypass_cache)
+            if cached is not None:
+                yield cached
+                return
+        use_semantic = semantic_text is not None and semantic_cache.enabled_for(cache_endpoint)
+        embedding = None
+        if use_semantic:
+            cached, embedding = await semantic_cache.get(
+                cache_endpoint, payload, semantic_text, semantic_scope, bypass_cache
             )
-            response.raise_for_status()
-            return response.json()["response"]
-        except Exception as e:
+            if cached is not None:
+                yield cached
+                return
+
+        tokens = []
+        try:
+            async for chunk in self.client.stream_chunks("/api/generate", payload):
+                if chunk.get("response"):
+                    tokens.append(chunk["response"])
+                    yield chunk["response"]
+        except httpx.HTTPError as e:
             raise Exception(f"Error generating AI response: {str(e)}")
 
-    async def analyze_emotion(self, text: str) -> Dict:
-        """Analyze the emotional content of user's message and provide supportive feedback."""
+        if use_cache:
+            await completion_cache.set(cache_endpoint, payload, "".join(tokens))
+        if use_semantic:
+            await semantic_cache.set(
+                cache_endpoint, payload, embedding, "".join(tokens), semantic_scope
+            )
+
+    async def _llm_emotion_analysis(
+        self,
+        text: str,
+        reuse_similar: bool = True,
+        owner: Optional[str] = None
+    ) -> Dict:
+        """Ask the LLM for supportive feedback on the user's feelings.
+
+        With ``reuse_similar`` and an ``owner``, the feedback written for a
+        similar text by the same owner may be reused (see the semantic cache).
+        Feedback is never shared between owners, since it repeats what one
+        person disclosed.
+        """
         prompt = f"Please help me understand and express these feelings: {text}"
-        response = await self._generate_completion(prompt, ai_settings.EMOTION_PROMPT)
+        response = await self._generate_completion(
+            prompt,
+            ai_settings.EMOTION_PROMPT,
+            cache_endpoint="analyze-emotion",
+            semantic_text=text if reuse_similar and owner is not None else None,
+            semantic_scope=f"owner:{owner}"
+        )
         
         # Parse the response to extract key emotional insights
         return {
@@ -37,33 +166,124 @@ class AIService:
             "crisis_detected": "crisis" in response.lower() or "emergency" in response.lower()
         }
 
-    async def draft_message(self, context: Dict) -> Dict:
-        """Help user draft a message to their support network."""
-        prompt = (
+    async def analyze_emotion(
+        self,
+        text: str,
+        language: str = "en",
+        second_opinion: Optional[bool] = None,
+        owner: Optional[str] = None
+    ) -> Dict:
+        """Analyze the emotional content of user's message.
+
+        Emotions and crisis risk are scored locally by the lexicon classifier.
+        With ``second_opinion`` (default ``EMOTION_LLM_SECOND_OPINION``) the LLM
+        also writes supportive feedback, and either side can flag a crisis.
+        ``owner`` identifies the user, whose earlier feedback may be reused.
+        """
+        result = emotion_classifier.classify(text, language)
+        result["analysis"] = None
+        if second_opinion is None:
+            second_opinion = ai_settings.EMOTION_LLM_SECOND_OPINION
+        if second_opinion:
+            # Crisis messages always get feedback written for them; a similar
+            # text may differ in exactly what matters ("I don't want to die")
+            llm_result = await self._llm_emotion_analysis(
+                text, reuse_similar=not result["crisis_detected"], owner=owner
+            )
+            result["analysis"] = llm_result["analysis"]
+            result["llm_crisis_detected"] = llm_result["crisis_detected"]
+            result["crisis_detected"] = result["crisis_detected"] or llm_result["crisis_detected"]
+        return result
+
+    def _draft_prompt(self, context: Dict) -> str:
+        return (
             f"Please help me write a message to my {context['recipient_type']}. "
             f"I'm feeling {context['emotion']} and want to express that "
             f"I {context['need']}. Situation context: {context.get('situation', '')}"
         )
+
+    def _draft_semantic_key(self, context: Dict) -> Tuple[str, str]:
+        # Who the message is for and the emotion must match exactly; what
+        # the user needs and their situation may be paraphrased
+        text = f"{context['need']}. {context.get('situation') or ''}"
+        return text, f"{context['recipient_type']}|{context['emotion']}"
+
+    def _refine_prompt(self, original_draft: str, feedback: str) -> str:
+        return f"Please help me improve this message: {original_draft}\nFeedback: {feedback}"
+
+    async def draft_message(self, context: Dict, bypass_cache: bool = False) -> Dict:
+        """Help user draft a message to their support network."""
+        prompt = self._draft_prompt(context)
+        semantic_text, semantic_scope = self._draft_semantic_key(context)
         
-        response = await self._generate_completion(prompt, ai_settings.MESSAGE_PROMPT)
+        response = await self._generate_completion(
+            prompt,
+            ai_settings.MESSAGE_PROMPT,
+            cache_endpoint="draft-message",
+            bypass_cache=bypass_cache,
+            semantic_text=semantic_text,
+            semantic_scope=semantic_scope
+        )
         
         return {
             "draft": response,
-            "suggestions": [
-                "Be specific about what kind of support you need",
-                "Express your feelings using 'I' statements",
-                "Thank them for their time and support"
-            ]
+            "suggestions": DRAFT_SUGGESTIONS
         }
 
-    async def refine_message(self, original_draft: str, feedback: str) -> str:
+    def stream_draft_message(self, context: Dict, bypass_cache: bool = False) -> AsyncIterator[str]:
+        """Stream a draft message token by token."""
+        semantic_text, semantic_scope = self._draft_semantic_key(context)
+        return self._stream_completion(
+            self._draft_prompt(context),
+            ai_settings.MESSAGE_PROMPT,
+            cache_endpoint="draft-message",
+            bypass_cache=bypass_cache,
+            semantic_text=semantic_text,
+            semantic_scope=semantic_scope
+        )
+
+    async def refine_message(
+        self,
+        original_draft: str,
+        feedback: str,
+        bypass_cache: bool = False
+    ) -> str:
         """Refine the message based on user feedback."""
-        prompt = f"Please help me improve this message: {original_draft}\nFeedback: {feedback}"
-        return await self._generate_completion(prompt, ai_settings.MESSAGE_PROMPT)
+        prompt = self._refine_prompt(original_draft, feedback)
+        return await self._generate_completion(
+            prompt,
+            ai_settings.MESSAGE_PROMPT,
+            cache_endpoint="refine-message",
+            bypass_cache=bypass_cache
+        )
+
+    def stream_refine_message(
+        self,
+        original_draft: str,
+        feedback: str,
+        bypass_cache: bool = False
+    ) -> AsyncIterator[str]:
+        """Stream a refined message token by token."""
+        prompt = self._refine_prompt(original_draft, feedback)
+        return self._stream_completion(
+            prompt,
+            ai_settings.MESSAGE_PROMPT,
+            cache_endpoint="refine-message",
+            bypass_cache=bypass_cache
+        )
+
+    async def summarize_conversation(self, summary: Optional[str], messages: List[Dict]) -> str:
+        """Fold older chat turns into a running summary."""
+        transcript = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+        prompt = f"Conversation:\n{transcript}"
+        if summary:
+            prompt = f"Summary so far: {summary}\n\n{prompt}"
+        return await self._generate_completion(prompt, ai_settings.SUMMARY_PROMPT)
 
     async def close(self):
-        """Close the HTTP client session."""
-        await self.client.aclose()
+        """Close the shared LLM connection pool."""
+        await self.client.close()
+
 
 # Create a singleton instance
 ai_service = AIService() 
\ No newline at end of file
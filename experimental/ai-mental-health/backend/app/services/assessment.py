@@ -0,0 +1,188 @@
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Keyword lists per category. Keywords match as substrings of an answer
+# ("stress" matches "stressed") and each counts at most once per answer.
+ASSESSMENT_LEXICONS: Dict[str, List[str]] = {
+    "stress": ['stress', 'overwhelm', 'pressure', 'tense', 'strain'],
+    "anxiety": ['anxious', 'worry', 'nervous', 'fear', 'panic'],
+    "depression": ['sad', 'depressed', 'hopeless', 'tired', 'exhausted'],
+    "positive": ['good', 'happy', 'calm', 'relax', 'peace', 'joy', 'content'],
+}
+
+LEVELS = np.array(["low", "moderate", "high"])
+# Counts at or above each bound move up one level
+LEVEL_BOUNDS = [2, 4]
+WELLBEING = np.array(["poor", "fair", "good", "excellent"])
+WELLBEING_BOUNDS = [-2, 0, 2]
+ASSESSMENT_KEYS = ("stress_level", "anxiety_level", "depression_risk", "overall_wellbeing")
+
+GENERAL_RECOMMENDATIONS = [
+    "Engage in regular physical activity",
+    "Connect with friends and family regularly",
+    "Maintain a balanced diet and stay hydrated"
+]
+MAX_RECOMMENDATIONS = 5
+
+
+class AssessmentEngine:
+    """Keyword-based mental health assessment scoring.
+
+    Every category keyword is compiled into one lookup table keyed by its
+    first two bytes. Scoring joins all answers of a batch into one byte array,
+    finds every keyword start in a single vectorized table lookup, and
+    verifies the remaining bytes only at those candidate positions. Levels
+    for the whole batch are then computed together with NumPy.
+    """
+
+    def __init__(self, lexicons: Dict[str, List[str]] = ASSESSMENT_LEXICONS):
+        self.categories = list(lexicons)
+        self._keywords: List[Tuple[bytes, int, int]] = []
+        bigram_ids: Dict[int, int] = {}
+        for category, keywords in enumerate(lexicons.values()):
+            for keyword in keywords:
+                encoded = keyword.lower().encode("utf-8")
+                if len(encoded) < 2:
+                    raise ValueError(f"Assessment keywords need at least two bytes: {keyword!r}")
+                bigram = encoded[0] << 8 | encoded[1]
+                bigram_id = bigram_ids.setdefault(bigram, len(bigram_ids) + 1)
+                self._keywords.append((encoded, category, bigram_id))
+
+        # 0 means "no keyword starts with these two bytes"
+        self._bigram_table = np.zeros(1 << 16, dtype=np.int32)
+        for bigram, bigram_id in bigram_ids.items():
+            self._bigram_table[bigram] = bigram_id
+        self._bigram_count = len(bigram_ids)
+
+    def _answer_counts(self, answers: List[str]) -> np.ndarray:
+        """Count keyword hits per category for each answer.
+
+        Each keyword counts at most once per answer, like a substring check.
+        """
+        counts = np.zeros((len(answers), len(self.categories)), dtype=np.int64)
+        # Answers are NUL-separated so a match position maps back to its answer
+        text = "\x00".join(answers)
+        if text.count("\x00") != max(len(answers) - 1, 0):
+            text = "\x00".join(answer.replace("\x00", " ") for answer in answers)
+        data = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+        if data.size < 2:
+            return counts
+        starts = np.concatenate(([0], np.flatnonzero(data == 0) + 1))
+
+        # One pass over the text finds every position where some keyword may
+        # start; candidates are then grouped by their two-byte prefix
+        bigrams = (data[:-1].astype(np.int32) << 8) | data[1:]
+        bigram_ids = self._bigram_table[bigrams]
+        positions = np.flatnonzero(bigram_ids)
+        position_ids = bigram_ids[positions]
+        order = np.argsort(position_ids, kind="stable")
+        group_bounds = np.searchsorted(position_ids[order], np.arange(self._bigram_count + 2))
+
+        for keyword, category, bigram_id in self._keywords:
+            candidates = positions[order[group_bounds[bigram_id]:group_bounds[bigram_id + 1]]]
+            candidates = candidates[candidates <= data.size - len(keyword)]
+            for offset in range(2, len(keyword)):
+                if not candidates.size:
+                    break
+                candidates = candidates[data[candidates + offset] == keyword[offset]]
+            if candidates.size:
+                hit = np.zeros(len(answers), dtype=bool)
+                hit[np.searchsorted(starts, candidates, side="right") - 1] = True
+                counts[:, category] += hit
+        return counts
+
+    def count_batch(self, response_sets: List[List[dict]]) -> np.ndarray:
+        """Count keyword hits per category for each response set.
+
+        Returns an array of shape ``(len(response_sets), len(categories))``.
+        """
+        answers = [
+            response.get('answer', '').lower()
+            for user_responses in response_sets
+            for response in user_responses
+        ]
+        per_answer = self._answer_counts(answers)
+
+        # Sum each set's rows via prefix sums, which also handles empty sets
+        sizes = np.fromiter(map(len, response_sets), dtype=np.int64, count=len(response_sets))
+        bounds = np.concatenate(([0], np.cumsum(sizes)))
+        totals = np.vstack([
+            np.zeros((1, len(self.categories)), dtype=np.int64),
+            np.cumsum(per_answer, axis=0)
+        ])
+        return totals[bounds[1:]] - totals[bounds[:-1]]
+
+    def count(self, user_responses: List[dict]) -> np.ndarray:
+        """Count keyword hits per category over all answers of one response set."""
+        return self.count_batch([user_responses])[0]
+
+    def score_batch(self, response_sets: List[List[dict]]) -> List[Dict]:
+        """Score many response sets at once.
+
+        Returns one ``{"assessment": ..., "recommendations": ...}`` dict per set.
+        """
+        if not response_sets:
+            return []
+        counts = self.count_batch(response_sets)
+        stress, anxiety, depression, positive = (
+            counts[:, self.categories.index(category)]
+            for category in ("stress", "anxiety", "depression", "positive")
+        )
+
+        stress_levels = LEVELS[np.digitize(stress, LEVEL_BOUNDS)]
+        anxiety_levels = LEVELS[np.digitize(anxiety, LEVEL_BOUNDS)]
+        depression_risks = LEVELS[np.digitize(depression, LEVEL_BOUNDS)]
+        overall_scores = positive - (stress + anxiety + depression) / 3
+        wellbeing = WELLBEING[np.digitize(overall_scores, WELLBEING_BOUNDS)]
+
+        results = []
+        for levels in zip(
+            stress_levels.tolist(),
+            anxiety_levels.tolist(),
+            depression_risks.tolist(),
+            wellbeing.tolist()
+        ):
+            assessment = dict(zip(ASSESSMENT_KEYS, levels))
+            results.append({
+                "assessment": assessment,
+                "recommendations": list(self._recommendations_for(levels))
+            })
+        return results
+
+    def score(self, user_responses: List[dict]) -> Dict:
+        """Score a single response set."""
+        return self.score_batch([user_responses])[0]
+
+    @lru_cache(maxsize=None)
+    def _recommendations_for(self, levels: Tuple[str, ...]) -> Tuple[str, ...]:
+        # Only a few dozen level combinations exist, so each is built once
+        return tuple(self.recommendations(dict(zip(ASSESSMENT_KEYS, levels))))
+
+    def recommendations(self, assessment: Dict) -> List[str]:
+        """Generate recommendations based on assessment."""
+        recommendations = []
+
+        if assessment["stress_level"] in ["moderate", "high"]:
+            recommendations.append(
+                "Practice deep breathing exercises or meditation to reduce stress"
+            )
+
+        if assessment["anxiety_level"] in ["moderate", "high"]:
+            recommendations.append("Consider mindfulness techniques to manage anxiety")
+
+        if assessment["depression_risk"] in ["moderate", "high"]:
+            recommendations.append("Reach out to a mental health professional for support")
+
+        if assessment["overall_wellbeing"] in ["poor", "fair"]:
+            recommendations.append("Establish a regular sleep schedule and prioritize self-care")
+
+        # Add general recommendations
+        recommendations.extend(GENERAL_RECOMMENDATIONS)
+
+        return recommendations[:MAX_RECOMMENDATIONS]
+
+
+# Create a singleton instance
+assessment_engine = AssessmentEngine()
@@ -0,0 +1,108 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from jose import jwt
+from sqlalchemy import event, inspect
+
+from app.core.config import settings
+from app.models.user import User
+
+
+class AuthCache:
+    """Caches for the per-request authentication work.
+
+    ``verify_token`` remembers tokens whose signature has already been
+    checked, until the token's ``exp``. ``get_user``/``set_user`` keep the
+    loaded ``User`` per subject for at most ``user_ttl`` seconds and never
+    past the expiry of the token that loaded it. Both caches are bounded
+    LRUs. Any ORM update or delete of a user evicts that user and the tokens
+    issued to them, so deactivation takes effect on the next request.
+
+    Cached users are detached from their session; handlers that modify the
+    current user must ``merge`` it into their own session first.
+    """
+
+    def __init__(self, token_entries: int, user_entries: int, user_ttl: float):
+        self.token_entries = token_entries
+        self.user_entries = user_entries
+        self.user_ttl = user_ttl
+        self._tokens: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._users: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+        self._stats = {
+            "token_hits": 0,
+            "token_misses": 0,
+            "user_hits": 0,
+            "user_misses": 0,
+            "invalidations": 0,
+        }
+
+    def verify_token(self, token: str) -> Tuple[Optional[str], float]:
+        """Return the token's subject and expiry, checking the signature once.
+
+        Raises ``JWTError`` for invalid or expired tokens.
+        """
+        entry = self._tokens.get(token)
+        if entry is not None and entry[0] > time.time():
+            self._tokens.move_to_end(token)
+            self._stats["token_hits"] += 1
+            return entry[1], entry[0]
+
+        self._stats["token_misses"] += 1
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        subject = payload.get("sub")
+        expires_at = float(payload.get("exp", time.time() + self.user_ttl))
+        if subject is not None:
+            self._tokens[token] = (expires_at, subject)
+            self._tokens.move_to_end(token)
+            while len(self._tokens) > self.token_entries:
+                self._tokens.popitem(last=False)
+        return subject, expires_at
+
+    def get_user(self, subject: str) -> Optional[User]:
+        entry = self._users.get(subject)
+        if entry is None or entry[0] <= time.time():
+            self._stats["user_misses"] += 1
+            return None
+        self._users.move_to_end(subject)
+        self._stats["user_hits"] += 1
+        return entry[1]
+
+    def set_user(self, subject: str, user: User, token_expires_at: float) -> None:
+        self._users[subject] = (min(token_expires_at, time.time() + self.user_ttl), user)
+        self._users.move_to_end(subject)
+        while len(self._users) > self.user_entries:
+            self._users.popitem(last=False)
+
+    def invalidate_user(self, subject: str) -> None:
+        """Forget a user and every cached token issued to them."""
+        self._stats["invalidations"] += 1
+        self._users.pop(subject, None)
+        for token in [token for token, (_, sub) in self._tokens.items() if sub == subject]:
+            del self._tokens[token]
+
+    def clear(self) -> None:
+        self._tokens.clear()
+        self._users.clear()
+
+    def stats(self) -> Dict:
+        """Return cache sizes and hit/miss counters."""
+        return dict(self._stats, tokens=len(self._tokens), users=len(self._users))
+
+
+# Create a singleton instance
+auth_cache = AuthCache(
+    settings.AUTH_TOKEN_CACHE_SIZE,
+    settings.AUTH_USER_CACHE_SIZE,
+    settings.AUTH_USER_CACHE_TTL_SECONDS
+)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target: User) -> None:
+    # Evict under the old email too, in case it was changed
+    history = inspect(target).attrs.email.history
+    for email in {target.email, *history.deleted}:
+        if email is not None:
+            auth_cache.invalidate_user(email)
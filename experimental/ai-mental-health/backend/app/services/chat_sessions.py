@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import math
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+
+from app.core.ai_config import ai_settings
+from app.services.ai_service import ai_service
+from app.services.llm_scheduler import PRIORITY_BACKGROUND, llm_priority
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English and French)."""
+    return math.ceil(len(text) / 4) + 1
+
+
+class ChatSession:
+    """Conversation history kept on the server between chat turns.
+
+    The prompt sent to Ollama is the system prompt, then the summary of
+    older turns (if any), then the recent messages. Turns are only ever
+    appended, so between compactions each prompt extends the previous one
+    and Ollama can reuse its cached evaluation of that prefix.
+    """
+
+    def __init__(self, session_id: str, user_id: str):
+        self.id = session_id
+        self.user_id = user_id
+        self.summary: Optional[str] = None
+        self.messages: List[Dict[str, str]] = []
+        self.turns = 0
+        self.last_used = time.time()
+        # Serializes turns, and compaction's reads and writes of the history
+        self.lock = asyncio.Lock()
+        self.compacting = False
+
+    def history_tokens(self) -> int:
+        tokens = sum(estimate_tokens(message["content"]) for message in self.messages)
+        if self.summary:
+            tokens += estimate_tokens(self.summary)
+        return tokens
+
+    def prompt_messages(
+        self,
+        system_prompt: str,
+        new_messages: List[Dict[str, str]]
+    ) -> List[Dict[str, str]]:
+        messages = [{"role": "system", "content": system_prompt}]
+        if self.summary:
+            messages.append({
+                "role": "system",
+                "content": f"Summary of the earlier conversation: {self.summary}"
+            })
+        return messages + self.messages + new_messages
+
+    def record(self, new_messages: List[Dict[str, str]], reply: str) -> None:
+        self.messages.extend(new_messages)
+        self.messages.append({"role": "assistant", "content": reply})
+        self.turns += 1
+        self.last_used = time.time()
+
+    def info(self) -> Dict:
+        return {
+            "session_id": self.id,
+            "turns": self.turns,
+            "messages": len(self.messages),
+            "summary": self.summary,
+            "history_tokens": self.history_tokens(),
+        }
+
+
+class ChatSessionStore:
+    """In-memory chat sessions with a per-session token budget.
+
+    Sessions expire after ``ttl`` seconds without a turn; at most
+    ``max_sessions`` are kept, least recently used first out. When a
+    session's history exceeds ``token_budget``, older turns are summarized
+    by the LLM in the background until the history fits in ``trim_ratio``
+    of the budget. Compacting well below the budget means the prompt prefix
+    then stays stable for several turns. If summarizing fails, the older
+    turns are dropped so the budget still holds.
+    """
+
+    def __init__(self, ttl: float, max_sessions: int, token_budget: int, trim_ratio: float):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.token_budget = token_budget
+        self.trim_ratio = trim_ratio
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._compactions: Set[asyncio.Task] = set()
+        self.summaries = 0
+        self.dropped_messages = 0
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_used >= cutoff and len(self._sessions) <= self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+
+    def create(self, user_id: str) -> ChatSession:
+        session = ChatSession(uuid.uuid4().hex, user_id)
+        self._sessions[session.id] = session
+        self._expire()
+        return session
+
+    def get(self, session_id: str, user_id: str) -> Optional[ChatSession]:
+        """Return the user's session, or ``None`` if unknown, expired or not theirs."""
+        self._expire()
+        session = self._sessions.get(session_id)
+        if session is None or session.user_id != user_id:
+            return None
+        session.last_used = time.time()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def delete(self, session_id: str, user_id: str) -> bool:
+        session = self.get(session_id, user_id)
+        if session is None:
+            return False
+        del self._sessions[session_id]
+        return True
+
+    def schedule_compaction(self, session: ChatSession) -> None:
+        """Compact the session in the background if it is over budget."""
+        if session.compacting or session.history_tokens() <= self.token_budget:
+            return
+        task = asyncio.create_task(self.compact(session))
+        self._compactions.add(task)
+        task.add_done_callback(self._compactions.discard)
+
+    async def compact(self, session: ChatSession) -> None:
+        # One compaction per session at a time
+        if session.compacting:
+            return
+        session.compacting = True
+        try:
+            async with session.lock:
+                if session.history_tokens() <= self.token_budget:
+                    return
+                keep_budget = int(self.token_budget * self.trim_ratio)
+                kept_count, tokens = 0, 0
+                for message in reversed(session.messages):
+                    tokens += estimate_tokens(message["content"])
+                    if kept_count and tokens > keep_budget:
+                        break
+                    kept_count += 1
+                older = session.messages[:len(session.messages) - kept_count]
+                summary = session.summary
+            if not older:
+                return
+
+            # The lock is not held while the LLM summarizes, so turns of this
+            # session carry on with the full history meanwhile
+            llm_priority.set(PRIORITY_BACKGROUND)
+            try:
+                summary = await ai_service.summarize_conversation(summary, older)
+            except Exception:
+                logger.exception(
+                    "Summarizing chat session %s failed; dropping older turns", session.id
+                )
+                summary = None
+            async with session.lock:
+                # Turns only append, so the summarized messages are still the oldest
+                if summary is None:
+                    self.dropped_messages += len(older)
+                else:
+                    session.summary = summary
+                    self.summaries += 1
+                session.messages = session.messages[len(older):]
+        finally:
+            session.compacting = False
+
+    async def close(self) -> None:
+        """Cancel running compactions; sessions live in memory and end with the process."""
+        for task in list(self._compactions):
+            task.cancel()
+        await asyncio.gather(*self._compactions, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        """Return session counts and compaction counters."""
+        return {
+            "sessions": len(self._sessions),
+            "compactions_running": len(self._compactions),
+            "summaries": self.summaries,
+            "dropped_messages": self.dropped_messages,
+            "token_budget": self.token_budget,
+        }
+
+
+# Create a singleton instance
+chat_sessions = ChatSessionStore(
+    ai_settings.CHAT_SESSION_TTL_SECONDS,
+    ai_settings.CHAT_MAX_SESSIONS,
+    ai_settings.CHAT_HISTORY_TOKEN_BUDGET,
+    ai_settings.CHAT_HISTORY_TRIM_RATIO
+)
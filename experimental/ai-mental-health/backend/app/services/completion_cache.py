@@ -0,0 +1,203 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.core.ai_config import ai_settings
+from app.services.llm_client import payload_key
+
+
+class MemoryCacheBackend:
+    """In-process LRU cache with per-entry expiry."""
+
+    blocking = False
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        self._entries[key] = (time.time() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """On-disk cache that survives restarts, evicting least recently used entries.
+
+    Hits refresh ``last_used`` at most once per ``touch_interval`` seconds,
+    so repeated hits on a hot entry do not each write to disk; eviction
+    order is only as precise as that interval.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int, touch_interval: float = 60.0):
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS completion_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS ix_completion_cache_last_used "
+            "ON completion_cache (last_used)"
+        )
+        self._connection.commit()
+        # Kept up to date under the lock so len() never touches the database
+        self._entries = self._count()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires_at, last_used FROM completion_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._connection.execute("DELETE FROM completion_cache WHERE key = ?", (key,))
+                self._connection.commit()
+                self._entries -= 1
+                return None
+            if now - row[2] >= self.touch_interval:
+                self._connection.execute(
+                    "UPDATE completion_cache SET last_used = ? WHERE key = ?", (now, key)
+                )
+                self._connection.commit()
+            return row[0]
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO completion_cache VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now)
+            )
+            self._entries = self._count()
+            overflow = self._entries - self.max_entries
+            if overflow > 0:
+                self._connection.execute(
+                    "DELETE FROM completion_cache WHERE key IN ("
+                    "SELECT key FROM completion_cache ORDER BY last_used LIMIT ?)",
+                    (overflow,)
+                )
+                self._entries -= overflow
+            self._connection.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM completion_cache")
+            self._connection.commit()
+            self._entries = 0
+
+    def _count(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM completion_cache").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._entries
+
+
+class CompletionCache:
+    """Cache of LLM completions keyed on everything that shapes the output.
+
+    Callers pass the Ollama request payload; the model, system prompt,
+    prompt, temperature and options all feed the key. Caching is opt-in per
+    endpoint through ``COMPLETION_CACHE_ENDPOINTS``.
+    """
+
+    def __init__(self, backend, ttl: float, endpoints):
+        self.backend = backend
+        self.ttl = ttl
+        self.endpoints = set(endpoints)
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def enabled_for(self, endpoint: Optional[str]) -> bool:
+        return self.backend is not None and endpoint in self.endpoints
+
+    @staticmethod
+    def key(payload: Dict) -> str:
+        return payload_key(payload)
+
+    def _count(self, endpoint: str, outcome: str) -> None:
+        stats = self._stats.setdefault(endpoint, {"hits": 0, "misses": 0, "bypasses": 0})
+        stats[outcome] += 1
+
+    async def _call(self, method, *args):
+        if self.backend.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def get(self, endpoint: str, payload: Dict, bypass: bool = False) -> Optional[str]:
+        """Return the cached completion, or ``None`` on a miss or bypass."""
+        if bypass:
+            self._count(endpoint, "bypasses")
+            return None
+        value = await self._call(self.backend.get, self.key(payload))
+        self._count(endpoint, "misses" if value is None else "hits")
+        return value
+
+    async def set(self, endpoint: str, payload: Dict, value: str) -> None:
+        await self._call(self.backend.set, self.key(payload), value, self.ttl)
+
+    async def clear(self) -> None:
+        if self.backend is not None:
+            await self._call(self.backend.clear)
+
+    def stats(self) -> Dict:
+        """Return hit/miss counts per endpoint."""
+        endpoints = {}
+        for endpoint, stats in self._stats.items():
+            lookups = stats["hits"] + stats["misses"]
+            endpoints[endpoint] = dict(
+                stats, hit_rate=round(stats["hits"] / lookups, 4) if lookups else 0.0
+            )
+        return {
+            "backend": ai_settings.COMPLETION_CACHE_BACKEND,
+            "entries": len(self.backend) if self.backend is not None else 0,
+            "endpoints": endpoints,
+        }
+
+
+def build_backend():
+    if ai_settings.COMPLETION_CACHE_BACKEND == "memory":
+        return MemoryCacheBackend(ai_settings.COMPLETION_CACHE_MAX_ENTRIES)
+    if ai_settings.COMPLETION_CACHE_BACKEND == "sqlite":
+        return SQLiteCacheBackend(
+            ai_settings.COMPLETION_CACHE_PATH,
+            ai_settings.COMPLETION_CACHE_MAX_ENTRIES,
+            ai_settings.COMPLETION_CACHE_TOUCH_INTERVAL_SECONDS
+        )
+    return None
+
+
+# Create a singleton instance
+completion_cache = CompletionCache(
+    build_backend(),
+    ai_settings.COMPLETION_CACHE_TTL_SECONDS,
+    ai_settings.COMPLETION_CACHE_ENDPOINTS
+)
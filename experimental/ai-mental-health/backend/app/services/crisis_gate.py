@@ -0,0 +1,222 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+from app.core.ai_config import ai_settings
+from app.services.emotion_classifier import (
+    NEGATORS, CompiledLexicon, emotion_classifier, normalize_text
+)
+
+# Response header set whenever the gate fires, so clients can show help
+# before reading the body
+CRISIS_HEADER = "X-Crisis-Detected"
+
+CRISIS_RESOURCES: Dict[str, List[Dict[str, str]]] = {
+    "en": [
+        {
+            "name": "9-8-8 Suicide Crisis Helpline",
+            "contact": "Call or text 988",
+            "availability": "24/7",
+        },
+        {
+            "name": "Kids Help Phone",
+            "contact": "Call 1-800-668-6868 or text CONNECT to 686868",
+            "availability": "24/7",
+        },
+        {
+            "name": "Emergency services",
+            "contact": "Call 911 if you are in immediate danger",
+            "availability": "24/7",
+        },
+    ],
+    "fr": [
+        {
+            "name": "Ligne d'aide en cas de crise de suicide 9-8-8",
+            "contact": "Appelez ou textez le 988",
+            "availability": "24/7",
+        },
+        {
+            "name": "Jeunesse, J'écoute",
+            "contact": "Appelez le 1-800-668-6868 ou textez PARLER au 686868",
+            "availability": "24/7",
+        },
+        {
+            "name": "Services d'urgence",
+            "contact": "Composez le 911 si vous êtes en danger immédiat",
+            "availability": "24/7",
+        },
+    ],
+}
+
+CRISIS_MESSAGES: Dict[str, str] = {
+    "en": (
+        "It sounds like you're going through something really painful, and you don't "
+        "have to face it alone. Please reach out right now: call or text 988, or call "
+        "Kids Help Phone at 1-800-668-6868. If you are in immediate danger, call 911."
+    ),
+    "fr": (
+        "On dirait que tu traverses quelque chose de très difficile, et tu n'as pas à "
+        "le vivre seul. Contacte quelqu'un maintenant : appelle ou texte le 988, ou "
+        "appelle Jeunesse, J'écoute au 1-800-668-6868. En cas de danger immédiat, "
+        "compose le 911."
+    ),
+}
+
+
+_YOU_ARE = ("you're", "you are")
+_YOU_HAVE = ("you've", "you have")
+
+# What a reply says when the model recognizes that the person it is talking
+# to is at risk. The input lexicon can't be used on replies: it fires on any
+# mention of suicide, including a counselor's referral ("if you ever have
+# thoughts of suicide, please call 988"). Terms use the emotion classifier's
+# syntax and are matched on accent-folded text.
+REPLY_CRISIS_LEXICONS: Dict[str, Tuple[str, ...]] = {
+    "en": (
+        *(
+            f"{you_are} {state}"
+            for you_are in _YOU_ARE
+            for state in (
+                "suicidal", "feeling suicidal", "thinking about suicid*",
+                "thinking of suicid*", "having thoughts of suicid*",
+                "thinking about ending your life", "thinking about killing yourself",
+                "in danger",
+            )
+        ),
+        *(
+            f"{you_have} {act}"
+            for you_have in _YOU_HAVE
+            for act in (
+                "been hurting yourself", "been cutting yourself", "hurt yourself",
+                "taken an overdose",
+            )
+        ),
+        "you feel suicidal", "you want to die", "you want to end your life",
+        "you want to kill yourself", "you took an overdose", "your life is in danger",
+    ),
+    "fr": (
+        "tu penses au suicide", "tu penses a te suicider", "tu penses a mettre fin a tes jours",
+        "tu veux mourir", "tu as envie de mourir", "tu veux te tuer",
+        "tu veux mettre fin a tes jours", "tu te fais du mal", "tu t'es fait du mal",
+        "tu es en danger", "vous pensez au suicide", "vous voulez mourir",
+        "vous avez envie de mourir", "vous etes en danger",
+    ),
+}
+
+# Words that, earlier in the same clause, make a reply term hypothetical or
+# negated: "if you're thinking about suicide", "I don't think you're in danger"
+REPLY_CONDITIONALS: Tuple[str, ...] = (
+    "if", "whenever", "ever", "when", "should", "might", "case",
+    "si", "jamais", "quand", "lorsque", "cas",
+)
+
+_CLAUSE_BREAK = re.compile(r"[.!?;:,\n]")
+_CLAUSE_WORD = re.compile(r"[\w']+")
+
+
+class CrisisGate:
+    """Pre-LLM crisis check for incoming user text.
+
+    Uses the local emotion classifier, so help can be returned in
+    milliseconds regardless of how busy the model is.
+    """
+
+    def __init__(self, reply_lexicons: Dict[str, Tuple[str, ...]] = REPLY_CRISIS_LEXICONS):
+        self._reply_lexicon = CompiledLexicon([
+            (term, "crisis", 1.0) for terms in reply_lexicons.values() for term in terms
+        ])
+        self._reply_guards = frozenset(
+            REPLY_CONDITIONALS + tuple(word for words in NEGATORS.values() for word in words)
+        )
+
+    def check(self, text: str, language: str = "en") -> Optional[Dict]:
+        """Return crisis details and resources, or ``None`` if no crisis is detected."""
+        classification = emotion_classifier.classify(text, language)
+        if not classification["crisis_detected"]:
+            return None
+        language = classification["language"]
+        return {
+            "crisis_detected": True,
+            "crisis_score": classification["crisis_score"],
+            "message": CRISIS_MESSAGES.get(language, CRISIS_MESSAGES["en"]),
+            "resources": CRISIS_RESOURCES.get(language, CRISIS_RESOURCES["en"]),
+            "sentiment": classification["sentiment"],
+        }
+
+    def check_reply(self, text: str, language: str = "en") -> Optional[Dict]:
+        """Return crisis details and resources if a model reply says the user is
+        at risk, or ``None``.
+
+        Only unconditional statements count, so replies that mention suicide
+        while pointing to help don't fire.
+        """
+        normalized = normalize_text(text)
+        for match in self._reply_lexicon.pattern.finditer(normalized):
+            clause_start = max(
+                (found.end() for found in _CLAUSE_BREAK.finditer(normalized, 0, match.start())),
+                default=0,
+            )
+            clause = _CLAUSE_WORD.findall(normalized[clause_start:match.start()])
+            if any(word in self._reply_guards for word in clause):
+                continue
+            language = (language or "en").split("-")[0].lower()
+            return {
+                "crisis_detected": True,
+                "crisis_score": 1.0,
+                "message": CRISIS_MESSAGES.get(language, CRISIS_MESSAGES["en"]),
+                "resources": CRISIS_RESOURCES.get(language, CRISIS_RESOURCES["en"]),
+            }
+        return None
+
+
+# Create a singleton instance
+crisis_gate = CrisisGate()
+
+_WORD_BOUNDARY = re.compile(r"[^\w'’-]")
+
+
+class CrisisScanner:
+    """Crisis check over a model reply that arrives a token at a time.
+
+    Each time a word is completed, the last ``window`` characters are run
+    through ``CrisisGate.check_reply``, so a crisis the model recognizes is
+    reported as soon as its words have streamed rather than once the whole
+    reply is in. Scanning a bounded
+    window keeps each check as cheap as checking one message. The scanner
+    reports at most one crisis.
+    """
+
+    def __init__(self, language: str = "en", window: int = ai_settings.CRISIS_SCAN_WINDOW_CHARS):
+        self.language = language
+        self.window = window
+        self.crisis: Optional[Dict] = None
+        self._tail = ""
+        # Characters at the end of the tail that have not been scanned yet
+        self._unscanned = 0
+
+    def _scan(self, end: int) -> Optional[Dict]:
+        self._unscanned = len(self._tail) - end
+        self.crisis = crisis_gate.check_reply(
+            self._tail[max(0, end - self.window):end], self.language
+        )
+        return self.crisis
+
+    def feed(self, text: str) -> Optional[Dict]:
+        """Add streamed text; return the crisis the first time one is detected."""
+        if self.crisis is not None or not text:
+            return None
+        self._tail = (self._tail + text)[-2 * self.window:]
+        self._unscanned += len(text)
+        # Only scan up to the last complete word; the rest may continue in the next token
+        boundary = None
+        start = len(self._tail) - min(self._unscanned, len(self._tail))
+        for match in _WORD_BOUNDARY.finditer(self._tail, start):
+            boundary = match.start()
+        if boundary is None:
+            return None
+        return self._scan(boundary)
+
+    def finish(self) -> Optional[Dict]:
+        """Scan whatever is left once the stream has ended."""
+        if self.crisis is not None or not self._unscanned:
+            return None
+        return self._scan(len(self._tail))
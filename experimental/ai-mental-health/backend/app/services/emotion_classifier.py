@@ -0,0 +1,333 @@
+import re
+import unicodedata
+from typing import Dict, List, Pattern, Tuple
+
+from app.core.ai_config import ai_settings
+
+# Emotion lexicons per language: category -> {term: weight}.
+# A trailing "*" matches any word ending ("stress*" matches "stressed").
+# Terms are written without accents; input text is accent-folded before matching.
+EMOTION_LEXICONS: Dict[str, Dict[str, Dict[str, float]]] = {
+    "en": {
+        "joy": {
+            "happy": 1.0, "glad": 1.0, "joy*": 1.0, "optimistic": 1.0, "excited": 1.0,
+            "grateful": 1.0, "thankful": 1.0, "hopeful": 1.0, "proud": 0.8, "good": 0.6,
+            "great": 0.8, "better": 0.6, "calm": 0.8, "relaxed": 0.8, "peaceful": 0.8,
+            "content": 0.6, "loved": 0.8, "confident": 0.8,
+        },
+        "sadness": {
+            "sad": 1.0, "unhappy": 1.0, "depress*": 1.5, "hopeless": 2.0, "lonely": 1.2,
+            "alone": 0.8, "empty": 1.2, "cry*": 1.0, "miserable": 1.5, "worthless": 2.0,
+            "heartbroken": 1.5, "grief": 1.2, "down": 0.5, "tired": 0.5, "exhausted": 0.8,
+            "numb": 1.0,
+        },
+        "anxiety": {
+            "anxious": 1.2, "anxiety": 1.2, "worr*": 1.0, "nervous": 1.0, "panic*": 1.5,
+            "scared": 1.0, "afraid": 1.0, "fear*": 1.0, "terrified": 1.5, "uneasy": 0.8,
+            "on edge": 1.0,
+        },
+        "stress": {
+            "stress*": 1.0, "overwhelm*": 1.2, "pressure": 0.8, "tense": 0.8,
+            "burned out": 1.2, "burnt out": 1.2, "can't cope": 1.5, "too much": 0.6,
+        },
+        "anger": {
+            "angry": 1.0, "mad": 0.8, "furious": 1.5, "frustrat*": 1.0, "annoyed": 0.6,
+            "hate": 1.0, "irritated": 0.8, "resent*": 1.0,
+        },
+    },
+    "fr": {
+        "joy": {
+            "heureux": 1.0, "heureuse": 1.0, "content": 0.8, "contente": 0.8, "joie": 1.0,
+            "optimiste": 1.0, "reconnaissant*": 1.0, "fier": 0.8, "fiere": 0.8,
+            "calme": 0.8, "detendu*": 0.8, "serein*": 0.8, "bien": 0.5, "mieux": 0.6,
+            "confiant*": 0.8,
+        },
+        "sadness": {
+            "triste*": 1.0, "malheureu*": 1.0, "deprim*": 1.5, "desespere*": 2.0,
+            "seul": 0.8, "seule": 0.8, "vide": 1.0, "pleur*": 1.0, "epuise*": 0.8,
+            "fatigue*": 0.5, "solitude": 1.2, "chagrin": 1.2,
+        },
+        "anxiety": {
+            "anxieu*": 1.2, "angoiss*": 1.2, "inquiet*": 1.0, "nerveu*": 1.0,
+            "panique*": 1.5, "peur": 1.0, "effraye*": 1.0, "terrifie*": 1.5,
+        },
+        "stress": {
+            "stress*": 1.0, "deborde*": 1.2, "submerge*": 1.2, "pression": 0.8,
+            "tendu*": 0.8, "surmene*": 1.2, "trop": 0.4,
+        },
+        "anger": {
+            "colere": 1.0, "fache*": 1.0, "furieu*": 1.5, "frustre*": 1.0, "enerve*": 0.8,
+            "deteste": 1.0, "rage": 1.2,
+        },
+    },
+}
+
+# Crisis signals per language: {term: weight}. Crisis terms from every
+# language are always scanned, whatever the preferred language. A "*" inside
+# a phrase matches any word ending too ("end* my life" matches "ending my
+# life"), so inflected forms are covered.
+CRISIS_LEXICONS: Dict[str, Dict[str, float]] = {
+    "en": {
+        "suicid*": 2.0, "kill* myself": 2.0, "end* my life": 2.0, "end* my own life": 2.0,
+        "tak* my own life": 2.0, "took my own life": 2.0, "end* it all": 1.5,
+        "want* to die": 2.0, "wanna die": 2.0, "wish* i could die": 2.0,
+        "wish* i was dead": 2.0, "wish* i were dead": 2.0, "wish* i wasn't alive": 2.0,
+        "wish* i was never born": 1.5, "better off dead": 2.0, "better off without me": 1.5,
+        "don't want to live": 2.0, "dont want to live": 2.0, "do not want to live": 2.0,
+        "don't want to be alive": 2.0, "dont want to be alive": 2.0,
+        "do not want to be alive": 2.0, "no reason to live": 2.0, "nothing to live for": 2.0,
+        "harm* myself": 2.0, "hurt* myself": 2.0, "self harm*": 2.0, "self-harm*": 2.0,
+        "cut* myself": 2.0, "overdos*": 2.0,
+        "can't go on": 1.0, "cannot go on": 1.0, "no way out": 1.0, "giv* up on life": 1.5,
+        "gave up on life": 1.5, "nobody would miss me": 1.5, "no one would miss me": 1.5,
+        "disappear forever": 1.0, "hopeless": 0.5, "worthless": 0.5,
+    },
+    "fr": {
+        "suicid*": 2.0, "me suicider": 2.0, "me tuer": 2.0, "mettre fin a mes jours": 2.0,
+        "en finir": 1.5, "envie de mourir": 2.0, "veux mourir": 2.0,
+        "me fai* du mal": 2.0, "me blesser expres": 2.0, "me blesser volontairement": 2.0,
+        "automutil*": 2.0, "me scarifi*": 2.0, "me couper les veines": 2.0,
+        "me couper les poignets": 2.0, "me taillader les veines": 2.0, "surdose": 2.0,
+        "plus de raison de vivre": 2.0, "je n'en peux plus": 1.0, "aucune issue": 1.0,
+        "desespere*": 0.5,
+    },
+}
+
+NEGATORS: Dict[str, Tuple[str, ...]] = {
+    "en": (
+        "not", "no", "never", "don't", "dont", "doesn't", "didn't", "isn't", "wasn't",
+        "aren't", "ain't", "can't", "cannot", "won't", "wouldn't", "hardly", "without",
+        "nor", "neither",
+    ),
+    "fr": ("ne", "pas", "jamais", "rien", "aucun", "aucune", "sans", "ni", "guere"),
+}
+
+INTENSIFIERS: Dict[str, Tuple[str, ...]] = {
+    "en": ("very", "so", "really", "extremely", "super", "incredibly", "totally", "too"),
+    "fr": ("tres", "vraiment", "tellement", "trop", "super", "extremement", "si"),
+}
+
+# Words right after a crisis term that make it literal or figurative rather
+# than a crisis: "I cut myself shaving", "I wanted to die laughing".
+BENIGN_CRISIS_CONTEXT: Dict[str, Tuple[str, ...]] = {
+    "en": (
+        "shaving", "cooking", "chopping", "accidentally", "accident", "laughing",
+        "embarrassment",
+    ),
+    "fr": ("rasant", "cuisinant", "accident", "accidentellement", "rire", "cheveux", "ongles"),
+}
+
+POSITIVE_EMOTIONS = ("joy",)
+NEGATION_WINDOW = 3
+BENIGN_CONTEXT_WINDOW = 3
+INTENSIFIER_WEIGHT = 1.5
+# A negated crisis term ("I am not suicidal") counts for a quarter, and all
+# negated terms together for at most half the threshold: denials alone ("not
+# suicidal at all, I do not want to die") never fire, but they still tip a
+# message that also has an affirmed signal, since a false alarm only shows
+# help resources and a miss can cost far more.
+#
+# Known limits of the lexicon, which is why the LLM second opinion stays on
+# by default: it misses indirect phrasings ("I won't be a problem for much
+# longer"), and benign contexts are only recognized from the short
+# BENIGN_CRISIS_CONTEXT list, so "I cut myself on a can" is a false alarm.
+CRISIS_NEGATION_WEIGHT = 0.25
+NEGATED_CRISIS_CAP = 0.5
+
+_WORD = re.compile(r"[\w']+")
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case, fold accents and straighten apostrophes."""
+    text = text.replace("’", "'").replace("‘", "'")
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def _trie_char(char: str) -> str:
+    if char == " ":
+        return r"\s+"
+    if char == "*":
+        return r"\w*"
+    return re.escape(char)
+
+
+def _term_pattern(words: str) -> Pattern:
+    return re.compile("".join(_trie_char(char) for char in words))
+
+
+def _trie_pattern(node: Dict) -> str:
+    # Children first so the longest term wins, then the term endings
+    alternatives = [
+        _trie_char(char) + _trie_pattern(child)
+        for char, child in sorted(node.items())
+        if char != ""
+    ]
+    endings = node.get("", set())
+    if "prefix" in endings:
+        alternatives.append(r"\w*")
+    if "exact" in endings:
+        alternatives.append(r"\b")
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return "(?:" + "|".join(alternatives) + ")"
+
+
+class CompiledLexicon:
+    """All terms of a lexicon compiled into one regular expression.
+
+    The terms are merged into a character trie before compiling, so a single
+    ``finditer`` pass over the text finds every term without trying each one
+    at each word. ``lookup`` maps a match back to its ``(category, weight)``
+    scores. A trailing "*" on a term matches any word ending, and so does a
+    "*" inside a phrase.
+    """
+
+    def __init__(self, entries: List[Tuple[str, str, float]]):
+        self.exact: Dict[str, List[Tuple[str, float]]] = {}
+        self.prefixes: Dict[str, List[Tuple[str, float]]] = {}
+        # Phrases with a "*" inside, matched back with their own pattern
+        self.inflected: Dict[str, Tuple[Pattern, List[Tuple[str, float]]]] = {}
+        trie: Dict = {}
+        for term, category, weight in entries:
+            is_prefix = term.endswith("*")
+            words = " ".join(term.rstrip("*").split())
+            if "*" in words:
+                pattern, scores = self.inflected.setdefault(words, (_term_pattern(words), []))
+                scores.append((category, weight))
+            else:
+                scores = self.prefixes if is_prefix else self.exact
+                scores.setdefault(words, []).append((category, weight))
+
+            node = trie
+            for char in words:
+                node = node.setdefault(char, {})
+            node.setdefault("", set()).add("prefix" if is_prefix else "exact")
+
+        self.pattern: Pattern = re.compile(r"\b" + _trie_pattern(trie))
+        self._max_prefix = max((len(prefix) for prefix in self.prefixes), default=0)
+
+    def lookup(self, matched: str) -> List[Tuple[str, float]]:
+        matched = " ".join(matched.split())
+        if matched in self.exact:
+            return self.exact[matched]
+        for pattern, scores in self.inflected.values():
+            if pattern.fullmatch(matched):
+                return scores
+        for end in range(min(len(matched), self._max_prefix), 0, -1):
+            if matched[:end] in self.prefixes:
+                return self.prefixes[matched[:end]]
+        return []
+
+
+class EmotionClassifier:
+    """LLM-free emotion and crisis scoring from weighted word lists.
+
+    Runs in-process in microseconds, so it can sit in the request path of
+    every chat turn. English and French are supported; unknown languages fall
+    back to English.
+    """
+
+    def __init__(
+        self,
+        emotion_lexicons: Dict[str, Dict[str, Dict[str, float]]] = EMOTION_LEXICONS,
+        crisis_lexicons: Dict[str, Dict[str, float]] = CRISIS_LEXICONS,
+        crisis_threshold: float = ai_settings.CRISIS_THRESHOLD,
+    ):
+        self.emotion_lexicons = emotion_lexicons
+        self.crisis_lexicons = crisis_lexicons
+        self.crisis_threshold = crisis_threshold
+        self._matchers = {language: self._build_matcher(language) for language in emotion_lexicons}
+
+    def _language(self, language: str) -> str:
+        language = (language or "en").split("-")[0].lower()
+        return language if language in self.emotion_lexicons else "en"
+
+    def _build_matcher(self, language: str) -> Tuple:
+        entries = [
+            (term, category, weight)
+            for category, terms in self.emotion_lexicons[language].items()
+            for term, weight in terms.items()
+        ]
+        # Crisis terms from every language, deduplicated by term
+        crisis_terms: Dict[str, float] = {}
+        for terms in self.crisis_lexicons.values():
+            for term, weight in terms.items():
+                crisis_terms[term] = max(weight, crisis_terms.get(term, 0.0))
+        entries.extend((term, "crisis", weight) for term, weight in crisis_terms.items())
+
+        lexicon = CompiledLexicon(entries)
+        negators = frozenset(NEGATORS.get(language, ()) + NEGATORS["en"])
+        intensifiers = frozenset(INTENSIFIERS.get(language, ()) + INTENSIFIERS["en"])
+        # Like the crisis terms, benign contexts from every language
+        benign = frozenset(word for words in BENIGN_CRISIS_CONTEXT.values() for word in words)
+        return lexicon, negators, intensifiers, benign
+
+    def classify(self, text: str, language: str = "en") -> Dict:
+        """Score the emotions and crisis risk expressed in ``text``."""
+        language = self._language(language)
+        lexicon, negators, intensifiers, benign = self._matchers[language]
+        normalized = normalize_text(text)
+
+        emotions = {category: 0.0 for category in self.emotion_lexicons[language]}
+        crisis_raw = 0.0
+        negated_crisis = 0.0
+        negated_positive = 0.0
+        matched_terms = []
+
+        for match in lexicon.pattern.finditer(normalized):
+            preceding = _WORD.findall(normalized[max(0, match.start() - 40):match.start()])
+            negated = any(word in negators for word in preceding[-NEGATION_WINDOW:])
+            boost = INTENSIFIER_WEIGHT if preceding and preceding[-1] in intensifiers else 1.0
+            matched_terms.append(match.group())
+
+            for category, weight in lexicon.lookup(match.group()):
+                weight *= boost
+                if category == "crisis":
+                    following = _WORD.findall(normalized[match.end():match.end() + 40])
+                    if any(word in benign for word in following[:BENIGN_CONTEXT_WINDOW]):
+                        continue
+                    if negated:
+                        negated_crisis += weight * CRISIS_NEGATION_WEIGHT
+                    else:
+                        crisis_raw += weight
+                elif not negated:
+                    emotions[category] += weight
+                elif category in POSITIVE_EMOTIONS:
+                    # "not happy" leans negative rather than neutral
+                    negated_positive += weight * 0.5
+
+        crisis_raw += min(negated_crisis, NEGATED_CRISIS_CAP * self.crisis_threshold)
+        positive = sum(emotions[category] for category in POSITIVE_EMOTIONS)
+        negative = sum(
+            score for category, score in emotions.items() if category not in POSITIVE_EMOTIONS
+        ) + negated_positive
+        crisis_detected = crisis_raw >= self.crisis_threshold
+
+        score = (positive - negative) / (positive + negative + 1.0)
+        if crisis_detected:
+            score = min(score, -0.9)
+        if score > 0.2:
+            label = "positive"
+        elif score < -0.2:
+            label = "negative"
+        else:
+            label = "neutral"
+
+        primary_emotion = max(emotions, key=emotions.get)
+        if emotions[primary_emotion] == 0.0:
+            primary_emotion = "neutral"
+
+        return {
+            "language": language,
+            "emotions": {category: round(value, 3) for category, value in emotions.items()},
+            "primary_emotion": primary_emotion,
+            "sentiment": {"score": round(score, 3), "label": label},
+            "crisis_score": round(min(1.0, crisis_raw / (2 * self.crisis_threshold)), 3),
+            "crisis_detected": crisis_detected,
+            "matched_terms": matched_terms,
+        }
+
+
+# Create a singleton instance
+emotion_classifier = EmotionClassifier()
@@ -0,0 +1,437 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.core.ai_config import ai_settings
+from app.services.ai_service import ai_service
+from app.services.llm_client import payload_key
+from app.services.llm_scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_DEFAULT,
+    LLMOverloaded,
+    llm_priority,
+)
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+FINISHED = (JOB_SUCCEEDED, JOB_FAILED)
+
+# Seconds between store reads while waiting on a job run by another process
+POLL_INTERVAL = 0.5
+
+
+class JobConflict(Exception):
+    """An idempotency key was reused for a different request."""
+
+
+class MemoryJobStore:
+    """Jobs kept in this process; they are lost on restart."""
+
+    blocking = False
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict] = {}
+        # (owner, idempotency key) -> job id
+        self._keys: Dict[tuple, str] = {}
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        job = self._jobs.get(job_id)
+        if job is None or job["expires_at"] < time.time():
+            return None
+        return dict(job)
+
+    def find(self, owner: str, idempotency_key: str) -> Optional[Dict]:
+        job_id = self._keys.get((owner, idempotency_key))
+        return self.get(job_id) if job_id is not None else None
+
+    def put(self, job: Dict) -> None:
+        self._jobs[job["id"]] = dict(job)
+        if job["idempotency_key"] is not None:
+            self._keys[(job["owner"], job["idempotency_key"])] = job["id"]
+
+    def create(self, job: Dict) -> Dict:
+        if job["idempotency_key"] is not None:
+            existing = self.find(job["owner"], job["idempotency_key"])
+            if existing is not None:
+                return existing
+        self.put(job)
+        return dict(job)
+
+    def purge(self) -> int:
+        now = time.time()
+        expired = [job for job in self._jobs.values() if job["expires_at"] < now]
+        for job in expired:
+            del self._jobs[job["id"]]
+            if self._keys.get((job["owner"], job["idempotency_key"])) == job["id"]:
+                del self._keys[(job["owner"], job["idempotency_key"])]
+        return len(expired)
+
+    def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return counts
+
+
+class SQLiteJobStore:
+    """Jobs in a SQLite file shared by all worker processes, so any worker
+    can report a job and results survive restarts."""
+
+    blocking = True
+
+    COLUMNS = ("id", "owner", "kind", "request_key", "idempotency_key", "status",
+               "result", "error", "created_at", "updated_at", "expires_at")
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA busy_timeout=5000")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS generation_jobs ("
+            "id TEXT PRIMARY KEY, owner TEXT NOT NULL, kind TEXT NOT NULL, "
+            "request_key TEXT NOT NULL, idempotency_key TEXT, status TEXT NOT NULL, "
+            "result TEXT, error TEXT, created_at REAL NOT NULL, "
+            "updated_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        # Jobs without a key have a NULL key, which never conflicts
+        self._connection.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_generation_jobs_idempotency "
+            "ON generation_jobs (owner, idempotency_key)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS ix_generation_jobs_expires_at "
+            "ON generation_jobs (expires_at)"
+        )
+        self._connection.commit()
+
+    def _job(self, row) -> Optional[Dict]:
+        if row is None:
+            return None
+        job = dict(zip(self.COLUMNS, row))
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM generation_jobs "
+                "WHERE id = ? AND expires_at >= ?",
+                (job_id, time.time())
+            ).fetchone()
+        return self._job(row)
+
+    def _find(self, owner: str, idempotency_key: str) -> Optional[Dict]:
+        row = self._connection.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM generation_jobs "
+            "WHERE owner = ? AND idempotency_key = ? AND expires_at >= ?",
+            (owner, idempotency_key, time.time())
+        ).fetchone()
+        return self._job(row)
+
+    def find(self, owner: str, idempotency_key: str) -> Optional[Dict]:
+        with self._lock:
+            return self._find(owner, idempotency_key)
+
+    def _values(self, job: Dict) -> tuple:
+        row = dict(job, result=json.dumps(job["result"]) if job["result"] is not None else None)
+        return tuple(row[column] for column in self.COLUMNS)
+
+    def put(self, job: Dict) -> None:
+        # An upsert on the id: unlike INSERT OR REPLACE it never deletes
+        # another job that holds the same idempotency key
+        with self._lock:
+            self._connection.execute(
+                f"INSERT INTO generation_jobs ({', '.join(self.COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in self.COLUMNS)}) "
+                f"ON CONFLICT (id) DO UPDATE SET "
+                f"{', '.join(f'{column} = excluded.{column}' for column in self.COLUMNS[1:])}",
+                self._values(job)
+            )
+            self._connection.commit()
+
+    def create(self, job: Dict) -> Dict:
+        """Insert ``job``, unless a live job of the same owner already has its
+        idempotency key; returns whichever job holds the key.
+
+        The unique index makes this atomic across worker processes: of two
+        concurrent inserts with one key, the second does nothing and reads
+        the first.
+        """
+        with self._lock:
+            if job["idempotency_key"] is not None:
+                # An expired job gives up its key, even before the sweep
+                self._connection.execute(
+                    "DELETE FROM generation_jobs "
+                    "WHERE owner = ? AND idempotency_key = ? AND expires_at < ?",
+                    (job["owner"], job["idempotency_key"], time.time())
+                )
+            self._connection.execute(
+                f"INSERT INTO generation_jobs ({', '.join(self.COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in self.COLUMNS)}) "
+                "ON CONFLICT (owner, idempotency_key) DO NOTHING",
+                self._values(job)
+            )
+            self._connection.commit()
+            if job["idempotency_key"] is None:
+                return dict(job)
+            return self._find(job["owner"], job["idempotency_key"])
+
+    def purge(self) -> int:
+        with self._lock:
+            deleted = self._connection.execute(
+                "DELETE FROM generation_jobs WHERE expires_at < ?", (time.time(),)
+            ).rowcount
+            self._connection.commit()
+        return deleted
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT status, COUNT(*) FROM generation_jobs GROUP BY status"
+            ).fetchall()
+        return dict(rows)
+
+
+Handler = Callable[[Dict], Awaitable[Dict]]
+
+
+class GenerationJobs:
+    """Runs LLM generations in the background and keeps their results.
+
+    ``submit`` stores a queued job and returns it at once; a pool of
+    ``workers`` tasks runs the jobs in submission order. Finished jobs are
+    kept for ``ttl`` seconds after they finish. Submitting again with the
+    same owner and idempotency key returns the existing job instead of
+    starting another generation, so a client that lost its connection can
+    retry safely. The queue holds at most ``max_queue`` jobs; beyond that
+    submissions are refused with ``LLMOverloaded``.
+    """
+
+    def __init__(
+        self,
+        store,
+        handlers: Dict[str, Handler],
+        workers: int,
+        max_queue: int,
+        ttl: float,
+        timeout: float
+    ):
+        self.store = store
+        self.handlers = handlers
+        self.workers = workers
+        self.max_queue = max_queue
+        self.ttl = ttl
+        self.timeout = timeout
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.reused = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # Set when a job run by this process finishes
+        self._finished: Dict[str, asyncio.Event] = {}
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _call(self, method, *args):
+        if self.store.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def start(self) -> None:
+        """Start the worker pool and the expiry sweep. Safe to call more than once."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep()))
+
+    async def close(self) -> None:
+        """Stop the workers. Jobs still queued or running are abandoned and
+        expire with their TTL."""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self._queue = None
+
+    async def submit(
+        self,
+        owner: str,
+        kind: str,
+        params: Dict,
+        idempotency_key: Optional[str] = None
+    ) -> Dict:
+        """Queue a job, or return the job already submitted under ``idempotency_key``.
+
+        Raises ``JobConflict`` if that key was used for a different request.
+        """
+        request_key = payload_key({"kind": kind, "params": params})
+        if idempotency_key is not None:
+            existing = await self._call(self.store.find, owner, idempotency_key)
+            if existing is not None:
+                return self._reuse(existing, request_key)
+        if self.queued >= self.max_queue:
+            raise LLMOverloaded("Too many queued generation jobs", 429, retry_after=5)
+
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "owner": owner,
+            "kind": kind,
+            "request_key": request_key,
+            "idempotency_key": idempotency_key,
+            "status": JOB_QUEUED,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+            # Unfinished jobs expire too, in case this process dies
+            "expires_at": now + self.ttl,
+        }
+        stored = await self._call(self.store.create, job)
+        if stored["id"] != job["id"]:
+            # A concurrent submission, possibly in another worker, took the key first
+            return self._reuse(stored, request_key)
+        self._finished[job["id"]] = asyncio.Event()
+        self._queue.put_nowait((job, params))
+        return job
+
+    def _reuse(self, existing: Dict, request_key: str) -> Dict:
+        if existing["request_key"] != request_key:
+            raise JobConflict("Idempotency key already used for a different request")
+        self.reused += 1
+        return existing
+
+    async def _update(self, job: Dict, **changes) -> None:
+        now = time.time()
+        job.update(changes, updated_at=now)
+        if job["status"] in FINISHED:
+            job["expires_at"] = now + self.ttl
+        await self._call(self.store.put, job)
+
+    async def _run(self, job: Dict, params: Dict) -> None:
+        await self._update(job, status=JOB_RUNNING)
+        self.running += 1
+        try:
+            result = await asyncio.wait_for(
+                self.handlers[job["kind"]](params), timeout=self.timeout
+            )
+        except asyncio.TimeoutError:
+            self.failed += 1
+            await self._update(
+                job, status=JOB_FAILED, error=f"Generation took longer than {self.timeout:g} s"
+            )
+        except Exception as e:
+            self.failed += 1
+            await self._update(job, status=JOB_FAILED, error=str(e))
+        else:
+            self.completed += 1
+            await self._update(job, status=JOB_SUCCEEDED, result=result)
+        finally:
+            self.running -= 1
+
+    async def _work(self) -> None:
+        while True:
+            job, params = await self._queue.get()
+            try:
+                await self._run(job, params)
+            except Exception:
+                logger.exception("Generation job %s could not be recorded", job["id"])
+            finally:
+                event = self._finished.pop(job["id"], None)
+                if event is not None:
+                    event.set()
+
+    async def _sweep(self) -> None:
+        while True:
+            await asyncio.sleep(min(self.ttl, 60.0))
+            try:
+                await self._call(self.store.purge)
+            except Exception:
+                logger.exception("Could not purge expired generation jobs")
+
+    async def get(self, job_id: str, owner: str) -> Optional[Dict]:
+        """Return the job if it exists, has not expired and belongs to ``owner``."""
+        job = await self._call(self.store.get, job_id)
+        if job is None or job["owner"] != owner:
+            return None
+        return job
+
+    async def wait(self, job_id: str, owner: str, timeout: float) -> Optional[Dict]:
+        """Return the job once finished, or as it stands after ``timeout`` seconds."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await self.get(job_id, owner)
+            remaining = deadline - time.monotonic()
+            if job is None or job["status"] in FINISHED or remaining <= 0:
+                return job
+            event = self._finished.get(job_id)
+            try:
+                if event is not None:
+                    await asyncio.wait_for(event.wait(), timeout=remaining)
+                else:
+                    # Run by another worker process; only the store knows
+                    await asyncio.sleep(min(POLL_INTERVAL, remaining))
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict:
+        return {
+            "backend": ai_settings.GENERATION_JOB_STORE,
+            "workers": self.workers,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "idempotent_reuses": self.reused,
+        }
+
+
+async def draft_message_job(params: Dict) -> Dict:
+    llm_priority.set(PRIORITY_DEFAULT)
+    return await ai_service.draft_message(params["context"], params.get("bypass_cache", False))
+
+
+async def refine_message_job(params: Dict) -> Dict:
+    # Refinement can wait; chat and crisis traffic go first
+    llm_priority.set(PRIORITY_BACKGROUND)
+    refined_message = await ai_service.refine_message(
+        params["draft"],
+        params["feedback"],
+        params.get("bypass_cache", False)
+    )
+    return {"refined_draft": refined_message}
+
+
+def build_store():
+    if ai_settings.GENERATION_JOB_STORE == "sqlite":
+        return SQLiteJobStore(ai_settings.GENERATION_JOB_STORE_PATH)
+    return MemoryJobStore()
+
+
+# Create a singleton instance
+generation_jobs = GenerationJobs(
+    build_store(),
+    {"draft-message": draft_message_job, "refine-message": refine_message_job},
+    ai_settings.GENERATION_JOB_WORKERS,
+    ai_settings.GENERATION_JOB_MAX_QUEUE,
+    ai_settings.GENERATION_JOB_TTL_SECONDS,
+    ai_settings.GENERATION_JOB_TIMEOUT_SECONDS
+)
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import time
+from typing import Collection, Dict, List, Optional, Set
+
+import httpx
+
+from app.services.llm_scheduler import LLMScheduler
+
+logger = logging.getLogger(__name__)
+
+ROUTING_LEAST_OUTSTANDING = "least-outstanding"
+ROUTING_MODEL_LOADED = "model-loaded"
+
+
+def model_name(name: str) -> str:
+    """Normalize a model name the way Ollama lists it (``llama2`` is ``llama2:latest``)."""
+    return name if ":" in name else f"{name}:latest"
+
+
+class LLMBackend:
+    """One Ollama instance, with its own scheduler and health state.
+
+    A backend starts out healthy with unknown models. Probes fill in the
+    models it has (``/api/tags``) and has loaded (``/api/ps``); a failed
+    probe or request marks it unhealthy until a probe succeeds again.
+    """
+
+    def __init__(self, url: str, scheduler: LLMScheduler):
+        self.url = url.rstrip("/")
+        self.scheduler = scheduler
+        self.healthy = True
+        self.models: Optional[Set[str]] = None
+        self.loaded_models: Set[str] = set()
+        self.last_error: Optional[str] = None
+        self.last_probe: Optional[float] = None
+        self.selected = 0
+        self.failures = 0
+        self.failovers = 0
+
+    @property
+    def outstanding(self) -> int:
+        return self.scheduler.running + self.scheduler.queued
+
+    def has_model(self, model: Optional[str]) -> bool:
+        return model is None or self.models is None or model_name(model) in self.models
+
+    def has_loaded(self, model: Optional[str]) -> bool:
+        return model is not None and model_name(model) in self.loaded_models
+
+    def mark_failed(self, error: str) -> None:
+        self.healthy = False
+        self.failures += 1
+        self.last_error = error
+
+    def stats(self) -> Dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "last_error": self.last_error,
+            "seconds_since_probe": (
+                round(time.time() - self.last_probe, 3) if self.last_probe else None
+            ),
+            "models": sorted(self.models) if self.models is not None else None,
+            "loaded_models": sorted(self.loaded_models),
+            "outstanding": self.outstanding,
+            "selected": self.selected,
+            "failures": self.failures,
+            "failovers": self.failovers,
+            "scheduler": self.scheduler.stats(),
+        }
+
+
+class LLMBackendPool:
+    """Routes LLM calls across one or more Ollama instances.
+
+    A call goes to a healthy backend that has the requested model, the one
+    with the fewest outstanding (running plus queued) calls. With the
+    ``model-loaded`` routing, backends that already hold the model in
+    memory come first, so calls avoid a model load while one is warm. When
+    every backend is unhealthy they are all tried anyway, in the same
+    order, rather than refusing the call.
+
+    Health and models are refreshed by a background probe every
+    ``probe_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        routing: str,
+        probe_interval: float,
+        probe_timeout: float,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float
+    ):
+        if routing not in (ROUTING_LEAST_OUTSTANDING, ROUTING_MODEL_LOADED):
+            raise ValueError(f"Unknown Ollama routing: {routing}")
+        self.routing = routing
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.backends = [
+            LLMBackend(url, LLMScheduler(max_concurrency, max_queue, queue_timeout))
+            for url in dict.fromkeys(urls)
+        ]
+        self._probe_task: Optional[asyncio.Task] = None
+
+    def select(
+        self, model: Optional[str], exclude: Collection[LLMBackend] = ()
+    ) -> Optional[LLMBackend]:
+        """Pick the backend for a call, or ``None`` if every candidate was excluded."""
+        candidates = [backend for backend in self.backends if backend not in exclude]
+        if not candidates:
+            return None
+        healthy = [
+            backend for backend in candidates if backend.healthy and backend.has_model(model)
+        ]
+
+        def rank(backend: LLMBackend):
+            cold = self.routing == ROUTING_MODEL_LOADED and not backend.has_loaded(model)
+            # Ties go to the backend picked least often, spreading idle traffic
+            return (cold, backend.outstanding, backend.selected)
+
+        return min(healthy or candidates, key=rank)
+
+    async def probe(self, client: httpx.AsyncClient, backend: LLMBackend) -> None:
+        """Refresh one backend's health, available models and loaded models."""
+        try:
+            tags = await client.get(f"{backend.url}/api/tags", timeout=self.probe_timeout)
+            tags.raise_for_status()
+            running = await client.get(f"{backend.url}/api/ps", timeout=self.probe_timeout)
+            running.raise_for_status()
+        except (httpx.HTTPError, ValueError) as e:
+            if backend.healthy:
+                logger.warning("Ollama backend %s failed its health check: %s", backend.url, e)
+            backend.mark_failed(f"health check: {e}")
+        else:
+            if not backend.healthy:
+                logger.info("Ollama backend %s is healthy again", backend.url)
+            backend.healthy = True
+            backend.models = {model["name"] for model in tags.json().get("models", [])}
+            backend.loaded_models = {model["name"] for model in running.json().get("models", [])}
+        backend.last_probe = time.time()
+
+    async def probe_all(self, client: httpx.AsyncClient) -> None:
+        await asyncio.gather(*(self.probe(client, backend) for backend in self.backends))
+
+    async def _probe_loop(self, client: httpx.AsyncClient) -> None:
+        while True:
+            await self.probe_all(client)
+            await asyncio.sleep(self.probe_interval)
+
+    def start(self, client: httpx.AsyncClient) -> None:
+        """Start probing the backends in the background."""
+        if self._probe_task is None and self.probe_interval > 0:
+            self._probe_task = asyncio.create_task(self._probe_loop(client))
+
+    async def close(self) -> None:
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+        self._probe_task = None
+
+    def stats(self) -> Dict:
+        """Return routing settings and per-backend health, load and scheduler stats."""
+        return {
+            "routing": self.routing,
+            "healthy": sum(1 for backend in self.backends if backend.healthy),
+            "backends": [backend.stats() for backend in self.backends],
+        }
@@ -0,0 +1,267 @@
+import hashlib
+import json
+import logging
+import time
+from contextlib import asynccontextmanager, nullcontext
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.ai_config import ai_settings
+from app.services.llm_backends import LLMBackend, LLMBackendPool
+from app.services.llm_scheduler import PRIORITY_NAMES, llm_priority
+from app.services.metrics import (
+    llm_queue_wait,
+    llm_request_duration,
+    llm_requests,
+    llm_time_to_first_token,
+    observe_ollama_timings,
+    record_timing,
+)
+
+# A call that fails this way never reached Ollama, or was refused before any
+# generation started, so it can safely be retried on another backend
+FAILOVER_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+FAILOVER_STATUSES = {502, 503, 504}
+
+logger = logging.getLogger(__name__)
+
+
+def payload_key(payload: Dict) -> str:
+    """Stable key for an Ollama request payload, ignoring the stream flag."""
+    keyed = {name: value for name, value in payload.items() if name != "stream"}
+    encoded = json.dumps(keyed, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LLMClient:
+    """Shared, pooled HTTP transport for all Ollama traffic.
+
+    One connection pool is created by the application lifespan and reused by
+    every caller, so requests reuse keep-alive connections instead of paying
+    for a new TCP handshake each time. Each call is routed to one of the
+    configured Ollama backends and first takes a slot from that backend's
+    scheduler, which bounds concurrency and queueing.
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._transport: Optional[httpx.AsyncHTTPTransport] = None
+        self.backends = LLMBackendPool(
+            ai_settings.OLLAMA_BASE_URLS or [ai_settings.OLLAMA_BASE_URL],
+            ai_settings.OLLAMA_ROUTING,
+            ai_settings.OLLAMA_HEALTH_CHECK_INTERVAL_SECONDS,
+            ai_settings.OLLAMA_HEALTH_CHECK_TIMEOUT,
+            ai_settings.LLM_MAX_CONCURRENCY,
+            ai_settings.LLM_MAX_QUEUE,
+            ai_settings.LLM_QUEUE_TIMEOUT_SECONDS
+        )
+        self.in_flight = 0
+        self.requests_total = 0
+        self.pool_waits = 0
+        self.pool_wait_seconds = 0.0
+
+    async def start(self) -> None:
+        """Create the connection pool. Safe to call more than once."""
+        if self._client is not None:
+            return
+        limits = httpx.Limits(
+            max_connections=ai_settings.OLLAMA_MAX_CONNECTIONS,
+            max_keepalive_connections=ai_settings.OLLAMA_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=ai_settings.OLLAMA_KEEPALIVE_EXPIRY,
+        )
+        timeout = httpx.Timeout(
+            connect=ai_settings.OLLAMA_CONNECT_TIMEOUT,
+            read=ai_settings.OLLAMA_READ_TIMEOUT,
+            write=ai_settings.OLLAMA_WRITE_TIMEOUT,
+            pool=ai_settings.OLLAMA_POOL_TIMEOUT,
+        )
+        self._transport = httpx.AsyncHTTPTransport(limits=limits)
+        self._client = httpx.AsyncClient(transport=self._transport, timeout=timeout)
+        self.backends.start(self._client)
+
+    async def close(self) -> None:
+        """Stop the health checks and close the connection pool."""
+        await self.backends.close()
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._transport = None
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        # Scripts and tests that don't run the app lifespan still get a pool
+        if self._client is None:
+            await self.start()
+        return self._client
+
+    def _begin(self) -> Tuple[float, bool]:
+        # A request that starts while every connection is busy has to wait
+        # for the pool; its whole duration is counted as pool wait time.
+        waited = self.in_flight >= ai_settings.OLLAMA_MAX_CONNECTIONS
+        if waited:
+            self.pool_waits += 1
+        self.in_flight += 1
+        self.requests_total += 1
+        return time.perf_counter(), waited
+
+    def _end(self, path: str, started: float, waited: bool) -> None:
+        self.in_flight -= 1
+        elapsed = time.perf_counter() - started
+        if waited:
+            self.pool_wait_seconds += elapsed
+        llm_request_duration.observe(elapsed, path=path)
+        record_timing("llm", elapsed)
+
+    async def _send(
+        self,
+        backend: LLMBackend,
+        path: str,
+        payload: Dict,
+        stream: bool,
+        timeout: Optional[float] = None
+    ) -> httpx.Response:
+        client = await self._get_client()
+        request = client.build_request(
+            "POST",
+            f"{backend.url}{path}",
+            json=payload,
+            timeout=timeout if timeout is not None else client.timeout
+        )
+        try:
+            response = await client.send(request, stream=stream)
+        except httpx.HTTPError:
+            llm_requests.inc(path=path, backend=backend.url, status="error")
+            raise
+        llm_requests.inc(path=path, backend=backend.url, status=str(response.status_code))
+        return response
+
+    @asynccontextmanager
+    async def _call(
+        self,
+        path: str,
+        payload: Dict,
+        stream: bool,
+        scheduled: bool = True
+    ) -> AsyncIterator[Tuple[httpx.Response, float]]:
+        """Send one request to Ollama and yield the response and its start time.
+
+        The chosen backend's scheduler slot is held until the response is
+        closed; unscheduled requests skip admission control. A request that
+        cannot connect, or is refused with 502, 503 or 504, fails over to
+        the next backend while there is one left.
+        """
+        model = payload.get("model")
+        tried: List[LLMBackend] = []
+        while True:
+            backend = self.backends.select(model, tried)
+            backend.selected += 1
+            tried.append(backend)
+            last_chance = self.backends.select(model, tried) is None
+            slot = backend.scheduler.slot() if scheduled else nullcontext()
+            async with slot as queue_wait:
+                if scheduled:
+                    priority = llm_priority.get()
+                    llm_queue_wait.observe(
+                        queue_wait, priority=PRIORITY_NAMES.get(priority, str(priority))
+                    )
+                    record_timing("llm-queue", queue_wait)
+                started, waited = self._begin()
+                try:
+                    try:
+                        response = await self._send(backend, path, payload, stream)
+                    except FAILOVER_ERRORS as e:
+                        backend.mark_failed(f"{type(e).__name__}: {e}")
+                        if last_chance:
+                            raise
+                        logger.warning(
+                            "Ollama backend %s is unreachable, failing over: %s", backend.url, e
+                        )
+                        backend.failovers += 1
+                        continue
+                    if response.status_code in FAILOVER_STATUSES and not last_chance:
+                        await response.aclose()
+                        backend.failovers += 1
+                        continue
+                    try:
+                        yield response, started
+                    finally:
+                        await response.aclose()
+                    return
+                finally:
+                    self._end(path, started, waited)
+
+    async def post(self, path: str, json: Dict, scheduled: bool = True) -> httpx.Response:
+        """POST a JSON body to Ollama and return the full response.
+
+        ``scheduled=False`` skips the backend's admission control, for short
+        calls such as embeddings that should neither queue behind nor hold
+        a slot wanted by a generation.
+        """
+        async with self._call(path, json, stream=False, scheduled=scheduled) as (response, _):
+            return response
+
+    async def post_to(
+        self,
+        backend: LLMBackend,
+        path: str,
+        json: Dict,
+        timeout: Optional[float] = None
+    ) -> httpx.Response:
+        """POST straight to one backend, bypassing routing and its scheduler."""
+        return await self._send(backend, path, json, stream=False, timeout=timeout)
+
+    @asynccontextmanager
+    async def stream(self, path: str, json: Dict) -> AsyncIterator[httpx.Response]:
+        """POST a JSON body to Ollama and yield the streaming response."""
+        # The slot is held until the stream is fully read or closed
+        async with self._call(path, json, stream=True) as (response, _):
+            yield response
+
+    async def stream_chunks(self, path: str, payload: Dict) -> AsyncIterator[Dict]:
+        """POST a JSON body to Ollama and yield the decoded NDJSON chunks.
+
+        Raises on an HTTP error status or an ``error`` chunk. Stops after the
+        ``done`` chunk, whose timing fields are recorded as metrics, as is
+        the time to the first chunk.
+        """
+        async with self._call(path, payload, stream=True) as (response, started):
+            response.raise_for_status()
+            first = True
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise Exception(chunk["error"])
+                if first:
+                    first = False
+                    elapsed = time.perf_counter() - started
+                    llm_time_to_first_token.observe(elapsed, path=path)
+                    record_timing("llm-ttft", elapsed)
+                if chunk.get("done"):
+                    observe_ollama_timings(chunk)
+                    yield chunk
+                    break
+                yield chunk
+
+    def stats(self) -> Dict:
+        """Return connection pool statistics."""
+        pool = getattr(self._transport, "_pool", None)
+        connections = list(pool.connections) if pool is not None else []
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "started": self._client is not None,
+            "connections_open": len(connections),
+            "connections_in_use": len(connections) - idle,
+            "connections_idle": idle,
+            "requests_in_flight": self.in_flight,
+            "requests_total": self.requests_total,
+            "pool_waits": self.pool_waits,
+            "pool_wait_seconds": round(self.pool_wait_seconds, 6),
+            "max_connections": ai_settings.OLLAMA_MAX_CONNECTIONS,
+            "max_keepalive_connections": ai_settings.OLLAMA_MAX_KEEPALIVE_CONNECTIONS,
+        }
+
+
+# Create a singleton instance
+llm_client = LLMClient()
@@ -0,0 +1,170 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, List, Tuple
+
+# Lower values are admitted first
+PRIORITY_CRISIS = 0
+PRIORITY_CHAT = 1
+PRIORITY_DEFAULT = 2
+PRIORITY_BACKGROUND = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_CRISIS: "crisis",
+    PRIORITY_CHAT: "chat",
+    PRIORITY_DEFAULT: "default",
+    PRIORITY_BACKGROUND: "background",
+}
+
+# Priority of the LLM calls made while handling the current request. Set by
+# the endpoint; every call it makes, directly or through a service, inherits it.
+llm_priority: ContextVar[int] = ContextVar("llm_priority", default=PRIORITY_DEFAULT)
+
+
+class LLMOverloaded(Exception):
+    """Raised when an LLM call is refused instead of queued indefinitely.
+
+    ``status_code`` is 429 when the wait queue is full and 503 when the call
+    waited longer than the queue timeout; ``retry_after`` is a hint in seconds.
+    """
+
+    def __init__(self, detail: str, status_code: int, retry_after: int):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class LLMScheduler:
+    """Admission control in front of one LLM backend.
+
+    At most ``max_concurrency`` calls run at once. Further calls wait in a
+    priority queue of at most ``max_queue`` entries and are admitted in
+    priority order, oldest first within a priority. When the queue is full a
+    new call displaces the lowest-priority waiter if it outranks it, and is
+    rejected otherwise, so crisis and chat traffic are never refused because
+    of queued background work.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.running = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self.admitted = 0
+        self.rejected = 0
+        self.shed = 0
+        self.timed_out = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.service_seconds = 0.0
+        self.completed = 0
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, waiter in self._waiters if not waiter.done())
+
+    def retry_after(self) -> int:
+        """Estimate in whole seconds until a newly queued call would start."""
+        average = self.service_seconds / self.completed if self.completed else 1.0
+        return max(1, math.ceil(average * (self.queued + 1) / self.max_concurrency))
+
+    def _overloaded(self, detail: str, status_code: int) -> LLMOverloaded:
+        return LLMOverloaded(detail, status_code, self.retry_after())
+
+    def _shed_lowest(self, priority: int) -> bool:
+        # Drop the newest waiter of the lowest priority, if it ranks below us
+        pending = [entry for entry in self._waiters if not entry[2].done()]
+        if not pending:
+            return False
+        lowest = max(pending, key=lambda entry: (entry[0], entry[1]))
+        if lowest[0] <= priority:
+            return False
+        self.shed += 1
+        lowest[2].set_exception(
+            self._overloaded("LLM queue is full; request displaced by higher priority work", 429)
+        )
+        return True
+
+    def _release(self) -> None:
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                # Hand the slot straight to the next waiter
+                waiter.set_result(None)
+                return
+        self.running -= 1
+
+    async def _acquire(self, priority: int) -> float:
+        if self.running < self.max_concurrency and not self.queued:
+            self.running += 1
+            return 0.0
+        if self.queued >= self.max_queue and not self._shed_lowest(priority):
+            self.rejected += 1
+            raise self._overloaded("LLM queue is full", 429)
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                # The slot arrived just as we gave up; pass it on
+                self._release()
+            else:
+                waiter.cancel()
+            self.timed_out += 1
+            raise self._overloaded("Timed out waiting for the LLM", 503)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                self._release()
+            else:
+                waiter.cancel()
+            raise
+        waited = time.perf_counter() - started
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        return waited
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[float]:
+        """Hold one concurrency slot for an LLM call; yields the queue wait."""
+        waited = await self._acquire(llm_priority.get())
+        self.admitted += 1
+        started = time.perf_counter()
+        try:
+            yield waited
+        finally:
+            self.service_seconds += time.perf_counter() - started
+            self.completed += 1
+            self._release()
+
+    def stats(self) -> Dict:
+        """Return queue depth, wait times and admission counters."""
+        queued_by_priority = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, waiter in self._waiters:
+            if not waiter.done():
+                queued_by_priority[PRIORITY_NAMES.get(priority, str(priority))] += 1
+        return {
+            "running": self.running,
+            "queued": sum(queued_by_priority.values()),
+            "queued_by_priority": queued_by_priority,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "shed": self.shed,
+            "timed_out": self.timed_out,
+            "avg_wait_seconds": (
+                round(self.wait_seconds / self.admitted, 6) if self.admitted else 0.0
+            ),
+            "max_wait_seconds": round(self.max_wait_seconds, 6),
+            "retry_after_seconds": self.retry_after(),
+        }
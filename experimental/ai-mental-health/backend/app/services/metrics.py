@@ -0,0 +1,347 @@
+import bisect
+import math
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Latency buckets in seconds, for requests, queries and queue waits
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# LLM calls take from a fraction of a second to minutes
+LLM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+TOKEN_RATE_BUCKETS = (1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 50.0, 75.0, 100.0, 200.0)
+# Cosine similarity, finest around the usual cache thresholds
+SIMILARITY_BUCKETS = (0.5, 0.7, 0.8, 0.85, 0.9, 0.92, 0.94, 0.96, 0.98, 0.99, 1.0)
+
+# Time spent per phase ("db", "llm", ...) by the request being handled,
+# reported in its Server-Timing header. ``None`` outside of a request.
+request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def record_timing(name: str, seconds: float) -> None:
+    """Add ``seconds`` to phase ``name`` of the current request, if any."""
+    timings = request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, or is read from ``function`` when scraped.
+
+    For a labelled gauge, ``function`` returns the values keyed by tuples of
+    label values.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        function: Optional[Callable[[], Union[float, Dict[Tuple[str, ...], float]]]] = None
+    ):
+        super().__init__(name, documentation, labels)
+        self.function = function
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self) -> List[str]:
+        if self.function is not None:
+            value = self.function()
+            values = list(value.items()) if self.labels else [((), value)]
+        else:
+            with self._lock:
+                values = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: observations per bucket (the last one is +Inf), sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = [
+                (key, list(counts), total[0]) for key, (counts, total) in self._values.items()
+            ]
+        lines = []
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = _format_labels(self.labels, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide metrics, rendered in the Prometheus text format.
+
+    Metrics are kept per worker process; scrape each worker, or run a single
+    worker, to get complete numbers.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        function: Optional[Callable[[], Union[float, Dict[Tuple[str, ...], float]]]] = None
+    ) -> Gauge:
+        return self._register(Gauge(name, documentation, labels, function))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Create a singleton instance
+metrics = MetricsRegistry()
+
+http_requests = metrics.counter(
+    "http_requests_total", "HTTP requests handled.", ("method", "route", "status")
+)
+http_request_duration = metrics.histogram(
+    "http_request_duration_seconds",
+    "Time from receiving an HTTP request to sending the last byte of the response.",
+    ("method", "route")
+)
+http_requests_in_flight = metrics.gauge(
+    "http_requests_in_flight", "HTTP requests being handled.", ("method", "route")
+)
+
+db_query_duration = metrics.histogram(
+    "db_query_duration_seconds", "Database statement execution time.", ("operation",)
+)
+
+llm_requests = metrics.counter(
+    "llm_requests_total", "Requests sent to Ollama.", ("path", "backend", "status")
+)
+llm_request_duration = metrics.histogram(
+    "llm_request_duration_seconds",
+    "Time from sending a request to Ollama to reading the whole response.",
+    ("path",),
+    LLM_BUCKETS
+)
+llm_queue_wait = metrics.histogram(
+    "llm_queue_wait_seconds", "Time LLM calls waited for a scheduler slot.", ("priority",)
+)
+llm_time_to_first_token = metrics.histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from sending a streaming request to Ollama to its first chunk.",
+    ("path",),
+    LLM_BUCKETS
+)
+llm_prompt_eval_duration = metrics.histogram(
+    "llm_prompt_eval_duration_seconds",
+    "Prompt evaluation time reported by Ollama (prompt_eval_duration).",
+    ("model",),
+    LLM_BUCKETS
+)
+llm_eval_duration = metrics.histogram(
+    "llm_eval_duration_seconds",
+    "Generation time reported by Ollama (eval_duration).",
+    ("model",),
+    LLM_BUCKETS
+)
+llm_tokens_per_second = metrics.histogram(
+    "llm_tokens_per_second",
+    "Generation speed reported by Ollama (eval_count / eval_duration).",
+    ("model",),
+    TOKEN_RATE_BUCKETS
+)
+llm_prompt_tokens = metrics.counter(
+    "llm_prompt_tokens_total", "Prompt tokens evaluated by Ollama (prompt_eval_count).", ("model",)
+)
+llm_completion_tokens = metrics.counter(
+    "llm_completion_tokens_total", "Tokens generated by Ollama (eval_count).", ("model",)
+)
+
+
+semantic_cache_lookups = metrics.counter(
+    "semantic_cache_lookups_total",
+    "Semantic cache lookups by outcome (hits, misses, bypasses, skipped, errors).",
+    ("endpoint", "outcome")
+)
+semantic_cache_lookup_duration = metrics.histogram(
+    "semantic_cache_lookup_duration_seconds",
+    "Time to embed a prompt and to search the vector index.",
+    ("endpoint", "phase")
+)
+semantic_cache_similarity = metrics.histogram(
+    "semantic_cache_similarity",
+    "Similarity of the nearest cached prompt at lookup.",
+    ("endpoint",),
+    SIMILARITY_BUCKETS
+)
+
+
+def observe_ollama_timings(body: Dict) -> None:
+    """Record the timing fields of a final Ollama response (durations are in ns)."""
+    model = body.get("model", "")
+    prompt_eval_duration = body.get("prompt_eval_duration")
+    eval_count = body.get("eval_count")
+    eval_duration = body.get("eval_duration")
+    if body.get("prompt_eval_count") is not None:
+        llm_prompt_tokens.inc(body["prompt_eval_count"], model=model)
+    if prompt_eval_duration is not None:
+        llm_prompt_eval_duration.observe(prompt_eval_duration / 1e9, model=model)
+        record_timing("llm-prompt", prompt_eval_duration / 1e9)
+    if eval_count is not None:
+        llm_completion_tokens.inc(eval_count, model=model)
+    if eval_duration is not None:
+        llm_eval_duration.observe(eval_duration / 1e9, model=model)
+        record_timing("llm-eval", eval_duration / 1e9)
+        if eval_count and eval_duration > 0:
+            llm_tokens_per_second.observe(eval_count / (eval_duration / 1e9), model=model)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement run on ``engine``; pass ``sync_engine`` for async engines."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+        db_query_duration.observe(elapsed, operation=operation)
+        record_timing("db", elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # A failed statement never reaches after_cursor_execute
+        connection = context.connection
+        started = connection.info.get("query_started") if connection is not None else None
+        if started:
+            started.pop()
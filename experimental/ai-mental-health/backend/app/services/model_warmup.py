@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.ai_config import ai_settings
+from app.services.llm_backends import LLMBackend, model_name
+from app.services.llm_client import LLMClient, llm_client
+
+logger = logging.getLogger(__name__)
+
+# Seconds between warm-up attempts while a model is still cold
+RETRY_INTERVAL = 5.0
+
+
+def effective_embedding_models() -> List[str]:
+    """The embedding models this service uses: EMBEDDING_MODEL while the
+    semantic cache is enabled, then WARMUP_EMBEDDING_MODELS."""
+    models = list(ai_settings.WARMUP_EMBEDDING_MODELS)
+    if ai_settings.SEMANTIC_CACHE_ENDPOINTS:
+        models.insert(0, ai_settings.EMBEDDING_MODEL)
+    return list(dict.fromkeys(model_name(model) for model in models))
+
+
+def effective_models() -> List[str]:
+    """The one set of models this service uses: MODEL_NAME, WARMUP_MODELS, then
+    the embedding models."""
+    models = [ai_settings.MODEL_NAME, *ai_settings.WARMUP_MODELS]
+    return list(dict.fromkeys([
+        *(model_name(model) for model in models),
+        *effective_embedding_models()
+    ]))
+
+
+class ModelWarmup:
+    """Loads the service's models on every backend and keeps them resident.
+
+    At startup each model gets a one-token generation on each backend,
+    which loads it into memory, and is then kept loaded by re-sending
+    ``keep_alive`` every ``keep_warm_interval`` seconds. Models listed in
+    ``embedding_models`` cannot generate; they embed a word instead. The service is
+    ready once every model is warm on at least one backend; until then
+    cold models are retried every few seconds.
+    """
+
+    def __init__(
+        self,
+        client: LLMClient,
+        models: List[str],
+        keep_alive: str,
+        timeout: float,
+        keep_warm_interval: float,
+        enabled: bool = True,
+        embedding_models: Sequence[str] = ()
+    ):
+        self.client = client
+        self.models = models
+        self.embedding_models = set(embedding_models)
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.keep_warm_interval = keep_warm_interval
+        self.enabled = enabled
+        self.ready = not enabled
+        self.ready_after: Optional[float] = None
+        # (backend url, model) -> "warm" or the last error
+        self.state: Dict[Tuple[str, str], str] = {}
+        self.pings = 0
+        self._task: Optional[asyncio.Task] = None
+        self._started = time.perf_counter()
+
+    async def _load(self, backend: LLMBackend, model: str, generate: bool) -> None:
+        if model in self.embedding_models:
+            # Embedding one word is cheap, so it is sent every time
+            path = "/api/embeddings"
+            payload = {"model": model, "prompt": "Hello", "keep_alive": self.keep_alive}
+        else:
+            # Without a prompt Ollama only loads the model and resets its keep_alive
+            path = "/api/generate"
+            payload = {"model": model, "keep_alive": self.keep_alive, "stream": False}
+            if generate:
+                payload.update(prompt="Hello", options={"num_predict": 1})
+        try:
+            response = await self.client.post_to(backend, path, payload, timeout=self.timeout)
+            response.raise_for_status()
+        except Exception as e:
+            if self.state.get((backend.url, model)) == "warm":
+                logger.warning("Model %s is no longer warm on %s: %s", model, backend.url, e)
+            self.state[(backend.url, model)] = f"{type(e).__name__}: {e}"
+            return
+        if self.state.get((backend.url, model)) != "warm":
+            logger.info("Model %s is warm on %s", model, backend.url)
+        self.state[(backend.url, model)] = "warm"
+        backend.loaded_models.add(model)
+
+    def _warm_anywhere(self) -> bool:
+        backends = self.client.backends.backends
+        return all(
+            any(self.state.get((backend.url, model)) == "warm" for backend in backends)
+            for model in self.models
+        )
+
+    async def _load_all(self, only_cold: bool) -> None:
+        loads = [
+            self._load(backend, model, generate=self.state.get((backend.url, model)) != "warm")
+            for backend in self.client.backends.backends
+            for model in self.models
+            if not (only_cold and self.state.get((backend.url, model)) == "warm")
+        ]
+        await asyncio.gather(*loads)
+
+    async def _run(self) -> None:
+        await self._load_all(only_cold=False)
+        while not self._warm_anywhere():
+            await asyncio.sleep(RETRY_INTERVAL)
+            await self._load_all(only_cold=True)
+        self.ready = True
+        self.ready_after = time.perf_counter() - self._started
+        logger.info("Models warm after %.1f s: %s", self.ready_after, ", ".join(self.models))
+
+        if self.keep_warm_interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(self.keep_warm_interval)
+            # Only sets keep_alive on warm models, and reloads any that were unloaded
+            await self._load_all(only_cold=False)
+            self.pings += 1
+
+    def start(self) -> None:
+        """Warm the models up in the background; see ``ready``."""
+        if self.enabled and self._task is None:
+            self._started = time.perf_counter()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def stats(self) -> Dict:
+        """Return readiness and the warm-up state of each model on each backend."""
+        ready_after = self.ready_after
+        return {
+            "ready": self.ready,
+            "ready_after_seconds": round(ready_after, 3) if ready_after is not None else None,
+            "models": self.models,
+            "embedding_models": sorted(self.embedding_models),
+            "keep_alive": self.keep_alive,
+            "keep_warm_pings": self.pings,
+            "backends": {
+                backend.url: {
+                    model: self.state.get((backend.url, model), "pending") for model in self.models
+                }
+                for backend in self.client.backends.backends
+            },
+        }
+
+
+# Create a singleton instance
+model_warmup = ModelWarmup(
+    llm_client,
+    effective_models(),
+    ai_settings.OLLAMA_KEEP_ALIVE,
+    ai_settings.MODEL_WARMUP_TIMEOUT_SECONDS,
+    ai_settings.MODEL_KEEP_WARM_INTERVAL_SECONDS,
+    ai_settings.MODEL_WARMUP_ENABLED,
+    effective_embedding_models()
+)
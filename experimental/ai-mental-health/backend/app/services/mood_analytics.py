@@ -0,0 +1,283 @@
+import asyncio
+import math
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.mood import MoodEntry
+from app.models.user import User
+
+# Score per mood label; numeric labels ("-2" ... "2") are used as they are.
+# Labels with no score are left out of the metrics.
+MOOD_SCORES: Dict[str, float] = {
+    "very_happy": 2.0, "excited": 2.0, "great": 2.0,
+    "happy": 1.0, "good": 1.0, "calm": 1.0, "content": 1.0, "grateful": 1.0,
+    "neutral": 0.0, "okay": 0.0, "ok": 0.0, "tired": -0.5,
+    "sad": -1.0, "anxious": -1.0, "stressed": -1.0, "angry": -1.0,
+    "lonely": -1.0, "worried": -1.0,
+    "very_sad": -2.0, "depressed": -2.0, "hopeless": -2.0, "overwhelmed": -2.0,
+}
+
+EPOCH = date(1970, 1, 1)
+# User x day grids up to this many cells are aggregated without sorting
+DENSE_GRID_CELLS = 1 << 22
+
+
+def mood_score(mood: Optional[str]) -> float:
+    if mood is None:
+        return math.nan
+    label = mood.strip().lower().replace(" ", "_")
+    if label in MOOD_SCORES:
+        return MOOD_SCORES[label]
+    try:
+        return float(label)
+    except ValueError:
+        return math.nan
+
+
+def score_moods(moods: Sequence[str]) -> np.ndarray:
+    """Map mood labels to scores, scoring each distinct label only once."""
+    table = {label: mood_score(label) for label in set(moods)}
+    return np.fromiter(map(table.__getitem__, moods), dtype=np.float64, count=len(moods))
+
+
+def _means(groups: np.ndarray, values: np.ndarray, size: int) -> np.ndarray:
+    counts = np.bincount(groups, minlength=size)
+    sums = np.bincount(groups, weights=values, minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def _clean(value) -> Optional[float]:
+    value = float(value)
+    return None if math.isnan(value) else round(value, 4)
+
+
+def compute_trends(
+    user_ids: np.ndarray,
+    days: np.ndarray,
+    scores: np.ndarray,
+    end_day: int,
+    span: int,
+    window: int = 7,
+    streak_threshold: int = 3,
+    limit: Optional[int] = None
+) -> Dict:
+    """Per-user and cohort mood metrics from columnar mood data.
+
+    ``user_ids``, ``days`` (days since 1970-01-01) and ``scores`` hold one
+    element per entry, in any order; entries with a NaN score are ignored.
+    Entries are first averaged per user and day. Over the ``span`` days
+    ending at ``end_day`` this computes, per user and for the cohort, the
+    mean, the rolling average over the last ``window`` days, the volatility
+    (standard deviation of daily means), the change between the last two
+    weeks, and streaks of consecutive days with a negative daily mean.
+    Users are listed longest current negative streak first, at most
+    ``limit`` of them; the cohort metrics always cover everyone.
+    """
+    start_day = end_day - span + 1
+    valid = ~np.isnan(scores) & (days >= start_day) & (days <= end_day)
+    user_ids, days, scores = user_ids[valid], days[valid], scores[valid]
+    if not scores.size:
+        return {"users": [], "cohort": {"users": 0, "entries": 0, "daily": []}}
+
+    # Average entries per (user, day). Cells of the user x day grid are
+    # counted directly when the grid is small enough, and found by sorting
+    # otherwise; either way they come out ordered by user, then day.
+    first_user = int(user_ids.min())
+    cell = (user_ids - first_user) * span + (days - start_day)
+    if (int(user_ids.max()) - first_user + 1) * span <= max(4 * cell.size, DENSE_GRID_CELLS):
+        grid_count = np.bincount(cell)
+        cells = np.flatnonzero(grid_count)
+        daily_count = grid_count[cells]
+        daily_sum = np.bincount(cell, weights=scores)[cells]
+    else:
+        cells, cell_index = np.unique(cell, return_inverse=True)
+        daily_count = np.bincount(cell_index)
+        daily_sum = np.bincount(cell_index, weights=scores)
+    daily_mean = daily_sum / daily_count
+    daily_user = cells // span + first_user
+    daily_day = cells % span + start_day
+
+    # Per-user aggregates over the daily means
+    user_start = np.empty(daily_user.size, dtype=bool)
+    user_start[0] = True
+    user_start[1:] = daily_user[1:] != daily_user[:-1]
+    user_index = np.cumsum(user_start) - 1
+    users = daily_user[user_start]
+    user_count = users.size
+
+    entries = np.bincount(user_index, weights=daily_count, minlength=user_count)
+    days_logged = np.bincount(user_index, minlength=user_count)
+    mean = np.bincount(user_index, weights=daily_sum, minlength=user_count) / entries
+    daily_average = np.bincount(user_index, weights=daily_mean, minlength=user_count) / days_logged
+    squares = np.bincount(user_index, weights=daily_mean ** 2, minlength=user_count) / days_logged
+    volatility = np.sqrt(np.maximum(squares - daily_average ** 2, 0.0))
+
+    recent = daily_day > end_day - window
+    rolling = _means(user_index[recent], daily_mean[recent], user_count)
+    this_week = daily_day > end_day - 7
+    last_week = (daily_day > end_day - 14) & ~this_week
+    week_over_week = (
+        _means(user_index[this_week], daily_mean[this_week], user_count)
+        - _means(user_index[last_week], daily_mean[last_week], user_count)
+    )
+
+    # Runs of consecutive calendar days with a negative daily mean
+    negative = daily_mean < 0
+    continues = np.zeros(daily_user.size, dtype=bool)
+    continues[1:] = negative[:-1] & ~user_start[1:] & (daily_day[1:] == daily_day[:-1] + 1)
+    run_start = negative & ~continues
+    run_id = np.cumsum(run_start) - 1
+    run_length = np.bincount(run_id[negative], minlength=int(run_start.sum()))
+    longest_streak = np.zeros(user_count, dtype=np.int64)
+    np.maximum.at(longest_streak, user_index[run_start], run_length)
+    # A streak is current if it runs through the user's last logged day,
+    # and that day is today or yesterday; run id -1 picks the padding 0
+    last_daily = np.flatnonzero(np.append(user_start[1:], True))
+    current_streak = np.where(
+        negative[last_daily] & (daily_day[last_daily] >= end_day - 1),
+        np.append(run_length, 0)[run_id[last_daily]],
+        0
+    )
+
+    # Cohort series: mean of the users' daily means for each day
+    offsets = (daily_day - start_day).astype(np.int64)
+    cohort_daily = _means(offsets, daily_mean, span)
+    present = ~np.isnan(cohort_daily)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(present, cohort_daily, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(present)))
+    lower = np.maximum(np.arange(1, span + 1) - window, 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cohort_rolling = (sums[1:] - sums[lower]) / (counts[1:] - counts[lower])
+    cohort_this_week = cohort_daily[-7:]
+    cohort_last_week = cohort_daily[-14:-7]
+
+    def nanmean(values):
+        return np.nanmean(values) if np.any(~np.isnan(values)) else np.nan
+
+    cohort = {
+        "users": int(user_count),
+        "entries": int(entries.sum()),
+        "mean": _clean(scores.mean()),
+        "volatility": _clean(np.nanstd(cohort_daily)) if present.any() else None,
+        "week_over_week": _clean(nanmean(cohort_this_week) - nanmean(cohort_last_week)),
+        "users_in_negative_streak": int((current_streak >= streak_threshold).sum()),
+        "daily": [
+            {
+                "date": (EPOCH + timedelta(days=int(start_day + offset))).isoformat(),
+                "mean": _clean(cohort_daily[offset]),
+                "rolling_average": _clean(cohort_rolling[offset]),
+            }
+            for offset in np.flatnonzero(present).tolist()
+        ],
+    }
+    # Only the listed users are turned into Python objects
+    listed = np.lexsort((-longest_streak, -current_streak))[:limit]
+    per_user = [
+        {
+            "user_id": int(user),
+            "entries": int(entry_count),
+            "days_logged": int(logged),
+            "mean": _clean(user_mean),
+            "rolling_average": _clean(user_rolling),
+            "volatility": _clean(user_volatility),
+            "week_over_week": _clean(change),
+            "longest_negative_streak": int(longest),
+            "current_negative_streak": int(current),
+        }
+        for (
+            user, entry_count, logged, user_mean, user_rolling, user_volatility, change, longest,
+            current,
+        )
+        in zip(*(
+            column[listed].tolist()
+            for column in (
+                users, entries, days_logged, mean, rolling, volatility,
+                week_over_week, longest_streak, current_streak
+            )
+        ))
+    ]
+    return {"users": per_user, "cohort": cohort}
+
+
+class MoodAnalytics:
+    """Mood trends for one user or a cohort, computed with NumPy."""
+
+    async def load(
+        self,
+        db: AsyncSession,
+        start: date,
+        end: date,
+        user_ids: Optional[List[int]] = None,
+        is_minor: Optional[bool] = None,
+        language: Optional[str] = None
+    ):
+        """Fetch matching entries as columns: user ids, timestamps and moods."""
+        statement = select(MoodEntry.user_id, MoodEntry.timestamp, MoodEntry.mood).where(
+            MoodEntry.timestamp >= datetime.combine(start, time.min),
+            MoodEntry.timestamp < datetime.combine(end + timedelta(days=1), time.min)
+        )
+        if user_ids:
+            statement = statement.where(MoodEntry.user_id.in_(user_ids))
+        if is_minor is not None or language is not None:
+            statement = statement.join(User, User.id == MoodEntry.user_id)
+            if is_minor is not None:
+                statement = statement.where(User.is_minor == is_minor)
+            if language is not None:
+                statement = statement.where(User.preferred_language == language)
+        result = await db.execute(statement)
+        rows = result.all()
+        if not rows:
+            return [], [], []
+        return tuple(map(list, zip(*rows)))
+
+    @staticmethod
+    def _compute(
+        columns,
+        end: date,
+        span: int,
+        window: int,
+        streak_threshold: int,
+        limit: Optional[int]
+    ) -> Dict:
+        user_ids, timestamps, moods = columns
+        return compute_trends(
+            np.asarray(user_ids, dtype=np.int64),
+            np.array(timestamps, dtype="datetime64[D]").astype(np.int64),
+            score_moods(moods),
+            (end - EPOCH).days,
+            span,
+            window,
+            streak_threshold,
+            limit
+        )
+
+    async def trends(
+        self,
+        db: AsyncSession,
+        days: int,
+        window: int = 7,
+        streak_threshold: int = 3,
+        limit: Optional[int] = None,
+        end: Optional[date] = None,
+        **filters
+    ) -> Dict:
+        """Trends over the ``days`` days ending ``end`` (default today, UTC)."""
+        end = end or datetime.utcnow().date()
+        start = end - timedelta(days=days - 1)
+        columns = await self.load(db, start, end, **filters)
+        # The NumPy work is CPU-bound; keep it off the event loop
+        result = await asyncio.to_thread(
+            self._compute, columns, end, days, window, streak_threshold, limit
+        )
+        result["start"] = start.isoformat()
+        result["end"] = end.isoformat()
+        return result
+
+
+# Create a singleton instance
+mood_analytics = MoodAnalytics()
@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from app.core.config import settings
+from app.db.base import AsyncSessionLocal
+from app.models.mood import MoodEntry, MoodRollup
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_PERIODS = ("day", "week")
+# Rows per rollup upsert statement, well below SQLite's bound parameter limit
+UPSERT_CHUNK = 500
+# Failures that say nothing about the rows themselves (database locked or
+# unreachable); entries failing with these are always kept for a retry
+TRANSIENT_ERRORS = (OperationalError, InterfaceError, OSError)
+
+
+def period_start(timestamp: datetime, period: str) -> date:
+    """First day of the day or week (starting Monday) containing ``timestamp``."""
+    day = timestamp.date()
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def _utc(timestamp: datetime) -> datetime:
+    # Stored timestamps are naive UTC
+    if timestamp.tzinfo is not None:
+        return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+class MoodWriteBuffer:
+    """Write-behind buffer for mood entries.
+
+    ``add`` only appends to memory. A background task commits the buffer in
+    one transaction every ``flush_interval`` seconds, or as soon as
+    ``batch_size`` entries are waiting: the entries are bulk-inserted and the
+    daily and weekly rollups are incremented with one upsert per chunk. When
+    ``max_buffered`` entries are pending, ``add`` waits for a flush, so a
+    slow database slows writers down instead of growing memory. Entries not
+    yet flushed are lost if the process dies; shutdown flushes them.
+
+    A failed batch is kept and retried. After ``max_attempts`` failures in a
+    row the batch is written in halves, recursively, so a row that cannot be
+    written (a "poison" row) is isolated, logged and dropped instead of
+    blocking every later entry.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        flush_interval: float,
+        max_buffered: int,
+        max_attempts: int = 3
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.max_attempts = max_attempts
+        self._pending: List[Dict] = []
+        self._lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.flushed_entries = 0
+        self.failed_flushes = 0
+        self.dropped_entries = 0
+        self.last_flush_seconds = 0.0
+        # Consecutive failed flushes
+        self._failures = 0
+
+    async def start(self) -> None:
+        """Start the background flusher. Safe to call more than once."""
+        if self._task is not None:
+            return
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the flusher and write whatever is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Mood flush failed; entries kept for the next attempt")
+
+    async def add(
+        self,
+        user_id: int,
+        mood: str,
+        timestamp: datetime,
+        notes: Optional[str] = None
+    ) -> None:
+        """Queue one mood entry for the next batch."""
+        if self._task is None:
+            await self.start()
+        if len(self._pending) >= self.max_buffered:
+            await self.flush()
+        self._pending.append({
+            "user_id": user_id,
+            "mood": mood,
+            "timestamp": _utc(timestamp),
+            "notes": notes,
+        })
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def _rollup_rows(self, entries: List[Dict]) -> List[Dict]:
+        counts = Counter(
+            (entry["user_id"], period, period_start(entry["timestamp"], period), entry["mood"])
+            for entry in entries
+            for period in ROLLUP_PERIODS
+        )
+        return [
+            {
+                "user_id": user_id,
+                "period": period,
+                "period_start": start,
+                "mood": mood,
+                "count": count,
+            }
+            for (user_id, period, start, mood), count in counts.items()
+        ]
+
+    def _upsert(self, dialect: str, rows: List[Dict]):
+        module = postgresql if dialect == "postgresql" else sqlite
+        statement = module.insert(MoodRollup).values(rows)
+        return statement.on_conflict_do_update(
+            index_elements=["user_id", "period", "period_start", "mood"],
+            set_={"count": MoodRollup.count + statement.excluded["count"]}
+        )
+
+    async def _write(self, entries: List[Dict]) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(MoodEntry), entries)
+            rows = self._rollup_rows(entries)
+            dialect = db.bind.dialect.name
+            for offset in range(0, len(rows), UPSERT_CHUNK):
+                await db.execute(self._upsert(dialect, rows[offset:offset + UPSERT_CHUNK]))
+            await db.commit()
+
+    async def _write_isolating(self, entries: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Write ``entries``, halving the batch around rows that fail.
+
+        Returns the entries to retry later and the entries dropped.
+        """
+        try:
+            await self._write(entries)
+            return [], []
+        except TRANSIENT_ERRORS:
+            return entries, []
+        except Exception:
+            if len(entries) == 1:
+                logger.exception("Dropping mood entry that cannot be written")
+                return [], entries
+        middle = len(entries) // 2
+        retry_first, dropped_first = await self._write_isolating(entries[:middle])
+        retry_second, dropped_second = await self._write_isolating(entries[middle:])
+        return retry_first + retry_second, dropped_first + dropped_second
+
+    async def flush(self) -> int:
+        """Write all buffered entries now; returns how many were written."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            entries, self._pending = self._pending, []
+            if not entries:
+                return 0
+            started = time.perf_counter()
+            if self._failures < self.max_attempts:
+                try:
+                    await self._write(entries)
+                except Exception:
+                    self._failures += 1
+                    self.failed_flushes += 1
+                    # Keep the entries, ahead of anything added meanwhile
+                    self._pending[:0] = entries
+                    raise
+                retry, dropped = [], []
+            else:
+                retry, dropped = await self._write_isolating(entries)
+                if dropped:
+                    self.dropped_entries += len(dropped)
+                    logger.error(
+                        "Dropped %d mood entries after %d failed flushes (user ids %s)",
+                        len(dropped),
+                        self._failures,
+                        sorted({entry["user_id"] for entry in dropped})
+                    )
+                if retry:
+                    self.failed_flushes += 1
+                    self._pending[:0] = retry
+                    logger.warning(
+                        "Mood flush failed; %d entries kept for the next attempt", len(retry)
+                    )
+            if not retry:
+                self._failures = 0
+            written = len(entries) - len(retry) - len(dropped)
+            if written:
+                self.flushes += 1
+                self.flushed_entries += written
+                self.last_flush_seconds = time.perf_counter() - started
+            return written
+
+    def stats(self) -> Dict:
+        """Return buffer depth and flush counters."""
+        return {
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "flushed_entries": self.flushed_entries,
+            "failed_flushes": self.failed_flushes,
+            "dropped_entries": self.dropped_entries,
+            "last_flush_seconds": round(self.last_flush_seconds, 6),
+            "batch_size": self.batch_size,
+            "flush_interval_seconds": self.flush_interval,
+        }
+
+
+# Create a singleton instance
+mood_buffer = MoodWriteBuffer(
+    settings.MOOD_BATCH_SIZE,
+    settings.MOOD_FLUSH_INTERVAL_SECONDS,
+    settings.MOOD_MAX_BUFFERED,
+    settings.MOOD_FLUSH_MAX_ATTEMPTS
+)
@@ -0,0 +1,148 @@
+import asyncio
+import math
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_and_update_password
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many password operations are already waiting."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Too many sign-in attempts in progress")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """Runs bcrypt off the event loop.
+
+    Hashing and verification go to a dedicated thread or process pool of
+    ``workers`` workers, so a burst of logins cannot stall chats and other
+    requests. At most ``max_queue`` operations wait for a worker; beyond that
+    callers get ``PasswordHasherBusy``. The ``inline`` mode runs bcrypt on
+    the calling thread, as the handlers used to.
+    """
+
+    def __init__(self, mode: str, workers: int, max_queue: int):
+        if mode not in ("inline", "thread", "process"):
+            raise ValueError(f"Unknown password hash executor: {mode!r}")
+        self.mode = mode
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.running = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.work_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="password-hasher"
+                )
+        return self._executor
+
+    async def close(self) -> None:
+        """Let queued and running operations finish, then shut down the worker pool."""
+        slots = self._slots
+        if slots is not None:
+            # Waiters are served in order, so once close() holds every slot
+            # all operations queued before it have completed
+            for _ in range(self.workers):
+                await slots.acquire()
+        try:
+            if self._executor is not None:
+                await asyncio.to_thread(self._executor.shutdown)
+            self._executor = None
+        finally:
+            # Later callers still get a slot and lazily start a new pool
+            if slots is not None:
+                for _ in range(self.workers):
+                    slots.release()
+
+    def retry_after(self) -> int:
+        average = self.work_seconds / self.completed if self.completed else 0.3
+        return max(1, math.ceil(average * (self.queued + 1) / self.workers))
+
+    async def _run(self, function, *args):
+        if self.mode == "inline":
+            started = time.perf_counter()
+            result = function(*args)
+            self.work_seconds += time.perf_counter() - started
+            self.completed += 1
+            return result
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        if self._slots.locked() and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise PasswordHasherBusy(self.retry_after())
+
+        self.queued += 1
+        started = time.perf_counter()
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        waited = time.perf_counter() - started
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+        self.running += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), function, *args)
+        finally:
+            self.work_seconds += time.perf_counter() - started
+            self.completed += 1
+            self.running -= 1
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with the configured bcrypt cost."""
+        return await self._run(get_password_hash, password)
+
+    async def verify_and_update(
+        self,
+        password: str,
+        hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Verify a password; also return a new hash if the stored one uses an outdated cost."""
+        return await self._run(verify_and_update_password, password, hashed_password)
+
+    def stats(self) -> Dict:
+        """Return worker pool and queue statistics."""
+        completed = self.completed
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "running": self.running,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_seconds": round(self.wait_seconds / completed, 6) if completed else 0.0,
+            "max_wait_seconds": round(self.max_wait_seconds, 6),
+            "avg_work_seconds": round(self.work_seconds / completed, 6) if completed else 0.0,
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+        }
+
+
+# Create a singleton instance
+password_hasher = PasswordHasher(
+    settings.PASSWORD_HASH_EXECUTOR,
+    settings.PASSWORD_HASH_WORKERS,
+    settings.PASSWORD_HASH_MAX_QUEUE
+)
@@ -0,0 +1,375 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.ai_config import ai_settings
+from app.services.llm_client import LLMClient, llm_client, payload_key
+from app.services.metrics import (
+    record_timing,
+    semantic_cache_lookup_duration,
+    semantic_cache_lookups,
+    semantic_cache_similarity,
+)
+
+# Rows scored at once in int8 mode, bounding the float copy made per search
+INT8_BLOCK = 4096
+# IVF: k-means iterations, and training points per list
+IVF_ITERATIONS = 10
+IVF_SAMPLE_PER_LIST = 32
+
+
+def normalize(vector: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class VectorIndex:
+    """Cosine-similarity search over a fixed number of slots, in NumPy.
+
+    Vectors are normalized on insert, so similarity is a dot product. Each
+    vector belongs to a namespace and a search only considers its own.
+    Modes:
+
+    - ``flat``: float32 vectors, exact brute-force search.
+    - ``int8``: vectors quantized to int8 with a per-vector scale, a quarter
+      of the memory for slightly approximate scores.
+    - ``ivf``: float32 vectors split into ``ivf_lists`` k-means clusters; a
+      search only scores the vectors in the ``ivf_probes`` clusters nearest
+      the query. Until there are enough vectors to train the clusters, and
+      between retrainings, it behaves like ``flat``. Clusters are retrained
+      each time the index doubles in size.
+
+    Not thread-safe; callers serialize access.
+    """
+
+    def __init__(self, capacity: int, mode: str = "flat", ivf_lists: int = 64, ivf_probes: int = 4):
+        if mode not in ("flat", "int8", "ivf"):
+            raise ValueError(f"Unknown vector index mode: {mode}")
+        self.capacity = capacity
+        self.mode = mode
+        self.ivf_lists = ivf_lists
+        self.ivf_probes = ivf_probes
+        self.dim: Optional[int] = None
+        self._active = np.zeros(capacity, dtype=bool)
+        self._namespaces = np.full(capacity, -1, dtype=np.int64)
+        self._free = list(range(capacity - 1, -1, -1))
+        self._vectors: Optional[np.ndarray] = None
+        self._codes: Optional[np.ndarray] = None
+        self._scales = np.zeros(capacity, dtype=np.float32)
+        self._lists = np.full(capacity, -1, dtype=np.int32)
+        self._centroids: Optional[np.ndarray] = None
+        self._trained_size = 0
+        self._rng = np.random.default_rng(0)
+
+    def __len__(self) -> int:
+        return self.capacity - len(self._free)
+
+    def _allocate(self, dim: int) -> None:
+        self.dim = dim
+        if self.mode == "int8":
+            self._codes = np.zeros((self.capacity, dim), dtype=np.int8)
+        else:
+            self._vectors = np.zeros((self.capacity, dim), dtype=np.float32)
+
+    def add(self, vector: np.ndarray, namespace: int) -> int:
+        """Store ``vector`` and return its slot. The index must not be full."""
+        if self.dim is None:
+            self._allocate(len(vector))
+        if len(vector) != self.dim:
+            raise ValueError(f"Expected a {self.dim}-dimensional vector, got {len(vector)}")
+        if not self._free:
+            raise ValueError("Vector index is full")
+        vector = normalize(np.asarray(vector, dtype=np.float32))
+        slot = self._free.pop()
+        if self.mode == "int8":
+            scale = float(np.abs(vector).max()) or 1.0
+            self._codes[slot] = np.round(vector / scale * 127).astype(np.int8)
+            self._scales[slot] = scale / 127
+        else:
+            self._vectors[slot] = vector
+        self._active[slot] = True
+        self._namespaces[slot] = namespace
+
+        if self.mode == "ivf":
+            if self._centroids is not None:
+                self._lists[slot] = int(np.argmax(self._centroids @ vector))
+            if len(self) >= max(self.ivf_lists * 8, 2 * self._trained_size):
+                self._train()
+        return slot
+
+    def remove(self, slot: int) -> None:
+        if self._active[slot]:
+            self._active[slot] = False
+            self._namespaces[slot] = -1
+            self._lists[slot] = -1
+            self._free.append(slot)
+
+    def _train(self) -> None:
+        active = np.flatnonzero(self._active)
+        sample_size = min(len(active), self.ivf_lists * IVF_SAMPLE_PER_LIST)
+        sample = self._vectors[self._rng.choice(active, sample_size, replace=False)]
+        centroids = sample[self._rng.choice(sample_size, self.ivf_lists, replace=False)]
+        # Spherical k-means: assign by dot product, re-normalize the means
+        for _ in range(IVF_ITERATIONS):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(self.ivf_lists):
+                members = sample[assignments == cluster]
+                if len(members):
+                    centroids[cluster] = normalize(members.mean(axis=0))
+        self._centroids = centroids
+        self._lists[active] = np.argmax(self._vectors[active] @ centroids.T, axis=1)
+        self._trained_size = len(active)
+
+    def _candidates(self, vector: np.ndarray, namespace: int) -> np.ndarray:
+        mask = self._namespaces == namespace
+        if self.mode == "ivf" and self._centroids is not None:
+            probes = np.argsort(self._centroids @ vector)[-self.ivf_probes:]
+            mask &= np.isin(self._lists, probes)
+        return np.flatnonzero(mask)
+
+    def _scores(self, slots: np.ndarray, vector: np.ndarray) -> np.ndarray:
+        if self.mode != "int8":
+            return self._vectors[slots] @ vector
+        scores = np.empty(len(slots), dtype=np.float32)
+        for start in range(0, len(slots), INT8_BLOCK):
+            block = slots[start:start + INT8_BLOCK]
+            scores[start:start + INT8_BLOCK] = (self._codes[block] @ vector) * self._scales[block]
+        return scores
+
+    def search(self, vector: np.ndarray, namespace: int) -> Optional[Tuple[int, float]]:
+        """Return the slot most similar to ``vector`` and its cosine similarity."""
+        if self.dim is None or len(vector) != self.dim:
+            return None
+        vector = normalize(np.asarray(vector, dtype=np.float32))
+        slots = self._candidates(vector, namespace)
+        if not len(slots):
+            return None
+        scores = self._scores(slots, vector)
+        best = int(np.argmax(scores))
+        return int(slots[best]), float(scores[best])
+
+    def stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "vectors": len(self),
+            "capacity": self.capacity,
+            "dimensions": self.dim,
+            "ivf_trained": self._centroids is not None,
+        }
+
+
+class SemanticCache:
+    """Cache of LLM completions matched on the meaning of the prompt.
+
+    The exact-match completion cache misses paraphrases ("I feel so stressed
+    about exams" / "exams are stressing me out"). Here the caller's text is
+    embedded through Ollama and the completion of the most similar earlier
+    text is returned when the cosine similarity reaches the endpoint's
+    threshold. Only completions from identical requests apart from that
+    text (same model, system prompt, options and ``scope``) can match.
+    Entries expire after ``ttl`` seconds; when the index is full the least
+    recently used entry is evicted. Opt-in per endpoint through
+    ``SEMANTIC_CACHE_ENDPOINTS``.
+
+    Embedding calls bypass the LLM scheduler, so they never hold a slot a
+    generation is waiting for; instead at most ``max_embeddings`` run at
+    once, and lookups beyond that skip the cache rather than wait.
+    """
+
+    def __init__(
+        self,
+        client: LLMClient,
+        index: VectorIndex,
+        embedding_model: str,
+        ttl: float,
+        endpoints,
+        thresholds: Dict[str, float],
+        default_threshold: float,
+        max_embeddings: int = 4
+    ):
+        self.client = client
+        self.index = index
+        self.embedding_model = embedding_model
+        self.ttl = ttl
+        self.endpoints = set(endpoints)
+        self.thresholds = thresholds
+        self.default_threshold = default_threshold
+        self.max_embeddings = max_embeddings
+        self.embedding = 0
+        # Index operations run in a thread; numpy releases the GIL while scoring
+        self._lock = threading.Lock()
+        # slot -> (expires_at, completion), least recently used first
+        self._entries: "OrderedDict[int, Tuple[float, str]]" = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def enabled_for(self, endpoint: Optional[str]) -> bool:
+        return endpoint in self.endpoints
+
+    def threshold(self, endpoint: str) -> float:
+        return self.thresholds.get(endpoint, self.default_threshold)
+
+    def namespace(self, endpoint: str, payload: Dict, scope: str = "") -> int:
+        """Number shared by requests whose completions may stand in for each other.
+
+        The first 60 bits of the request's hash, so no table of namespaces
+        grows with the number of distinct requests.
+        """
+        request = {key: value for key, value in payload.items() if key not in ("prompt", "stream")}
+        key = payload_key({"endpoint": endpoint, "request": request, "scope": scope})
+        return int(key[:15], 16)
+
+    def _count(self, endpoint: str, outcome: str) -> None:
+        stats = self._stats.setdefault(
+            endpoint, {"hits": 0, "misses": 0, "bypasses": 0, "skipped": 0, "errors": 0}
+        )
+        stats[outcome] += 1
+        semantic_cache_lookups.inc(endpoint=endpoint, outcome=outcome)
+
+    async def embed(self, text: str) -> np.ndarray:
+        response = await self.client.post(
+            "/api/embeddings",
+            json={
+                "model": self.embedding_model,
+                "prompt": text,
+                "keep_alive": ai_settings.OLLAMA_KEEP_ALIVE
+            },
+            scheduled=False
+        )
+        response.raise_for_status()
+        return np.asarray(response.json()["embedding"], dtype=np.float32)
+
+    def _lookup(
+        self,
+        vector: np.ndarray,
+        namespace: int,
+        threshold: float
+    ) -> Tuple[Optional[str], Optional[float]]:
+        with self._lock:
+            match = self.index.search(vector, namespace)
+            if match is None:
+                return None, None
+            slot, similarity = match
+            expires_at, completion = self._entries[slot]
+            if expires_at < time.time():
+                del self._entries[slot]
+                self.index.remove(slot)
+                return None, similarity
+            if similarity < threshold:
+                return None, similarity
+            self._entries.move_to_end(slot)
+            return completion, similarity
+
+    def _store(self, vector: np.ndarray, namespace: int, completion: str) -> None:
+        with self._lock:
+            now = time.time()
+            while self._entries and (
+                len(self.index) >= self.index.capacity
+                or next(iter(self._entries.values()))[0] < now
+            ):
+                slot, _ = self._entries.popitem(last=False)
+                self.index.remove(slot)
+            slot = self.index.add(vector, namespace)
+            self._entries[slot] = (now + self.ttl, completion)
+
+    async def get(
+        self,
+        endpoint: str,
+        payload: Dict,
+        text: str,
+        scope: str = "",
+        bypass: bool = False
+    ) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """Return the cached completion for ``text``, or ``None``, and its embedding.
+
+        Pass the embedding on to ``set`` so a miss is embedded only once. A
+        failed or skipped embedding yields no completion and no embedding.
+        """
+        if bypass:
+            self._count(endpoint, "bypasses")
+            return None, None
+        if self.embedding >= self.max_embeddings:
+            self._count(endpoint, "skipped")
+            return None, None
+        started = time.perf_counter()
+        self.embedding += 1
+        try:
+            vector = await self.embed(text)
+        except Exception:
+            self._count(endpoint, "errors")
+            return None, None
+        finally:
+            self.embedding -= 1
+        embedded = time.perf_counter()
+        completion, similarity = await asyncio.to_thread(
+            self._lookup, vector, self.namespace(endpoint, payload, scope), self.threshold(endpoint)
+        )
+        searched = time.perf_counter()
+        semantic_cache_lookup_duration.observe(embedded - started, endpoint=endpoint, phase="embed")
+        semantic_cache_lookup_duration.observe(
+            searched - embedded, endpoint=endpoint, phase="search"
+        )
+        record_timing("semantic-cache", searched - started)
+        if similarity is not None:
+            semantic_cache_similarity.observe(similarity, endpoint=endpoint)
+        self._count(endpoint, "misses" if completion is None else "hits")
+        return completion, vector
+
+    async def set(
+        self,
+        endpoint: str,
+        payload: Dict,
+        vector: Optional[np.ndarray],
+        completion: str,
+        scope: str = ""
+    ) -> None:
+        if vector is None:
+            return
+        namespace = self.namespace(endpoint, payload, scope)
+        await asyncio.to_thread(self._store, vector, namespace, completion)
+
+    def clear(self) -> None:
+        with self._lock:
+            for slot in self._entries:
+                self.index.remove(slot)
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Return hit/miss counts and thresholds per endpoint, and the index size."""
+        endpoints = {}
+        for endpoint, stats in self._stats.items():
+            lookups = stats["hits"] + stats["misses"]
+            endpoints[endpoint] = dict(
+                stats,
+                threshold=self.threshold(endpoint),
+                hit_rate=round(stats["hits"] / lookups, 4) if lookups else 0.0
+            )
+        return {
+            "embedding_model": self.embedding_model,
+            "embeddings_in_flight": self.embedding,
+            "max_embeddings": self.max_embeddings,
+            "entries": len(self._entries),
+            "index": self.index.stats(),
+            "endpoints": endpoints,
+        }
+
+
+# Create a singleton instance
+semantic_cache = SemanticCache(
+    llm_client,
+    VectorIndex(
+        ai_settings.SEMANTIC_CACHE_MAX_ENTRIES,
+        ai_settings.SEMANTIC_CACHE_INDEX,
+        ai_settings.SEMANTIC_CACHE_IVF_LISTS,
+        ai_settings.SEMANTIC_CACHE_IVF_PROBES
+    ),
+    ai_settings.EMBEDDING_MODEL,
+    ai_settings.SEMANTIC_CACHE_TTL_SECONDS,
+    ai_settings.SEMANTIC_CACHE_ENDPOINTS,
+    ai_settings.SEMANTIC_CACHE_THRESHOLDS,
+    ai_settings.SEMANTIC_CACHE_DEFAULT_THRESHOLD,
+    ai_settings.SEMANTIC_CACHE_MAX_EMBEDDINGS
+)
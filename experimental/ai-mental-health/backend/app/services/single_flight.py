@@ -0,0 +1,62 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce identical in-flight calls into one.
+
+    The first caller for a key starts the call as a task; callers arriving
+    while it runs await the same task instead of starting their own. Each
+    waiter awaits through ``asyncio.shield``, so a waiter that is cancelled
+    (e.g. its client disconnected) leaves without cancelling the shared call.
+    Only when the last waiter leaves is the call itself cancelled.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key: str, function: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``function()`` unless a call for ``key`` is already in flight."""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.create_task(function()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                # Nobody is left waiting for this result
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def stats(self) -> Dict:
+        """Return coalescing counters."""
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
+
+
+# Create a singleton instance shared by all LLM callers
+llm_single_flight = SingleFlight()
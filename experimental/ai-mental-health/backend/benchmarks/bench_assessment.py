@@ -0,0 +1,100 @@
+"""Benchmark keyword assessment scoring throughput.
+
+Compares the original per-answer nested keyword loops with the engine's
+vectorized batch counting. Run from the backend directory:
+
+    python -m benchmarks.bench_assessment --sets 10000
+
+Prints one JSON object with response sets per second for each path.
+"""
+import argparse
+import json
+import random
+import time
+
+from app.services.assessment import ASSESSMENT_LEXICONS, assessment_engine
+
+# Answers are assembled from random fragments so batches hold mostly
+# distinct text, as in a real screening
+FRAGMENTS = [
+    "I have been feeling very stressed and overwhelmed",
+    "there is a lot of pressure at school and at home",
+    "I have trouble sleeping because I worry a lot",
+    "most days I feel sad and tired",
+    "sometimes everything seems hopeless",
+    "lately I feel good, calm and content",
+    "I enjoy reading, hiking and spending time with friends",
+    "not really, I feel pretty balanced",
+    "I get nervous before exams",
+    "my teachers have been supportive",
+    "I play basketball twice a week",
+    "my sister and I argue sometimes",
+    "weekends are usually fine",
+]
+
+
+def legacy_counts(user_responses):
+    """The original nested-loop keyword counting from /assess."""
+    counts = {category: 0 for category in ASSESSMENT_LEXICONS}
+    all_text = ''
+    for response in user_responses:
+        answer = response.get('answer', '').lower()
+        all_text += answer + ' '
+        for category, words in ASSESSMENT_LEXICONS.items():
+            for word in words:
+                if word in answer:
+                    counts[category] += 1
+    return counts
+
+
+def make_sets(count, answers_per_set, seed):
+    rng = random.Random(seed)
+
+    def answer():
+        fragments = rng.sample(FRAGMENTS, rng.randint(1, 3))
+        return ", ".join(fragments) + rng.choice([".", "!", "..."]) + f" ({rng.randint(0, 10**6)})"
+
+    return [
+        [{"question": f"q{index}", "answer": answer()} for index in range(answers_per_set)]
+        for _ in range(count)
+    ]
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sets", type=int, default=10000)
+    parser.add_argument("--answers", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    response_sets = make_sets(args.sets, args.answers, args.seed)
+
+    legacy, legacy_seconds = timed(
+        lambda: [legacy_counts(responses) for responses in response_sets]
+    )
+    counts, count_seconds = timed(assessment_engine.count_batch, response_sets)
+    batch, batch_seconds = timed(assessment_engine.score_batch, response_sets)
+
+    # The engine must agree with the original counting
+    for engine_counts, legacy_result in zip(counts, legacy):
+        assert dict(zip(assessment_engine.categories, engine_counts)) == legacy_result
+    assert batch[0] == assessment_engine.score(response_sets[0])
+
+    print(json.dumps({
+        "sets": args.sets,
+        "answers_per_set": args.answers,
+        "legacy_counting_sets_per_sec": round(args.sets / legacy_seconds),
+        "engine_counting_sets_per_sec": round(args.sets / count_seconds),
+        "engine_scoring_sets_per_sec": round(args.sets / batch_seconds),
+        "engine_batch_seconds": round(batch_seconds, 4),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
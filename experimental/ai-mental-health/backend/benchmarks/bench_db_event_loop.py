@@ -0,0 +1,109 @@
+"""Benchmark event-loop lag caused by user lookups.
+
+Runs the get_current_user lookup concurrently through a sync ``Session``
+called from async code (the previous handlers) and through ``AsyncSession``,
+while a ticker measures how long the event loop is blocked. Run from the
+backend directory:
+
+    python -m benchmarks.bench_db_event_loop --users 5000 --lookups 2000
+
+Prints one JSON object with lookups per second and loop lag for each path.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import date
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base, async_database_url
+from app.models.contact import SupportContact  # noqa: F401 - registers the mapper
+from app.models.mood import MoodEntry  # noqa: F401 - registers the mapper
+from app.models.user import User
+from benchmarks.loop_lag import LoopLagMonitor
+
+
+def seed(url, users):
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add_all([
+            User(
+                email=f"user{index}@example.com",
+                username=f"user{index}",
+                hashed_password="x" * 60,
+                date_of_birth=date(2008, 1, 1),
+                preferred_language="en",
+            )
+            for index in range(users)
+        ])
+        db.commit()
+    return engine
+
+
+async def run(lookup, emails, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(email):
+        async with semaphore:
+            await lookup(email)
+
+    async with LoopLagMonitor() as monitor:
+        started = time.perf_counter()
+        await asyncio.gather(*(one(email) for email in emails))
+        elapsed = time.perf_counter() - started
+    return {"lookups_per_sec": round(len(emails) / elapsed), "loop_lag": monitor.summary()}
+
+
+async def bench(url, emails, concurrency):
+    engine = create_engine(url)
+    SessionLocal = sessionmaker(bind=engine)
+
+    async def sync_lookup(email):
+        # What the handlers did before: blocking queries inside async def
+        with SessionLocal() as db:
+            db.query(User).filter(User.email == email).first()
+
+    async_engine = create_async_engine(async_database_url(url))
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def async_lookup(email):
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(User).where(User.email == email))
+            result.scalars().first()
+
+    try:
+        return {
+            "sync_session": await run(sync_lookup, emails, concurrency),
+            "async_session": await run(async_lookup, emails, concurrency),
+        }
+    finally:
+        engine.dispose()
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        seed(url, args.users).dispose()
+        rng = random.Random(args.seed)
+        emails = [f"user{rng.randrange(args.users)}@example.com" for _ in range(args.lookups)]
+        results = asyncio.run(bench(url, emails, args.concurrency))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
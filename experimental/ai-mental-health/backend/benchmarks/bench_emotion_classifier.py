@@ -0,0 +1,133 @@
+"""Benchmark the local emotion classifier against the LLM emotion analysis.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_emotion_classifier
+    python -m benchmarks.bench_emotion_classifier --llm 5   # also time Ollama
+
+Prints one JSON object with per-call latency for each path, and the crisis
+detector's recall and false alarm rate on a labelled set of messages, with
+the messages it gets wrong.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from app.services.ai_service import ai_service
+from app.services.emotion_classifier import emotion_classifier
+from app.services.llm_client import llm_client
+
+SAMPLES = [
+    ("I am feeling happy and optimistic today!", "en"),
+    ("I am feeling very sad and depressed today.", "en"),
+    ("I am thinking about harming myself and I don't know what to do.", "en"),
+    ("I have been feeling very stressed and overwhelmed about exams and I cannot sleep", "en"),
+    ("I'm not happy with how things are going with my friends", "en"),
+    ("Je suis tellement anxieuse avant les examens, je n'arrive plus à dormir", "fr"),
+    ("Je ne suis pas triste, juste un peu fatiguée", "fr"),
+    ("Je veux mourir, je me sens désespéré", "fr"),
+]
+
+# (text, language, is a crisis)
+LABELLED_CRISIS = [
+    ("I want to kill myself", "en", True),
+    ("I keep thinking about ending my life", "en", True),
+    ("I wanted to die", "en", True),
+    ("I wish I was dead", "en", True),
+    ("I wish I were dead", "en", True),
+    ("I don't want to live anymore", "en", True),
+    ("I want to end it all", "en", True),
+    ("I've been thinking about suicide", "en", True),
+    ("I am thinking about harming myself and I don't know what to do.", "en", True),
+    ("I have been cutting myself again", "en", True),
+    ("Everyone would be better off without me", "en", True),
+    ("There is nothing to live for", "en", True),
+    ("I took too many pills, I think I overdosed", "en", True),
+    ("I'm thinking of taking my own life", "en", True),
+    ("I can't go on like this, there is no way out", "en", True),
+    ("Je veux mourir, je me sens désespéré", "fr", True),
+    ("J'ai envie de me suicider", "fr", True),
+    ("Je pense à mettre fin à mes jours", "fr", True),
+    ("Je me fais du mal depuis des semaines", "fr", True),
+    ("I am feeling happy and optimistic today!", "en", False),
+    ("I am feeling very sad and depressed today.", "en", False),
+    ("I am not suicidal, just tired", "en", False),
+    ("I don't want to die, I want things to get better", "en", False),
+    ("I cut myself shaving this morning", "en", False),
+    ("I almost died laughing at that movie", "en", False),
+    ("I wanted to die of embarrassment in class", "en", False),
+    ("I spend my life studying for exams", "en", False),
+    ("I have been feeling very stressed and overwhelmed about exams", "en", False),
+    ("Je ne suis pas triste, juste un peu fatiguée", "fr", False),
+    ("Je ne veux pas mourir, je veux aller mieux", "fr", False),
+]
+
+
+def crisis_accuracy():
+    results = [
+        (text, expected, emotion_classifier.classify(text, language)["crisis_detected"])
+        for text, language, expected in LABELLED_CRISIS
+    ]
+    crises = [detected for _, expected, detected in results if expected]
+    others = [detected for _, expected, detected in results if not expected]
+    return {
+        "recall": round(sum(crises) / len(crises), 3),
+        "false_alarm_rate": round(sum(others) / len(others), 3),
+        "missed": [text for text, expected, detected in results if expected and not detected],
+        "false_alarms": [text for text, expected, detected in results if detected and not expected],
+    }
+
+
+def summarize(latencies):
+    latencies = sorted(latencies)
+    return {
+        "calls": len(latencies),
+        "mean_us": round(statistics.mean(latencies) * 1e6, 2),
+        "p50_us": round(latencies[len(latencies) // 2] * 1e6, 2),
+        "p99_us": round(latencies[int(len(latencies) * 0.99)] * 1e6, 2),
+    }
+
+
+def bench_classifier(iterations):
+    latencies = []
+    for _ in range(iterations):
+        for text, language in SAMPLES:
+            started = time.perf_counter()
+            emotion_classifier.classify(text, language)
+            latencies.append(time.perf_counter() - started)
+    return summarize(latencies)
+
+
+async def bench_llm(calls):
+    latencies = []
+    try:
+        for index in range(calls):
+            text, _ = SAMPLES[index % len(SAMPLES)]
+            started = time.perf_counter()
+            await ai_service._llm_emotion_analysis(text)
+            latencies.append(time.perf_counter() - started)
+    finally:
+        await llm_client.close()
+    return summarize(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--llm", type=int, default=0, help="number of LLM calls to time")
+    args = parser.parse_args()
+
+    results = {
+        "classifier": bench_classifier(args.iterations),
+        "crisis_detection": crisis_accuracy(),
+    }
+    if args.llm:
+        results["llm"] = asyncio.run(bench_llm(args.llm))
+        results["speedup"] = round(results["llm"]["mean_us"] / results["classifier"]["mean_us"])
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Benchmark other endpoints' latency during a login storm.
+
+Fires concurrent logins while a probe keeps calling a cheap endpoint
+(/api/ai/assess), once with bcrypt running inline on the event loop (the
+previous handlers) and once on the password hashing pool. Run from the
+backend directory:
+
+    python -m benchmarks.bench_login_storm --logins 40 --rounds 10
+
+Prints one JSON object with probe latency, login throughput and loop lag
+for each mode.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.loop_lag import LoopLagMonitor
+
+PROBE_BODY = {
+    "user_id": "probe",
+    "user_responses": [{"question": "How are you?", "answer": "a bit stressed but calm"}],
+}
+
+
+def summarize(latencies):
+    latencies = sorted(latencies) or [0.0]
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1e3, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1e3, 2),
+        "max_ms": round(latencies[-1] * 1e3, 2),
+        "mean_ms": round(statistics.mean(latencies) * 1e3, 2),
+    }
+
+
+async def probe(client, stop, latencies, interval):
+    # Latency is measured from when each probe was due, so time spent
+    # waiting for a blocked event loop counts against the request
+    due = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        response = await client.post("/api/ai/assess", json=PROBE_BODY)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - due)
+        due = max(due + interval, time.perf_counter())
+
+
+async def storm(app, auth, hasher, users, logins, probe_interval):
+    auth.password_hasher = hasher
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        baseline = []
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, stop, baseline, probe_interval))
+        await asyncio.sleep(0.5)
+        stop.set()
+        await task
+
+        during = []
+        stop = asyncio.Event()
+        async with LoopLagMonitor() as monitor:
+            task = asyncio.create_task(probe(client, stop, during, probe_interval))
+            started = time.perf_counter()
+            responses = await asyncio.gather(*(
+                client.post("/api/auth/login", json={
+                    "email": f"user{index % users}@example.com",
+                    "password": "correct horse battery staple",
+                })
+                for index in range(logins)
+            ))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await task
+    await hasher.close()
+    assert all(response.status_code == 200 for response in responses), responses[0].text
+    return {
+        "probe_idle": summarize(baseline),
+        "probe_during_storm": summarize(during),
+        "logins_per_sec": round(logins / elapsed, 2),
+        "loop_lag": monitor.summary(),
+        "hasher": hasher.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=10, help="bcrypt cost")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--probe-interval", type=float, default=0.01)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    # Settings are read at import time, so configure them first
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+
+    from datetime import date
+
+    from sqlalchemy.orm import Session
+
+    from app.api import auth
+    from app.core.security import get_password_hash
+    from app.db.base import engine
+    from app.db.init_db import init_db
+    from app.main import app
+    from app.models.user import User
+    from app.services.password_hasher import PasswordHasher
+
+    init_db()
+    hashed = get_password_hash("correct horse battery staple")
+    with Session(engine) as db:
+        db.add_all([
+            User(
+                email=f"user{index}@example.com",
+                username=f"user{index}",
+                hashed_password=hashed,
+                date_of_birth=date(2008, 1, 1),
+            )
+            for index in range(args.users)
+        ])
+        db.commit()
+
+    results = {"bcrypt_rounds": args.rounds}
+    for mode in ("inline", "thread"):
+        hasher = PasswordHasher(mode, args.workers, args.logins)
+        results[mode] = asyncio.run(
+            storm(app, auth, hasher, args.users, args.logins, args.probe_interval)
+        )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Benchmark mood trend analytics at millions of entries.
+
+Generates synthetic mood entries in columnar form, computes the trends with
+the NumPy implementation, and for a sample of users checks the results
+against a straightforward per-user Python loop (the ORM-style approach).
+Run from the backend directory:
+
+    python -m benchmarks.bench_mood_trends --entries 2000000 --users 20000
+
+Prints one JSON object with timings and entries per second.
+"""
+import argparse
+import json
+import math
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from app.services.mood_analytics import MOOD_SCORES, compute_trends, score_moods
+
+
+def loop_trends(user_ids, days, scores, end_day, span, window):
+    """Reference implementation: group with dicts, then loop per user."""
+    start_day = end_day - span + 1
+    per_user = defaultdict(lambda: defaultdict(list))
+    for user, day, score in zip(user_ids.tolist(), days.tolist(), scores.tolist()):
+        if not math.isnan(score) and start_day <= day <= end_day:
+            per_user[user][day].append(score)
+
+    results = {}
+    for user, by_day in per_user.items():
+        logged = sorted(by_day)
+        daily = [sum(by_day[day]) / len(by_day[day]) for day in logged]
+        entries = sum(len(by_day[day]) for day in logged)
+        average = sum(daily) / len(daily)
+        recent = [mean for day, mean in zip(logged, daily) if day > end_day - window]
+        longest = run = 0
+        previous = None
+        for day, mean in zip(logged, daily):
+            if mean < 0:
+                run = run + 1 if run and previous is not None and day == previous + 1 else 1
+            else:
+                run = 0
+            longest = max(longest, run)
+            previous = day
+        results[user] = {
+            "entries": entries,
+            "mean": sum(sum(by_day[day]) for day in logged) / entries,
+            "volatility": math.sqrt(
+                max(sum(m * m for m in daily) / len(daily) - average ** 2, 0.0)
+            ),
+            "rolling_average": sum(recent) / len(recent) if recent else None,
+            "longest_negative_streak": longest,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=2_000_000)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--window", type=int, default=7)
+    parser.add_argument("--loop-entries", type=int, default=200_000,
+                        help="entries for the Python loop comparison")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    end_day = 20_000
+    user_ids = rng.integers(1, args.users + 1, args.entries)
+    days = end_day - rng.integers(0, args.days, args.entries)
+    labels = np.array(list(MOOD_SCORES), dtype=object)
+    moods = labels[rng.integers(0, len(labels), args.entries)]
+
+    started = time.perf_counter()
+    scores = score_moods(moods)
+    scoring_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    trends = compute_trends(user_ids, days, scores, end_day, args.days, args.window)
+    numpy_seconds = time.perf_counter() - started
+
+    # What the cohort endpoint does: every user aggregated, top 100 listed
+    started = time.perf_counter()
+    compute_trends(user_ids, days, scores, end_day, args.days, args.window, limit=100)
+    top_seconds = time.perf_counter() - started
+
+    # Same computation both ways on a subset, which must agree
+    sample = slice(0, args.loop_entries)
+    started = time.perf_counter()
+    reference = loop_trends(
+        user_ids[sample], days[sample], scores[sample], end_day, args.days, args.window
+    )
+    loop_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    subset = compute_trends(
+        user_ids[sample], days[sample], scores[sample], end_day, args.days, args.window
+    )
+    subset_seconds = time.perf_counter() - started
+    for user in subset["users"]:
+        expected = reference[user["user_id"]]
+        assert user["entries"] == expected["entries"]
+        assert user["longest_negative_streak"] == expected["longest_negative_streak"]
+        for key in ("mean", "volatility", "rolling_average"):
+            if expected[key] is None:
+                assert user[key] is None
+            else:
+                assert abs(user[key] - expected[key]) < 1e-3, (key, user, expected)
+
+    print(json.dumps({
+        "entries": args.entries,
+        "users": len(trends["users"]),
+        "mood_scoring_seconds": round(scoring_seconds, 4),
+        "numpy_trends_seconds": round(numpy_seconds, 4),
+        "numpy_entries_per_sec": round(args.entries / numpy_seconds),
+        "numpy_trends_top100_seconds": round(top_seconds, 4),
+        "loop_comparison": {
+            "entries": args.loop_entries,
+            "python_loop_seconds": round(loop_seconds, 4),
+            "numpy_seconds": round(subset_seconds, 4),
+            "speedup": round(loop_seconds / subset_seconds, 1),
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Benchmark concurrent SQLite writes with and without the storage profile.
+
+Several processes (standing in for server workers) each run concurrent
+registrations (look up the email, insert the user) and mood entry inserts
+against one SQLite file, first with SQLAlchemy's defaults and then with the
+storage profile from app.db.storage (WAL, synchronous=NORMAL,
+busy_timeout, cache and mmap sizes, pooled connections). Run from the
+backend directory:
+
+    python -m benchmarks.bench_sqlite_writes --processes 4 --concurrency 16 --duration 10
+
+Prints one JSON object with writes per second, latency percentiles and
+error counts ("database is locked") for each profile.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base, async_database_url
+from app.db.storage import configure_engine, engine_options
+from app.models.contact import SupportContact  # noqa: F401 - registers the mapper
+from app.models.mood import MoodEntry
+from app.models.user import User
+
+SEED_USERS = 1000
+
+
+def seed(url, tuned):
+    engine = create_engine(url)
+    if tuned:
+        configure_engine(engine)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add_all([
+            User(
+                email=f"seed{index}@example.com",
+                username=f"seed{index}",
+                hashed_password="x" * 60,
+                date_of_birth=date(2008, 1, 1),
+            )
+            for index in range(SEED_USERS)
+        ])
+        db.commit()
+    engine.dispose()
+
+
+async def worker_loop(url, tuned, worker, concurrency, duration, seed_value):
+    async_url = async_database_url(url)
+    if tuned:
+        engine = create_async_engine(async_url, **engine_options(async_url, is_async=True))
+        configure_engine(engine.sync_engine)
+    else:
+        engine = create_async_engine(async_url)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+    counter = itertools.count()
+    latencies = []
+    errors = {}
+    deadline = time.perf_counter() + duration
+
+    async def register(rng):
+        index = next(counter)
+        email = f"w{worker}-{index}@example.com"
+        async with SessionLocal() as db:
+            result = await db.execute(select(User).where(User.email == email))
+            if result.scalars().first() is None:
+                db.add(User(
+                    email=email,
+                    username=f"w{worker}-{index}",
+                    hashed_password="x" * 60,
+                    date_of_birth=date(2008, 1, 1),
+                ))
+                await db.commit()
+
+    async def log_mood(rng):
+        async with SessionLocal() as db:
+            db.add(MoodEntry(
+                user_id=rng.randrange(1, SEED_USERS + 1),
+                mood=rng.choice(["happy", "sad", "anxious", "calm"]),
+                timestamp=datetime.utcnow(),
+            ))
+            await db.commit()
+
+    async def client(client_id):
+        rng = random.Random(seed_value * 10000 + worker * 100 + client_id)
+        while time.perf_counter() < deadline:
+            operation = register if rng.random() < 0.5 else log_mood
+            started = time.perf_counter()
+            try:
+                await operation(rng)
+            except Exception as e:
+                message = str(getattr(e, "orig", e)) or type(e).__name__
+                errors[message] = errors.get(message, 0) + 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    try:
+        await asyncio.gather(*(client(index) for index in range(concurrency)))
+    finally:
+        await engine.dispose()
+    return latencies, errors
+
+
+def run_worker(arguments):
+    return asyncio.run(worker_loop(*arguments))
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return round(sorted_values[index] * 1e3, 2)
+
+
+def bench(directory, tuned, args):
+    url = f"sqlite:///{os.path.join(directory, 'tuned.db' if tuned else 'default.db')}"
+    seed(url, tuned)
+    started = time.perf_counter()
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(args.processes) as pool:
+        results = pool.map(run_worker, [
+            (url, tuned, worker, args.concurrency, args.duration, args.seed)
+            for worker in range(args.processes)
+        ])
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency for worker_latencies, _ in results for latency in worker_latencies)
+    errors = {}
+    for _, worker_errors in results:
+        for message, count in worker_errors.items():
+            errors[message] = errors.get(message, 0) + count
+    return {
+        "writes": len(latencies),
+        # Includes process start-up, the same for both profiles
+        "writes_per_sec": round(len(latencies) / elapsed, 1),
+        "errors": errors,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": percentile(latencies, 1.0),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument(
+        "--concurrency", type=int, default=16, help="concurrent clients per process"
+    )
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per profile")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = {
+            "default": bench(directory, False, args),
+            "storage_profile": bench(directory, True, args),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Fake Ollama server for benchmarks and local development.
+
+Implements /api/generate and /api/chat (streaming and non-streaming) plus
+/api/tags, /api/ps and /api/embeddings, with configurable latency, token
+rate and error injection. Run from the backend directory:
+
+    python -m benchmarks.fake_ollama --port 11434 --latency 0.2 --tokens-per-second 40
+
+Replies carry the same timing fields as Ollama (prompt_eval_count,
+prompt_eval_duration, eval_count, eval_duration, total_duration).
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+from typing import Dict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = (
+    "I hear how much you are carrying right now and it makes sense to feel this way "
+    "it can help to name what you need and share it with someone you trust"
+).split()
+
+
+def create_app(
+    latency: float = 0.1,
+    tokens_per_second: float = 50.0,
+    reply_tokens: int = 40,
+    error_rate: float = 0.0,
+    stream_error_rate: float = 0.0,
+    model: str = "llama3.2:latest",
+    seed: int = 0
+) -> FastAPI:
+    """Build the fake server.
+
+    ``latency`` is the time to the first token (prompt evaluation), after
+    which ``reply_tokens`` tokens follow at ``tokens_per_second``. A share
+    ``error_rate`` of requests fail with HTTP 500; ``stream_error_rate`` of
+    streams fail part-way with an ``{"error": ...}`` chunk.
+    """
+    app = FastAPI(title="Fake Ollama")
+    rng = random.Random(seed)
+    stats = {"requests": 0, "errors": 0, "stream_errors": 0}
+
+    def reply_words():
+        return [WORDS[index % len(WORDS)] + " " for index in range(reply_tokens)]
+
+    def timings(prompt: str, started: float) -> Dict:
+        prompt_tokens = max(1, len(prompt) // 4)
+        return {
+            "done": True,
+            "total_duration": int((time.perf_counter() - started) * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(latency * 1e9),
+            "eval_count": reply_tokens,
+            "eval_duration": int(reply_tokens / tokens_per_second * 1e9),
+        }
+
+    def prompt_of(body: Dict) -> str:
+        if "messages" in body:
+            return " ".join(message.get("content", "") for message in body["messages"])
+        return body.get("system", "") + body.get("prompt", "")
+
+    async def handle(request: Request, chat: bool):
+        body = await request.json()
+        stats["requests"] += 1
+        started = time.perf_counter()
+        if rng.random() < error_rate:
+            stats["errors"] += 1
+            await asyncio.sleep(latency)
+            return JSONResponse({"error": "injected failure"}, status_code=500)
+
+        prompt = prompt_of(body)
+        words = reply_words()
+
+        def chunk(text: str) -> Dict:
+            if chat:
+                return {
+                    "model": model,
+                    "message": {"role": "assistant", "content": text},
+                    "done": False,
+                }
+            return {"model": model, "response": text, "done": False}
+
+        if body.get("stream", True):
+            fail_at = rng.randrange(len(words)) if rng.random() < stream_error_rate else None
+
+            async def stream():
+                await asyncio.sleep(latency)
+                for index, word in enumerate(words):
+                    if index == fail_at:
+                        stats["stream_errors"] += 1
+                        yield json.dumps({"error": "injected stream failure"}) + "\n"
+                        return
+                    yield json.dumps(chunk(word)) + "\n"
+                    await asyncio.sleep(1 / tokens_per_second)
+                final = dict(chunk(""), **timings(prompt, started))
+                if not chat:
+                    final["context"] = list(range(8))
+                yield json.dumps(final) + "\n"
+
+            return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+        await asyncio.sleep(latency + len(words) / tokens_per_second)
+        result = dict(chunk("".join(words)), **timings(prompt, started))
+        if not chat:
+            result["context"] = list(range(8))
+        return result
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        return await handle(request, chat=False)
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        return await handle(request, chat=True)
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": model, "model": model}]}
+
+    @app.get("/api/ps")
+    async def ps():
+        return {"models": [{"name": model, "model": model}]}
+
+    @app.post("/api/embeddings")
+    async def embeddings(request: Request):
+        # Deterministic bag-of-words vectors, so similar prompts are close
+        body = await request.json()
+        vector = [0.0] * 64
+        for word in body.get("prompt", "").lower().split():
+            vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % 64] += 1.0
+        return {"embedding": vector}
+
+    @app.get("/stats")
+    async def fake_stats():
+        return stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--reply-tokens", type=int, default=40)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--stream-error-rate", type=float, default=0.0)
+    parser.add_argument("--model", default="llama3.2:latest")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run(
+        create_app(
+            args.latency,
+            args.tokens_per_second,
+            args.reply_tokens,
+            args.error_rate,
+            args.stream_error_rate,
+            args.model
+        ),
+        host=args.host,
+        port=args.port,
+        log_level="warning"
+    )
+
+
+if __name__ == "__main__":
+    main()
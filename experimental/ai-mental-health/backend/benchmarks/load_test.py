@@ -0,0 +1,343 @@
+"""Scripted load scenarios against the backend and a fake Ollama.
+
+Starts the fake Ollama server and the backend (with a fresh SQLite
+database) as subprocesses, then runs each scenario with a fixed number of
+concurrent clients for a fixed time. Run from the backend directory:
+
+    python -m benchmarks.load_test --duration 10 --concurrency 20
+    python -m benchmarks.load_test --scenarios chat,assess --output results.json
+
+Prints one JSON object with, per scenario, p50/p95/p99 latency, requests
+per second, status counts and the backend's event-loop lag.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+EMOTIONS = ["anxious", "sad", "frustrated", "lonely", "hopeful", "overwhelmed"]
+NEEDS = ["need someone to talk to", "need help with homework", "want to spend time together"]
+RECIPIENTS = ["parent", "teacher", "friend", "counselor"]
+TEXTS = [
+    "I have been feeling really stressed about my exams",
+    "Today was a good day, I felt calm and happy",
+    "I'm worried my friends don't like me anymore",
+    "Je suis tellement fatiguée et un peu triste ces jours-ci",
+    "I feel overwhelmed with everything going on at home",
+]
+ANSWERS = [
+    "I feel stressed and under pressure most days",
+    "Mostly calm and content, sometimes tired",
+    "I worry a lot and get nervous before school",
+]
+PASSWORD = "correct horse battery staple"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return round(sorted_values[index] * 1e3, 2)
+
+
+class Scenario:
+    """One endpoint under load; ``request`` issues a single call."""
+
+    name = ""
+
+    def __init__(self, counter):
+        self.counter = counter
+
+    async def request(self, client, context, rng) -> httpx.Response:
+        raise NotImplementedError
+
+
+class ChatScenario(Scenario):
+    name = "chat"
+
+    async def request(self, client, context, rng):
+        return await client.post(
+            "/api/ai/chat",
+            json={
+                "messages": [{"role": "user", "content": rng.choice(TEXTS)}],
+                "language": "en",
+            },
+            headers=context["auth"]
+        )
+
+
+class AnalyzeEmotionScenario(Scenario):
+    name = "analyze-emotion"
+
+    async def request(self, client, context, rng):
+        return await client.post(
+            "/api/ai/analyze-emotion",
+            json={"text": f"{rng.choice(TEXTS)} ({next(self.counter)})"},
+            headers=context["auth"]
+        )
+
+
+class DraftMessageScenario(Scenario):
+    name = "draft-message"
+
+    async def request(self, client, context, rng):
+        # A unique situation per call keeps the completion cache out of the picture
+        return await client.post(
+            "/api/ai/draft-message",
+            json={
+                "recipient_type": rng.choice(RECIPIENTS),
+                "emotion": rng.choice(EMOTIONS),
+                "need": rng.choice(NEEDS),
+                "situation": f"load test {next(self.counter)}",
+            },
+            headers=context["auth"]
+        )
+
+
+class AssessScenario(Scenario):
+    name = "assess"
+
+    async def request(self, client, context, rng):
+        return await client.post("/api/ai/assess", json={
+            "user_id": "load",
+            "user_responses": [
+                {"question": f"q{index}", "answer": rng.choice(ANSWERS)} for index in range(5)
+            ],
+        })
+
+
+class LoginScenario(Scenario):
+    name = "login"
+
+    async def request(self, client, context, rng):
+        return await client.post("/api/auth/login", json={
+            "email": rng.choice(context["emails"]),
+            "password": PASSWORD,
+        })
+
+
+class RegisterScenario(Scenario):
+    name = "register"
+
+    async def request(self, client, context, rng):
+        index = next(self.counter)
+        return await client.post("/api/auth/register", json={
+            "email": f"register{index}@example.com",
+            "username": f"register{index}",
+            "password": PASSWORD,
+            "date_of_birth": "2005-05-05",
+        })
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (
+        ChatScenario,
+        AnalyzeEmotionScenario,
+        DraftMessageScenario,
+        AssessScenario,
+        LoginScenario,
+        RegisterScenario,
+    )
+}
+
+
+async def run_scenario(client, scenario, context, duration, concurrency, seed):
+    latencies = []
+    statuses = {}
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id):
+        rng = random.Random(seed * 1000 + worker_id)
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await scenario.request(client, context, rng)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    await client.get("/__bench/loop-lag")
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    loop_lag = (await client.get("/__bench/loop-lag")).json()
+
+    latencies.sort()
+    ok = sum(count for status, count in statuses.items() if status.startswith("2"))
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 2),
+        "success_rps": round(ok / elapsed, 2),
+        "statuses": statuses,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": percentile(latencies, 1.0),
+        },
+        "loop_lag": loop_lag,
+    }
+
+
+async def prepare(client, users):
+    """Register the users the login and authenticated scenarios sign in as."""
+    emails = [f"load{index}@example.com" for index in range(users)]
+    for index, email in enumerate(emails):
+        response = await client.post("/api/auth/register", json={
+            "email": email,
+            "username": f"load{index}",
+            "password": PASSWORD,
+            "date_of_birth": "2005-05-05",
+        })
+        response.raise_for_status()
+    response = await client.post("/api/auth/login", json={"email": emails[0], "password": PASSWORD})
+    response.raise_for_status()
+    token = response.json()["access_token"]
+    return {"emails": emails, "auth": {"Authorization": f"Bearer {token}"}}
+
+
+async def wait_until_ready(url, process, timeout=30.0):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{url} exited with status {process.returncode}")
+            try:
+                await client.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not start within {timeout} s")
+
+
+async def run(args, backend_url, backend, fake):
+    await wait_until_ready(f"{args.ollama_url}/api/tags", fake)
+    await wait_until_ready(f"{backend_url}/", backend)
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    timeout = httpx.Timeout(args.request_timeout)
+    async with httpx.AsyncClient(base_url=backend_url, limits=limits, timeout=timeout) as client:
+        context = await prepare(client, args.users)
+        counter = itertools.count()
+        results = {}
+        for name in args.scenarios:
+            results[name] = await run_scenario(
+                client,
+                SCENARIOS[name](counter),
+                context,
+                args.duration,
+                args.concurrency,
+                args.seed
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"comma-separated, from: {', '.join(SCENARIOS)}")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--request-timeout", type=float, default=60.0)
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the results to this file")
+    parser.add_argument("--ollama-url", help="use a running Ollama instead of the fake one")
+    fake = parser.add_argument_group("fake Ollama")
+    fake.add_argument("--latency", type=float, default=0.1)
+    fake.add_argument("--tokens-per-second", type=float, default=50.0)
+    fake.add_argument("--reply-tokens", type=int, default=40)
+    fake.add_argument("--error-rate", type=float, default=0.0)
+    fake.add_argument("--stream-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    processes = []
+    directory = tempfile.mkdtemp()
+    try:
+        fake_process = None
+        if args.ollama_url is None:
+            fake_port = free_port()
+            args.ollama_url = f"http://127.0.0.1:{fake_port}"
+            fake_process = subprocess.Popen([
+                sys.executable, "-m", "benchmarks.fake_ollama",
+                "--port", str(fake_port),
+                "--latency", str(args.latency),
+                "--tokens-per-second", str(args.tokens_per_second),
+                "--reply-tokens", str(args.reply_tokens),
+                "--error-rate", str(args.error_rate),
+                "--stream-error-rate", str(args.stream_error_rate),
+            ])
+            processes.append(fake_process)
+
+        backend_port = free_port()
+        environment = dict(
+            os.environ,
+            OLLAMA_BASE_URL=args.ollama_url,
+            DATABASE_URL=f"sqlite:///{os.path.join(directory, 'load.db')}",
+            BCRYPT_ROUNDS=str(args.bcrypt_rounds),
+        )
+        backend = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.serve_backend", "--port", str(backend_port)],
+            env=environment
+        )
+        processes.append(backend)
+
+        results = asyncio.run(run(
+            args,
+            f"http://127.0.0.1:{backend_port}",
+            backend,
+            fake_process or backend
+        ))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+    report = {
+        "config": {
+            "duration_seconds": args.duration,
+            "concurrency": args.concurrency,
+            "bcrypt_rounds": args.bcrypt_rounds,
+            "ollama": args.ollama_url,
+            "fake_ollama": {
+                "latency": args.latency,
+                "tokens_per_second": args.tokens_per_second,
+                "reply_tokens": args.reply_tokens,
+                "error_rate": args.error_rate,
+                "stream_error_rate": args.stream_error_rate,
+            },
+        },
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
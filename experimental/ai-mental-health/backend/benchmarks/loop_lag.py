@@ -0,0 +1,45 @@
+"""Event-loop lag measurement shared by the benchmarks."""
+import asyncio
+import time
+
+
+class LoopLagMonitor:
+    """Measure how late the event loop wakes up a periodic timer.
+
+    A ticker sleeps for ``interval`` seconds at a time; any extra delay before
+    it runs again is time the loop spent blocked by other work. Use as an
+    async context manager around the workload being measured.
+    """
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.lags = []
+        self._task = None
+
+    async def _tick(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._tick())
+        # Let the ticker start before the workload does
+        await asyncio.sleep(0)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    def summary(self):
+        lags = sorted(self.lags) or [0.0]
+        return {
+            "samples": len(self.lags),
+            "mean_ms": round(sum(lags) / len(lags) * 1e3, 3),
+            "p99_ms": round(lags[int(len(lags) * 0.99)] * 1e3, 3),
+            "max_ms": round(lags[-1] * 1e3, 3),
+        }
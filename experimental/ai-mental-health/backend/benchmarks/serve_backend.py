@@ -0,0 +1,63 @@
+"""Run the backend for load tests, with an event-loop lag probe.
+
+Initializes the database, then serves ``app.main:app`` wrapped so that
+``GET /__bench/loop-lag`` returns the lag measured since the previous call.
+Configure the backend through its usual environment variables
+(OLLAMA_BASE_URL, DATABASE_URL, ...). Run from the backend directory:
+
+    python -m benchmarks.serve_backend --port 8000
+"""
+import argparse
+import json
+
+from benchmarks.loop_lag import LoopLagMonitor
+
+PROBE_PATH = "/__bench/loop-lag"
+
+
+class LoopLagProbe:
+    """ASGI wrapper that measures the server's event-loop lag."""
+
+    def __init__(self, app):
+        self.app = app
+        self.monitor = None
+
+    async def _restart(self):
+        if self.monitor is not None:
+            await self.monitor.__aexit__(None, None, None)
+        self.monitor = LoopLagMonitor()
+        await self.monitor.__aenter__()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == PROBE_PATH:
+            summary = self.monitor.summary() if self.monitor is not None else {}
+            await self._restart()
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/json")],
+            })
+            await send({"type": "http.response.body", "body": json.dumps(summary).encode("utf-8")})
+            return
+        if scope["type"] == "http" and self.monitor is None:
+            await self._restart()
+        await self.app(scope, receive, send)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    from app.db.init_db import init_db
+    from app.main import app
+
+    init_db()
+    uvicorn.run(LoopLagProbe(app), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
 import uvicorn
 import logging
+import time
+from importlib.util import find_spec
 from pathlib import Path
-from app.main import app
+from app.core.ai_config import ai_settings
+from app.core.config import settings, worker_count
+from app.db.base import engine
 from app.db.init_db import init_db
 
 # Configure logging
@@ -9,8 +13,51 @@ logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
+# Health checks and keep-warm pings would log every Ollama request
+logging.getLogger("httpx").setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
+
+def worker_local_state() -> list:
+    """Features that keep state in one worker's memory and break with several workers."""
+    problems = [
+        "chat sessions (/chat/sessions, /ws/chat) and deferred sentiments "
+        "(/chat/sentiment) live in the worker that created them; requests "
+        "served by another worker get a 404",
+    ]
+    if ai_settings.GENERATION_JOB_STORE == "memory":
+        problems.append(
+            "generation jobs are only visible to the worker that accepted them; "
+            "set GENERATION_JOB_STORE=sqlite"
+        )
+    if settings.AUTH_USER_CACHE_SIZE > 0:
+        problems.append(
+            "a changed or deactivated account is only dropped from the user cache "
+            "of the worker that changed it, others keep it for up to "
+            "AUTH_USER_CACHE_TTL_SECONDS; set AUTH_USER_CACHE_SIZE=0 to disable the cache"
+        )
+    return problems
+
+
+def production_options() -> dict:
+    """uvicorn options for SERVER_MODE=production."""
+    # Same choice as uvicorn's "auto", made here so it can be logged
+    loop = "uvloop" if find_spec("uvloop") else "asyncio"
+    http = "httptools" if find_spec("httptools") else "h11"
+    workers = worker_count()
+    logger.info(f"Production mode: {workers} worker(s), {loop} event loop, {http} HTTP parser")
+    if workers > 1:
+        for problem in worker_local_state():
+            logger.warning(f"With {workers} workers, {problem}")
+    return {
+        "workers": workers,
+        "loop": loop,
+        "http": http,
+        "reload": False,
+        "timeout_graceful_shutdown": settings.GRACEFUL_SHUTDOWN_TIMEOUT_SECONDS,
+    }
+
+
 def main():
     try:
         # Ensure the app directory exists
@@ -18,23 +65,35 @@ def main():
         if not app_dir.exists():
             raise Exception(f"App directory not found at {app_dir}")
 
-        # Initialize the database
+        # Initialize the database once, before any worker starts
         logger.info("Initializing database...")
+        started = time.perf_counter()
         init_db()
-        
+        # Workers open their own connections
+        engine.dispose()
+        logger.info(f"Database initialized in {time.perf_counter() - started:.2f} s")
+
+        if settings.SERVER_MODE == "production":
+            options = production_options()
+        elif settings.SERVER_MODE == "development":
+            options = {"reload": True, "workers": 1}
+        else:
+            raise Exception(f"Unknown SERVER_MODE: {settings.SERVER_MODE}")
+
         # Run the application
         logger.info("Starting the FastAPI application...")
         uvicorn.run(
             "app.main:app",
-            host="0.0.0.0",
-            port=8000,
-            reload=True,
-            workers=1,
-            log_level="info"
+            host=settings.HOST,
+            port=settings.PORT,
+            log_level=settings.LOG_LEVEL,
+            access_log=settings.ACCESS_LOG,
+            **options
         )
     except Exception as e:
         logger.error(f"Error starting the application: {str(e)}")
         raise
 
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
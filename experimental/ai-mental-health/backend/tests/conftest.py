@@ -0,0 +1,46 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Settings are read when app modules are imported, so configure them first:
+# a throwaway database, and no Ollama needed at startup
+_database = Path(tempfile.mkdtemp()) / "test.db"
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_database}")
+os.environ.setdefault("MODEL_WARMUP_ENABLED", "false")
+# Nothing listens here, so every LLM call fails at once: tests exercise the
+# paths that must work without the model
+os.environ.setdefault("OLLAMA_BASE_URLS", '["http://127.0.0.1:9"]')
+os.environ.setdefault("OLLAMA_HEALTH_CHECK_INTERVAL_SECONDS", "0")
+os.environ.setdefault("COMPLETION_CACHE_BACKEND", "memory")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.db.init_db import init_db  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    init_db()
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def auth_headers(client):
+    user = {
+        "email": "student@example.com",
+        "username": "student",
+        "password": "correct horse battery staple",
+        "date_of_birth": "2008-01-01",
+    }
+    client.post("/api/auth/register", json=user)
+    response = client.post(
+        "/api/auth/login", json={"email": user["email"], "password": user["password"]}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
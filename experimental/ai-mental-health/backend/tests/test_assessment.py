@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from app.api import ai_communication
+from app.services.assessment import ASSESSMENT_LEXICONS, AssessmentEngine, assessment_engine
+
+FRAGMENTS = [
+    "I feel stressed and overwhelmed",
+    "too much pressure",
+    "I worry and get nervous",
+    "panic attacks at night",
+    "sad, tired and exhausted",
+    "everything feels hopeless",
+    "good, calm and happy",
+    "relaxed and at peace",
+    "stressstress",
+    "Ünïcode ça va",
+    "",
+]
+
+
+def reference_counts(user_responses):
+    """The substring counting the engine replaced."""
+    counts = {category: 0 for category in ASSESSMENT_LEXICONS}
+    for response in user_responses:
+        answer = response.get('answer', '').lower()
+        for category, words in ASSESSMENT_LEXICONS.items():
+            for word in words:
+                if word in answer:
+                    counts[category] += 1
+    return counts
+
+
+def random_sets(seed, count=300):
+    rng = random.Random(seed)
+    return [
+        [
+            {"answer": " ".join(rng.sample(FRAGMENTS, rng.randint(0, 4)))}
+            for _ in range(rng.randint(0, 6))
+        ]
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_counts_match_substring_reference(seed):
+    response_sets = random_sets(seed)
+    counts = assessment_engine.count_batch(response_sets)
+    for engine_counts, responses in zip(counts, response_sets):
+        assert dict(zip(assessment_engine.categories, engine_counts.tolist())) == \
+            reference_counts(responses)
+
+
+def test_answers_containing_nul_stay_separate():
+    # A NUL inside an answer must not split it into two answers
+    responses = [{"answer": "stre\x00ss"}, {"answer": "stress"}]
+    assert assessment_engine.count(responses).tolist() == [1, 0, 0, 0]
+
+
+def test_score_batch_matches_score():
+    response_sets = random_sets(7, count=50)
+    batch = assessment_engine.score_batch(response_sets)
+    assert batch == [assessment_engine.score(responses) for responses in response_sets]
+
+
+def test_short_keywords_are_rejected():
+    with pytest.raises(ValueError):
+        AssessmentEngine({"stress": ["s"]})
+
+
+def test_batch_endpoint(client, auth_headers):
+    batch = {"assessments": [
+        {"user_id": "a", "user_responses": [{"answer": "stressed, anxious and panic"}]},
+        {"user_id": "b", "user_responses": []},
+    ]}
+    assert client.post("/api/ai/assess/batch", json=batch).status_code == 401
+    response = client.post("/api/ai/assess/batch", json=batch, headers=auth_headers)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["user_id"] for result in results] == ["a", "b"]
+    assert results[1]["assessment"] == assessment_engine.score([])["assessment"]
+
+
+def test_batch_endpoint_limit(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(ai_communication.ai_settings, "MAX_ASSESSMENT_BATCH", 1)
+    response = client.post("/api/ai/assess/batch", json={"assessments": [
+        {"user_id": "a", "user_responses": []},
+        {"user_id": "b", "user_responses": []},
+    ]}, headers=auth_headers)
+    assert response.status_code == 413
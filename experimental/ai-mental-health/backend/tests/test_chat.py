@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from app.services import chat_sessions as chat_sessions_module
+from app.services.chat_sessions import ChatSessionStore
+
+
+@pytest.mark.parametrize("path", ["/api/ai/chat", "/api/ai/chat/stream"])
+def test_chat_rejects_empty_messages(client, auth_headers, path):
+    response = client.post(path, json={"messages": []}, headers=auth_headers)
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("path", ["/api/ai/chat", "/api/ai/chat/stream"])
+def test_chat_needs_a_token_only_for_sessions(client, path):
+    # Anonymous clients, which still send user_id, are served
+    message = {"role": "user", "content": "I want to kill myself"}
+    response = client.post(path, json={"messages": [message], "user_id": "test_user"})
+    assert response.status_code == 200
+    response = client.post(path, json={"messages": [message], "session_id": "abc"})
+    assert response.status_code == 401
+
+
+def test_sessions_belong_to_the_signed_in_user(client, auth_headers):
+    assert client.post("/api/ai/chat/sessions").status_code == 401
+    session_id = client.post("/api/ai/chat/sessions", headers=auth_headers).json()["session_id"]
+    path = f"/api/ai/chat/sessions/{session_id}"
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers=auth_headers).json()["turns"] == 0
+
+    other = {
+        "email": "other@example.com",
+        "username": "other",
+        "password": "another long passphrase",
+        "date_of_birth": "2007-01-01",
+    }
+    client.post("/api/auth/register", json=other)
+    token = client.post(
+        "/api/auth/login", json={"email": other["email"], "password": other["password"]}
+    ).json()["access_token"]
+    other_headers = {"Authorization": f"Bearer {token}"}
+    assert client.get(path, headers=other_headers).status_code == 404
+    assert client.delete(path, headers=other_headers).status_code == 404
+    response = client.post(
+        "/api/ai/chat",
+        json={"messages": [{"role": "user", "content": "Hi"}], "session_id": session_id},
+        headers=other_headers,
+    )
+    assert response.status_code == 404
+
+    assert client.delete(path, headers=auth_headers).status_code == 204
+    assert client.get(path, headers=auth_headers).status_code == 404
+
+
+def test_compaction_does_not_hold_the_session_during_the_summary(monkeypatch):
+    store = ChatSessionStore(ttl=60, max_sessions=10, token_budget=20, trim_ratio=0.5)
+    summarizing = None
+    release = None
+
+    async def summarize_conversation(summary, messages):
+        summarizing.set()
+        await release.wait()
+        return f"{len(messages)} messages"
+
+    monkeypatch.setattr(
+        chat_sessions_module.ai_service, "summarize_conversation", summarize_conversation
+    )
+
+    async def scenario():
+        nonlocal summarizing, release
+        summarizing, release = asyncio.Event(), asyncio.Event()
+        session = store.create("1")
+        for index in range(4):
+            session.record([{"role": "user", "content": "x" * 40}], f"reply {index}")
+        store.schedule_compaction(session)
+        await summarizing.wait()
+        # A turn goes ahead while the summary is being written
+        async with session.lock:
+            session.record([{"role": "user", "content": "new"}], "new reply")
+        release.set()
+        await asyncio.gather(*store._compactions)
+        return session
+
+    session = asyncio.run(scenario())
+    assert session.summary is not None
+    assert session.messages[-2:] == [
+        {"role": "user", "content": "new"},
+        {"role": "assistant", "content": "new reply"},
+    ]
+    assert store.summaries == 1
+    assert not session.compacting
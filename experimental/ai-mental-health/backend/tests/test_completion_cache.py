@@ -0,0 +1,61 @@
+import asyncio
+
+from app.services.completion_cache import (
+    CompletionCache,
+    MemoryCacheBackend,
+    SQLiteCacheBackend,
+)
+
+
+def test_sqlite_backend_evicts_least_recently_used(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.db"), max_entries=2, touch_interval=0)
+    backend.set("a", "1", ttl=60)
+    backend.set("b", "2", ttl=60)
+    assert backend.get("a") == "1"
+    backend.set("c", "3", ttl=60)
+    assert len(backend) == 2
+    assert backend.get("b") is None
+    assert backend.get("a") == "1"
+
+
+def test_sqlite_backend_expires_entries(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.db"), max_entries=10)
+    backend.set("a", "1", ttl=-1)
+    assert len(backend) == 1
+    assert backend.get("a") is None
+    assert len(backend) == 0
+
+
+def test_sqlite_backend_skips_recent_touches(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.db"), max_entries=10, touch_interval=60)
+    backend.set("a", "1", ttl=60)
+    last_used = backend._connection.execute("SELECT last_used FROM completion_cache").fetchone()
+    assert backend.get("a") == "1"
+    assert backend._connection.execute(
+        "SELECT last_used FROM completion_cache"
+    ).fetchone() == last_used
+
+
+def test_sqlite_backend_counts_existing_entries(tmp_path):
+    path = str(tmp_path / "cache.db")
+    SQLiteCacheBackend(path, max_entries=10).set("a", "1", ttl=60)
+    reopened = SQLiteCacheBackend(path, max_entries=10)
+    assert len(reopened) == 1
+    reopened.clear()
+    assert len(reopened) == 0
+
+
+def test_cache_counts_hits_and_bypasses():
+    cache = CompletionCache(MemoryCacheBackend(10), ttl=60, endpoints=["draft-message"])
+    payload = {"model": "m", "prompt": "hello"}
+
+    async def run():
+        assert await cache.get("draft-message", payload) is None
+        await cache.set("draft-message", payload, "hi")
+        assert await cache.get("draft-message", payload) == "hi"
+        assert await cache.get("draft-message", payload, bypass=True) is None
+
+    asyncio.run(run())
+    stats = cache.stats()["endpoints"]["draft-message"]
+    assert (stats["hits"], stats["misses"], stats["bypasses"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
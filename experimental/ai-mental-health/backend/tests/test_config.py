@@ -0,0 +1,12 @@
+from app.core.config import Settings
+
+
+def test_settings_ignore_keys_moved_to_ai_settings(tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text(
+        "OLLAMA_BASE_URL=http://localhost:11434\nMODEL_NAME=llama2\n"
+        "MAX_TOKENS=1000\nTEMPERATURE=0.7\nLOG_LEVEL=debug\n"
+    )
+    settings = Settings(_env_file=str(env_file))
+    assert settings.LOG_LEVEL == "debug"
+    assert not hasattr(settings, "MODEL_NAME")
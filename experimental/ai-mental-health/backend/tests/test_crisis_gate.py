@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+import app.api.ai_communication as ai_communication
+from app.services.crisis_gate import CRISIS_HEADER, crisis_gate
+
+CRISIS_MESSAGE = "I want to kill myself"
+
+
+def test_check_returns_resources_in_the_message_language():
+    crisis = crisis_gate.check("je veux mourir", "fr")
+    assert crisis["crisis_detected"]
+    assert "988" in crisis["message"]
+    assert crisis["resources"][1]["name"] == "Jeunesse, J'écoute"
+
+
+def test_check_ignores_ordinary_messages():
+    assert crisis_gate.check("I had a nice day at school") is None
+
+
+def test_chat_answers_a_crisis_without_the_llm(client, auth_headers):
+    # The LLM is unreachable in tests; a crisis must still get help, not a 500
+    response = client.post(
+        "/api/ai/chat",
+        json={"messages": [{"role": "user", "content": CRISIS_MESSAGE}]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert response.headers[CRISIS_HEADER] == "true"
+    body = response.json()
+    assert body["crisis"]["resources"]
+    assert body["response"] == body["crisis"]["message"]
+
+
+def test_chat_without_crisis_reports_the_llm_failure(client, auth_headers):
+    response = client.post(
+        "/api/ai/chat",
+        json={"messages": [{"role": "user", "content": "Hello there"}]},
+        headers=auth_headers,
+    )
+    assert response.status_code >= 500
+    assert CRISIS_HEADER not in response.headers
+
+
+def test_chat_stream_sends_crisis_event_first(client, auth_headers):
+    response = client.post(
+        "/api/ai/chat/stream",
+        json={"messages": [{"role": "user", "content": CRISIS_MESSAGE}]},
+        headers=auth_headers,
+    )
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert response.headers[CRISIS_HEADER] == "true"
+    assert events[0]["type"] == "crisis"
+    assert events[0]["resources"]
+
+
+@pytest.fixture
+def skip_llm(monkeypatch):
+    monkeypatch.setattr(ai_communication.ai_settings, "CRISIS_SKIP_LLM", True)
+
+
+def test_chat_stream_skips_the_llm_for_a_crisis(client, auth_headers, skip_llm):
+    response = client.post(
+        "/api/ai/chat/stream",
+        json={"messages": [{"role": "user", "content": CRISIS_MESSAGE}]},
+        headers=auth_headers,
+    )
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [event["type"] for event in events] == ["crisis", "token", "sentiment", "done"]
+    assert events[1]["content"] == events[0]["message"]
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    calls = []
+
+    async def send(backend, path, payload, stream, timeout=None):
+        calls.append(path)
+        raise ConnectionError("LLM called")
+
+    monkeypatch.setattr(ai_communication.llm_client, "_send", send)
+    return calls
+
+
+def test_chat_stream_makes_no_llm_call_for_a_crisis(client, skip_llm, llm_calls):
+    response = client.post(
+        "/api/ai/chat/stream",
+        json={"messages": [{"role": "user", "content": CRISIS_MESSAGE}]},
+    )
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[2] == {
+        "type": "sentiment", "sentiment": crisis_gate.check(CRISIS_MESSAGE)["sentiment"]
+    }
+    assert llm_calls == []
+
+
+def test_analyze_emotion_falls_back_to_local_analysis_in_a_crisis(client, auth_headers):
+    response = client.post(
+        "/api/ai/analyze-emotion",
+        json={"text": CRISIS_MESSAGE, "second_opinion": True},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert response.headers[CRISIS_HEADER] == "true"
+    body = response.json()
+    assert body["crisis_detected"]
+    assert body["resources"]
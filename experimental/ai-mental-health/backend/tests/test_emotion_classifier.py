@@ -0,0 +1,62 @@
+import pytest
+
+from app.services.emotion_classifier import emotion_classifier
+
+
+@pytest.mark.parametrize("text, language", [
+    ("I want to kill myself", "en"),
+    ("I keep thinking about ending my life", "en"),
+    ("I wanted to die", "en"),
+    ("I wish I was dead", "en"),
+    ("I wish I were dead", "en"),
+    ("I don't want to live anymore", "en"),
+    ("I dont want to be alive", "en"),
+    ("I want to end it all", "en"),
+    ("I've been thinking about suicide", "en"),
+    ("I have been cutting myself again", "en"),
+    ("I'm thinking of taking my own life", "en"),
+    ("Everyone would be better off without me", "en"),
+    ("Je veux mourir", "fr"),
+    ("Je me fais du mal depuis des semaines", "fr"),
+    ("J'ai envie de me couper les veines", "fr"),
+    ("Je veux me blesser exprès", "fr"),
+    # Crisis terms are scanned whatever the preferred language
+    ("je veux me suicider", "en"),
+])
+def test_detects_crisis(text, language):
+    assert emotion_classifier.classify(text, language)["crisis_detected"]
+
+
+@pytest.mark.parametrize("text, language", [
+    ("I am feeling very sad and depressed today.", "en"),
+    ("I am not suicidal", "en"),
+    ("I don't want to die", "en"),
+    ("I cut myself shaving", "en"),
+    ("I wanted to die laughing", "en"),
+    ("I spend my life studying", "en"),
+    ("Je ne veux pas mourir", "fr"),
+    ("Je me coupe les cheveux", "fr"),
+    ("Je vais me couper les cheveux demain", "fr"),
+    ("Ça me blesse quand il dit ça", "fr"),
+    ("Je me suis blessé au foot", "fr"),
+    ("I am so happy, not suicidal at all, I do not want to die", "en"),
+])
+def test_no_false_alarm(text, language):
+    assert not emotion_classifier.classify(text, language)["crisis_detected"]
+
+
+def test_several_negated_terms_still_fire():
+    text = "I am not suicidal and I don't want to die, but I cannot go on"
+    assert emotion_classifier.classify(text)["crisis_detected"]
+
+
+def test_crisis_pins_sentiment_negative():
+    result = emotion_classifier.classify("I am so happy, but I want to kill myself")
+    assert result["sentiment"]["label"] == "negative"
+    assert result["sentiment"]["score"] <= -0.9
+
+
+def test_negated_positive_leans_negative():
+    result = emotion_classifier.classify("I'm not happy with how things are going")
+    assert result["sentiment"]["score"] < 0
+    assert result["emotions"]["joy"] == 0.0
@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.generation_jobs import (
+    JOB_QUEUED,
+    JOB_SUCCEEDED,
+    GenerationJobs,
+    JobConflict,
+    MemoryJobStore,
+    SQLiteJobStore,
+)
+
+
+def make_job(job_id, key="key-1", owner="1", expires_in=60.0):
+    now = time.time()
+    return {
+        "id": job_id,
+        "owner": owner,
+        "kind": "draft-message",
+        "request_key": "request",
+        "idempotency_key": key,
+        "status": JOB_QUEUED,
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+        "expires_at": now + expires_in,
+    }
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteJobStore(str(tmp_path / "jobs.db"))
+    return MemoryJobStore()
+
+
+def test_create_returns_the_job_holding_the_key(store):
+    assert store.create(make_job("a"))["id"] == "a"
+    assert store.create(make_job("b"))["id"] == "a"
+    assert store.create(make_job("c", owner="2"))["id"] == "c"
+    assert store.create(make_job("d", key=None))["id"] == "d"
+    assert store.create(make_job("e", key=None))["id"] == "e"
+
+
+def test_expired_job_gives_up_its_key(store):
+    store.create(make_job("a", expires_in=-1))
+    assert store.create(make_job("b"))["id"] == "b"
+
+
+def test_sqlite_create_is_atomic_across_connections(tmp_path):
+    # Two connections stand in for two worker processes
+    path = str(tmp_path / "jobs.db")
+    first, second = SQLiteJobStore(path), SQLiteJobStore(path)
+    assert first.create(make_job("a"))["id"] == "a"
+    assert second.create(make_job("b"))["id"] == "a"
+    second.put(dict(make_job("a"), status=JOB_SUCCEEDED, result={"draft": "hi"}))
+    assert first.get("a")["result"] == {"draft": "hi"}
+
+
+def run_jobs(store, scenario):
+    calls = []
+
+    async def handler(params):
+        calls.append(params)
+        await asyncio.sleep(0.01)
+        return {"draft": params["text"]}
+
+    jobs = GenerationJobs(
+        store, {"draft-message": handler}, workers=2, max_queue=10, ttl=60, timeout=5
+    )
+
+    async def main():
+        await jobs.start()
+        try:
+            return await scenario(jobs)
+        finally:
+            await jobs.close()
+
+    return asyncio.run(main()), calls, jobs
+
+
+def test_submissions_with_one_key_share_one_generation(store):
+    async def scenario(jobs):
+        submitted = await asyncio.gather(*(
+            jobs.submit("1", "draft-message", {"text": "hi"}, idempotency_key="key-1")
+            for _ in range(5)
+        ))
+        finished = await jobs.wait(submitted[0]["id"], "1", timeout=5)
+        return submitted, finished
+
+    (submitted, finished), calls, jobs = run_jobs(store, scenario)
+    assert len({job["id"] for job in submitted}) == 1
+    assert len(calls) == 1
+    assert jobs.reused == 4
+    assert finished["status"] == JOB_SUCCEEDED
+    assert finished["result"] == {"draft": "hi"}
+
+
+def test_reusing_a_key_for_another_request_conflicts(store):
+    async def scenario(jobs):
+        await jobs.submit("1", "draft-message", {"text": "hi"}, idempotency_key="key-1")
+        with pytest.raises(JobConflict):
+            await jobs.submit("1", "draft-message", {"text": "bye"}, idempotency_key="key-1")
+        # Keys are per owner
+        other = await jobs.submit("2", "draft-message", {"text": "bye"}, idempotency_key="key-1")
+        assert await jobs.get(other["id"], "1") is None
+        return other
+
+    other, _, _ = run_jobs(store, scenario)
+    assert other["owner"] == "2"
@@ -0,0 +1,27 @@
+from types import SimpleNamespace
+
+from app.api.metrics import route_template
+from app.main import app
+
+
+def test_route_template_skips_routes_without_a_path():
+    class PathlessRoute:
+        def matches(self, scope):
+            raise AssertionError("routes without a path are never matched")
+
+    routes = [PathlessRoute(), *app.router.routes]
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/ai/chat/sessions/abc",
+        "root_path": "",
+        "app": SimpleNamespace(router=SimpleNamespace(routes=routes)),
+    }
+    assert route_template(scope) == "/api/ai/chat/sessions/{session_id}"
+    assert route_template(dict(scope, path="/nowhere")) == "unmatched"
+
+
+def test_requests_are_labelled_by_route_template(client, auth_headers):
+    client.get("/api/ai/chat/sessions/abc", headers=auth_headers)
+    body = client.get("/metrics").text
+    assert 'route="/api/ai/chat/sessions/{session_id}"' in body
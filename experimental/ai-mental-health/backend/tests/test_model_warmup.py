@@ -0,0 +1,59 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services import model_warmup
+from app.services.model_warmup import ModelWarmup, effective_embedding_models
+
+
+class RecordingClient:
+    """Answers every call and records which path each model was sent to."""
+
+    def __init__(self, urls):
+        self.backends = SimpleNamespace(backends=[
+            SimpleNamespace(url=url, loaded_models=set()) for url in urls
+        ])
+        self.calls = []
+
+    async def post_to(self, backend, path, payload, timeout=None):
+        self.calls.append((backend.url, path, payload["model"]))
+        return SimpleNamespace(raise_for_status=lambda: None)
+
+
+def test_embedding_models_are_warmed_through_embeddings():
+    client = RecordingClient(["http://a", "http://b"])
+    warmup = ModelWarmup(
+        client,
+        ["llama3", "nomic-embed-text"],
+        keep_alive="30m",
+        timeout=5,
+        keep_warm_interval=0,
+        embedding_models=["nomic-embed-text"],
+    )
+
+    async def run():
+        warmup.start()
+        await warmup._task
+
+    asyncio.run(run())
+    assert warmup.ready
+    assert sorted(client.calls) == [
+        ("http://a", "/api/embeddings", "nomic-embed-text"),
+        ("http://a", "/api/generate", "llama3"),
+        ("http://b", "/api/embeddings", "nomic-embed-text"),
+        ("http://b", "/api/generate", "llama3"),
+    ]
+    assert warmup.stats()["backends"]["http://b"] == {
+        "llama3": "warm",
+        "nomic-embed-text": "warm",
+    }
+
+
+def test_semantic_cache_embedding_model_is_warmed(monkeypatch):
+    settings = model_warmup.ai_settings
+    monkeypatch.setattr(settings, "WARMUP_EMBEDDING_MODELS", ["all-minilm:latest"])
+    monkeypatch.setattr(settings, "SEMANTIC_CACHE_ENDPOINTS", [])
+    assert effective_embedding_models() == ["all-minilm:latest"]
+    monkeypatch.setattr(settings, "SEMANTIC_CACHE_ENDPOINTS", ["draft-message"])
+    assert effective_embedding_models() == [
+        model_warmup.model_name(settings.EMBEDDING_MODEL), "all-minilm:latest"
+    ]
@@ -0,0 +1,113 @@
+import asyncio
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.base import ASYNC_URL
+from app.models.mood import MoodEntry, MoodRollup
+from app.services import mood_buffer as mood_buffer_module
+from app.services.mood_buffer import MoodWriteBuffer, period_start
+
+
+@pytest.fixture
+def sessions(client, monkeypatch):
+    # An engine per test, bound to the event loop the test runs on
+    engine = create_async_engine(ASYNC_URL)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(mood_buffer_module, "AsyncSessionLocal", factory)
+    yield factory
+
+
+def run(coroutine_function, factory):
+    async def main():
+        try:
+            return await coroutine_function()
+        finally:
+            await factory.kw["bind"].dispose()
+
+    return asyncio.run(main())
+
+
+def test_period_start():
+    wednesday = datetime(2024, 5, 15, 13, 30)
+    assert period_start(wednesday, "day") == date(2024, 5, 15)
+    assert period_start(wednesday, "week") == date(2024, 5, 13)
+
+
+def test_flush_increments_rollups(sessions):
+    buffer = MoodWriteBuffer(batch_size=100, flush_interval=60, max_buffered=100)
+    timestamp = datetime(2024, 5, 15, 9, 0)
+
+    async def scenario():
+        for mood in ("happy", "happy", "sad"):
+            await buffer.add(9001, mood, timestamp)
+        assert await buffer.flush() == 3
+        await buffer.add(9001, "happy", datetime(2024, 5, 16, 9, 0))
+        assert await buffer.flush() == 1
+        async with sessions() as db:
+            result = await db.execute(
+                select(
+                    MoodRollup.period, MoodRollup.period_start, MoodRollup.mood, MoodRollup.count
+                ).where(MoodRollup.user_id == 9001)
+            )
+            return {tuple(row) for row in result}
+
+    rollups = run(scenario, sessions)
+    assert rollups == {
+        ("day", date(2024, 5, 15), "happy", 2),
+        ("day", date(2024, 5, 15), "sad", 1),
+        ("day", date(2024, 5, 16), "happy", 1),
+        ("week", date(2024, 5, 13), "happy", 3),
+        ("week", date(2024, 5, 13), "sad", 1),
+    }
+
+
+def test_poison_entry_is_dropped_after_max_attempts(sessions):
+    buffer = MoodWriteBuffer(batch_size=100, flush_interval=60, max_buffered=100, max_attempts=2)
+    timestamp = datetime(2024, 6, 3, 9, 0)
+
+    async def scenario():
+        await buffer.add(9002, "calm", timestamp)
+        # Rollups need a mood, so this row can never be written
+        await buffer.add(9002, None, timestamp)
+        await buffer.add(9002, "sad", timestamp)
+        for _ in range(2):
+            with pytest.raises(Exception):
+                await buffer.flush()
+        assert buffer.stats()["pending"] == 3
+        assert await buffer.flush() == 2
+        async with sessions() as db:
+            result = await db.execute(select(MoodEntry.mood).where(MoodEntry.user_id == 9002))
+            return sorted(result.scalars())
+
+    assert run(scenario, sessions) == ["calm", "sad"]
+    stats = buffer.stats()
+    assert (stats["pending"], stats["dropped_entries"], stats["failed_flushes"]) == (0, 1, 2)
+
+
+def test_transient_failures_never_drop_entries(sessions, monkeypatch):
+    buffer = MoodWriteBuffer(batch_size=100, flush_interval=60, max_buffered=100, max_attempts=1)
+
+    async def locked(entries):
+        raise OperationalError("INSERT", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(buffer, "_write", locked)
+
+    async def scenario():
+        await buffer.add(9003, "calm", datetime(2024, 6, 3, 9, 0))
+        with pytest.raises(OperationalError):
+            await buffer.flush()
+        for _ in range(3):
+            assert await buffer.flush() == 0
+
+    run(scenario, sessions)
+    assert buffer.stats()["pending"] == 1
+    assert buffer.dropped_entries == 0
+
+
+def test_buffer_stats_require_authentication(client, auth_headers):
+    assert client.get("/api/users/mood/buffer/stats").status_code == 401
+    assert client.get("/api/users/mood/buffer/stats", headers=auth_headers).status_code == 200
@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.password_hasher import PasswordHasher, PasswordHasherBusy
+
+
+def slow_double(value):
+    time.sleep(0.05)
+    return value * 2
+
+
+def test_close_waits_for_queued_and_running_operations():
+    hasher = PasswordHasher("thread", workers=1, max_queue=10)
+
+    async def run():
+        operations = [asyncio.create_task(hasher._run(slow_double, index)) for index in range(3)]
+        await asyncio.sleep(0.01)
+        await hasher.close()
+        assert all(operation.done() for operation in operations)
+        assert [operation.result() for operation in operations] == [0, 2, 4]
+        # The hasher still works after close, on a new pool
+        assert await hasher._run(slow_double, 5) == 10
+        await hasher.close()
+
+    asyncio.run(run())
+    assert hasher.completed == 4
+
+
+def test_rejects_beyond_max_queue():
+    hasher = PasswordHasher("thread", workers=1, max_queue=1)
+
+    async def run():
+        running = asyncio.create_task(hasher._run(slow_double, 1))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(hasher._run(slow_double, 2))
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordHasherBusy):
+            await hasher._run(slow_double, 3)
+        assert await asyncio.gather(running, queued) == [2, 4]
+        await hasher.close()
+
+    asyncio.run(run())
+    assert hasher.rejected == 1
+
+
+@pytest.mark.parametrize("path", [
+    "/api/auth/hasher/stats",
+    "/api/auth/cache/stats",
+    "/api/ai/llm/stats",
+])
+def test_stats_require_authentication(client, auth_headers, path):
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers=auth_headers).status_code == 200
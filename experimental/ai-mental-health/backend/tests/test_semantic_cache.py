@@ -0,0 +1,130 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.ai_service import ai_service
+from app.services.semantic_cache import SemanticCache, VectorIndex
+
+EMBEDDINGS = {
+    "I feel so stressed about exams": [1.0, 0.1, 0.0],
+    "exams are stressing me out": [0.98, 0.15, 0.0],
+    "I love my dog": [0.0, 0.0, 1.0],
+}
+PAYLOAD = {"model": "llama3", "system": "Draft a message", "options": {"temperature": 0}}
+
+
+class EmbeddingClient:
+    """Answers /api/embeddings from a table, optionally waiting for a release."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = None
+
+    async def post(self, path, json, scheduled=True):
+        self.calls.append((path, scheduled))
+        if self.release is not None:
+            await self.release.wait()
+        return SimpleNamespace(
+            raise_for_status=lambda: None,
+            json=lambda: {"embedding": EMBEDDINGS[json["prompt"]]},
+        )
+
+
+def make_cache(client, mode="flat", max_embeddings=4):
+    return SemanticCache(
+        client,
+        VectorIndex(16, mode),
+        "nomic-embed-text",
+        ttl=60,
+        endpoints=["draft-message"],
+        thresholds={"draft-message": 0.95},
+        default_threshold=0.95,
+        max_embeddings=max_embeddings,
+    )
+
+
+@pytest.mark.parametrize("mode", ["flat", "int8", "ivf"])
+def test_paraphrase_reuses_the_completion(mode):
+    client = EmbeddingClient()
+    cache = make_cache(client, mode)
+
+    async def scenario():
+        completion, vector = await cache.get(
+            "draft-message", PAYLOAD, "I feel so stressed about exams"
+        )
+        assert completion is None
+        await cache.set("draft-message", PAYLOAD, vector, "Hi, can we talk?")
+        paraphrase, _ = await cache.get("draft-message", PAYLOAD, "exams are stressing me out")
+        unrelated, _ = await cache.get("draft-message", PAYLOAD, "I love my dog")
+        other_model, _ = await cache.get(
+            "draft-message", dict(PAYLOAD, model="mistral"), "exams are stressing me out"
+        )
+        return paraphrase, unrelated, other_model
+
+    assert asyncio.run(scenario()) == ("Hi, can we talk?", None, None)
+    # Embeddings never take a scheduler slot from a generation
+    assert {scheduled for _, scheduled in client.calls} == {False}
+
+
+def test_namespaces_are_stable_hashes():
+    cache = make_cache(EmbeddingClient())
+    first = cache.namespace("draft-message", PAYLOAD, "fr")
+    assert first == cache.namespace("draft-message", dict(PAYLOAD, prompt="other"), "fr")
+    assert first != cache.namespace("draft-message", PAYLOAD, "en")
+    assert 0 <= first < 2 ** 60
+    assert not hasattr(cache, "_namespaces")
+
+
+def test_lookups_beyond_max_embeddings_skip_the_cache():
+    client = EmbeddingClient()
+    cache = make_cache(client, max_embeddings=1)
+
+    async def scenario():
+        client.release = asyncio.Event()
+        first = asyncio.create_task(
+            cache.get("draft-message", PAYLOAD, "I feel so stressed about exams")
+        )
+        await asyncio.sleep(0)
+        skipped = await cache.get("draft-message", PAYLOAD, "I love my dog")
+        client.release.set()
+        await first
+        return skipped
+
+    assert asyncio.run(scenario()) == (None, None)
+    stats = cache.stats()
+    assert stats["endpoints"]["draft-message"]["skipped"] == 1
+    assert stats["embeddings_in_flight"] == 0
+    assert len(client.calls) == 1
+
+
+def test_index_search_stays_in_its_namespace():
+    index = VectorIndex(2)
+    first = index.add(np.array([1.0, 0.0], dtype=np.float32), 0)
+    second = index.add(np.array([0.0, 1.0], dtype=np.float32), 1)
+    assert index.search(np.array([1.0, 0.1], dtype=np.float32), 1)[0] == second
+    index.remove(first)
+    assert len(index) == 1
+    assert index.search(np.array([1.0, 0.0], dtype=np.float32), 0) is None
+
+
+def test_emotion_feedback_is_only_reused_for_its_owner(monkeypatch):
+    calls = []
+
+    async def generate(prompt, system_prompt, **kwargs):
+        calls.append((kwargs["semantic_text"], kwargs["semantic_scope"]))
+        return "You are not alone."
+
+    monkeypatch.setattr(ai_service, "_generate_completion", generate)
+
+    async def scenario():
+        for owner in ("1", "2", None):
+            await ai_service._llm_emotion_analysis("I feel so stressed", owner=owner)
+
+    asyncio.run(scenario())
+    (text_1, scope_1), (text_2, scope_2), (anonymous, _) = calls
+    assert text_1 == text_2 == "I feel so stressed"
+    assert scope_1 != scope_2
+    # Without an owner nothing is looked up or stored
+    assert anonymous is None
@@ -0,0 +1,76 @@
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+import app.api.ai_communication as ai_communication
+from app.services.crisis_gate import CrisisScanner
+
+CRISIS_MESSAGE = "I want to kill myself"
+
+
+def test_scanner_reports_a_crisis_split_across_tokens():
+    scanner = CrisisScanner("en")
+    assert scanner.feed("It sounds like you are thinking about sui") is None
+    crisis = scanner.feed("cide right now. ")
+    assert crisis["crisis_detected"]
+    # Reported once
+    assert scanner.feed("suicide ") is None
+    assert scanner.finish() is None
+
+
+def test_scanner_checks_the_last_word_when_the_stream_ends():
+    scanner = CrisisScanner("en")
+    assert scanner.feed("I hear that you want to") is None
+    assert scanner.feed(" die") is None
+    assert scanner.finish()["crisis_detected"]
+
+
+def test_scanner_ignores_ordinary_text():
+    scanner = CrisisScanner("en")
+    for token in ["School ", "was ", "fine ", "today."]:
+        assert scanner.feed(token) is None
+    assert scanner.finish() is None
+
+
+@pytest.mark.parametrize("reply", [
+    "If you ever have thoughts of suicide, please call 988.",
+    "Feeling hopeless and worthless is really hard, and you deserve support.",
+    "If you're thinking about suicide, you can call or text 988 any time.",
+    "I don't think you're in danger, but Kids Help Phone is there if you need it.",
+    "Si tu penses au suicide, appelle le 988.",
+])
+def test_scanner_ignores_referrals_in_a_reply(reply):
+    scanner = CrisisScanner("en")
+    for token in reply.split(" "):
+        assert scanner.feed(token + " ") is None
+    assert scanner.finish() is None
+
+
+def test_websocket_requires_authentication(client):
+    with pytest.raises(WebSocketDisconnect) as disconnect:
+        with client.websocket_connect("/api/ai/ws/chat?token=invalid"):
+            pass
+    assert disconnect.value.code == 1008
+
+
+def test_websocket_reports_a_crisis_before_the_reply(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(ai_communication.ai_settings, "CRISIS_SKIP_LLM", True)
+    with client.websocket_connect("/api/ai/ws/chat", headers=auth_headers) as websocket:
+        session = websocket.receive_json()
+        assert session["type"] == "session"
+        websocket.send_json({"type": "message", "content": CRISIS_MESSAGE})
+        events = [websocket.receive_json() for _ in range(4)]
+    assert [event["type"] for event in events] == ["crisis", "token", "sentiment", "done"]
+    assert events[0]["source"] == "input"
+    assert events[1]["content"] == events[0]["message"]
+    # The crisis gate's sentiment, not an LLM second opinion
+    assert events[2]["sentiment"] == events[0]["sentiment"]
+
+
+def test_websocket_reports_llm_failures_as_events(client, auth_headers):
+    with client.websocket_connect("/api/ai/ws/chat", headers=auth_headers) as websocket:
+        websocket.receive_json()
+        websocket.send_text("not json")
+        assert websocket.receive_json()["detail"] == "Events must be JSON objects"
+        # The LLM is unreachable in tests
+        websocket.send_json({"type": "message", "content": "Hello there"})
+        assert websocket.receive_json()["type"] == "error"